@@ -1,6 +1,9 @@
-from typing import Annotated, Any
+from collections.abc import AsyncGenerator, Awaitable, Callable
+from dataclasses import replace
+from typing import Annotated, Any, cast
 
 from fastapi import Depends, HTTPException, Request
+from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from ..core.config import settings
@@ -8,31 +11,42 @@ from ..core.db.database import async_get_db
 from ..core.exceptions.http_exceptions import ForbiddenException, RateLimitException, UnauthorizedException
 from ..core.logger import logging
 from ..core.security import TokenType, oauth2_scheme, verify_token
-from ..core.utils.rate_limit import rate_limiter
-from ..crud.crud_rate_limit import crud_rate_limits
-from ..crud.crud_tier import crud_tiers
-from ..crud.crud_users import crud_users
-from ..schemas.rate_limit import RateLimitRead, sanitize_path
-from ..schemas.tier import TierRead
+from ..core.utils.rate_limit import LocalRateLimiter, RateLimitResult, rate_limit_headers, rate_limiter
+from ..core.utils.rate_limit_rules import rate_limit_rules
+from ..core.utils.user_cache import user_cache
+from ..schemas.rate_limit import sanitize_path
 
 logger = logging.getLogger(__name__)
 
 DEFAULT_LIMIT = settings.DEFAULT_RATE_LIMIT_LIMIT
 DEFAULT_PERIOD = settings.DEFAULT_RATE_LIMIT_PERIOD
+DEFAULT_CONCURRENCY = settings.DEFAULT_RATE_LIMIT_CONCURRENCY
+LOGIN_LIMIT = settings.LOGIN_RATE_LIMIT_LIMIT
+LOGIN_PERIOD = settings.LOGIN_RATE_LIMIT_PERIOD
 
+_local_login_limiter = LocalRateLimiter(
+    workers=settings.REDIS_RATE_LIMIT_FALLBACK_WORKERS, max_keys=settings.REDIS_RATE_LIMIT_LEASE_MAX_KEYS
+)
+
+
+async def _authenticate(request: Request, token: str, db: AsyncSession) -> dict[str, Any] | None:
+    """Return the user of an access token, resolved once per request and shared by every dependency."""
+    auth = cast(tuple[str, dict[str, Any] | None] | None, getattr(request.state, "auth", None))
+    if auth is not None and auth[0] == token:
+        return auth[1]
 
-async def get_current_user(
-    token: Annotated[str, Depends(oauth2_scheme)], db: Annotated[AsyncSession, Depends(async_get_db)]
-) -> dict[str, Any]:
     token_data = await verify_token(token, TokenType.ACCESS, db)
-    if token_data is None:
-        raise UnauthorizedException("User not authenticated.")
+    user = await user_cache.get(db, token_data.username_or_email) if token_data is not None else None
+    request.state.auth = (token, user)
+    return user
 
-    if "@" in token_data.username_or_email:
-        user = await crud_users.get(db=db, email=token_data.username_or_email, is_deleted=False)
-    else:
-        user = await crud_users.get(db=db, username=token_data.username_or_email, is_deleted=False)
 
+async def get_current_user(
+    request: Request,
+    token: Annotated[str, Depends(oauth2_scheme)],
+    db: Annotated[AsyncSession, Depends(async_get_db)],
+) -> dict[str, Any]:
+    user = await _authenticate(request, token, db)
     if user:
         return user
 
@@ -49,11 +63,7 @@ async def get_optional_user(request: Request, db: AsyncSession = Depends(async_g
         if token_type.lower() != "bearer" or not token_value:
             return None
 
-        token_data = await verify_token(token_value, TokenType.ACCESS, db)
-        if token_data is None:
-            return None
-
-        return await get_current_user(token_value, db=db)
+        return await _authenticate(request, token_value, db)
 
     except HTTPException as http_exc:
         if http_exc.status_code != 401:
@@ -72,25 +82,29 @@ async def get_current_superuser(current_user: Annotated[dict, Depends(get_curren
     return current_user
 
 
-async def rate_limiter_dependency(
-    request: Request, db: Annotated[AsyncSession, Depends(async_get_db)], user: dict | None = Depends(get_optional_user)
-) -> None:
+def _rate_limiting_disabled() -> bool:
+    return rate_limiter.client is None and rate_limiter.fallback is None
+
+
+async def _check_rate_limit(request: Request, db: AsyncSession, user: dict | None, units: int) -> None:
     if hasattr(request.app.state, "initialization_complete"):
         await request.app.state.initialization_complete.wait()
+    if _rate_limiting_disabled():
+        return
 
     path = sanitize_path(request.url.path)
+    cost = 1
     if user:
         user_id = user["id"]
-        tier = await crud_tiers.get(db, id=user["tier_id"], schema_to_select=TierRead)
-        if tier:
-            rate_limit = await crud_rate_limits.get(
-                db=db, tier_id=tier["id"], path=path, schema_to_select=RateLimitRead
-            )
+        await rate_limit_rules.ensure_loaded(db)
+        tier_name = rate_limit_rules.tier_name(user["tier_id"])
+        if tier_name is not None:
+            rate_limit = rate_limit_rules.get(user["tier_id"], path)
             if rate_limit:
-                limit, period = rate_limit["limit"], rate_limit["period"]
+                limit, period, cost = rate_limit.limit, rate_limit.period, rate_limit.cost
             else:
                 logger.warning(
-                    f"User {user_id} with tier '{tier['name']}' has no specific rate limit for path '{path}'. \
+                    f"User {user_id} with tier '{tier_name}' has no specific rate limit for path '{path}'. \
                         Applying default rate limit."
                 )
                 limit, period = DEFAULT_LIMIT, DEFAULT_PERIOD
@@ -101,6 +115,134 @@ async def rate_limiter_dependency(
         user_id = request.client.host if request.client else "unknown"
         limit, period = DEFAULT_LIMIT, DEFAULT_PERIOD
 
-    is_limited = await rate_limiter.is_rate_limited(db=db, user_id=user_id, path=path, limit=limit, period=period)
-    if is_limited:
-        raise RateLimitException("Rate limit exceeded.")
+    # A request charged more than the whole limit could never be admitted: it takes the full period instead.
+    charge = min(cost * units, limit)
+    result = await rate_limiter.acquire(user_id=user_id, path=path, limit=limit, period=period, cost=charge)
+    # Turned into RateLimit-* headers on the response by RateLimitHeadersMiddleware.
+    request.state.rate_limit = result
+    if not result.allowed:
+        exception = RateLimitException("Rate limit exceeded.")
+        exception.headers = rate_limit_headers(result)
+        raise exception
+
+
+async def rate_limiter_dependency(
+    request: Request, db: Annotated[AsyncSession, Depends(async_get_db)], user: dict | None = Depends(get_optional_user)
+) -> None:
+    await _check_rate_limit(request, db, user, units=1)
+
+
+def weighted_rate_limiter(estimate: Callable[[Request], int]) -> Callable[..., Awaitable[None]]:
+    """Rate limit dependency charging each request by the work it causes.
+
+    Every request spends ``estimate(request)`` units, multiplied by the ``cost`` of the tier's rate
+    limit for the path, so a limit can be budgeted in upstream calls or result pages rather than in
+    requests. Paths without a rate limit cost one per unit. A charge above the limit is capped at the
+    limit, so the most expensive requests use up a whole period rather than being rejected forever.
+
+    Parameters
+    ----------
+    estimate: Callable[[Request], int]
+        Returns the number of units a request uses, from its path and query parameters. It runs
+        before request validation, so it must tolerate missing or malformed parameters.
+
+    Returns
+    -------
+    Callable[..., Awaitable[None]]
+        The dependency, to use with ``Depends``.
+    """
+
+    async def dependency(
+        request: Request,
+        db: Annotated[AsyncSession, Depends(async_get_db)],
+        user: dict | None = Depends(get_optional_user),
+    ) -> None:
+        await _check_rate_limit(request, db, user, units=max(1, estimate(request)))
+
+    return dependency
+
+
+async def concurrency_limiter_dependency(
+    request: Request, db: Annotated[AsyncSession, Depends(async_get_db)], user: dict | None = Depends(get_optional_user)
+) -> AsyncGenerator[None, None]:
+    """Limit how many requests a user, or an anonymous client address, has in flight on a path.
+
+    The limit is the ``concurrency`` of the tier's rate limit for the path, or the default concurrency
+    when it has none. Requests over the limit wait briefly for a slot and are rejected when none frees up.
+    """
+    if hasattr(request.app.state, "initialization_complete"):
+        await request.app.state.initialization_complete.wait()
+    if _rate_limiting_disabled():
+        yield
+        return
+
+    path = sanitize_path(request.url.path)
+    concurrency = DEFAULT_CONCURRENCY
+    if user:
+        user_id = user["id"]
+        await rate_limit_rules.ensure_loaded(db)
+        rate_limit = rate_limit_rules.get(user["tier_id"], path)
+        if rate_limit is not None and rate_limit.concurrency is not None:
+            concurrency = rate_limit.concurrency
+    else:
+        user_id = request.client.host if request.client else "unknown"
+
+    if concurrency is None:
+        yield
+        return
+
+    holder = await rate_limiter.acquire_slot(user_id=user_id, path=path, limit=concurrency)
+    if holder is None:
+        exception = RateLimitException("Too many concurrent requests.")
+        exception.headers = {"Retry-After": "1"}
+        raise exception
+
+    try:
+        yield
+    finally:
+        await rate_limiter.release_slot(user_id=user_id, path=path, holder=holder)
+
+
+async def _count_login_attempt(subject: str, cost: int) -> RateLimitResult:
+    if rate_limiter.client is None:
+        return _local_login_limiter.check(
+            user_id=subject, path="login", limit=LOGIN_LIMIT, period=LOGIN_PERIOD, cost=cost
+        )
+    return await rate_limiter.acquire(user_id=subject, path="login", limit=LOGIN_LIMIT, period=LOGIN_PERIOD, cost=cost)
+
+
+def _reject_login(result: RateLimitResult) -> RateLimitException:
+    exception = RateLimitException("Too many login attempts.")
+    exception.headers = rate_limit_headers(result)
+    return exception
+
+
+async def login_rate_limiter_dependency(
+    request: Request, form_data: Annotated[OAuth2PasswordRequestForm, Depends()]
+) -> AsyncGenerator[None, None]:
+    """Limit login attempts per client address, and failed login attempts per username.
+
+    Every attempt counts against the client address, which stops one client from trying many accounts.
+    Only failed attempts count against the username, which slows password guessing on one account from
+    many addresses without locking its owner out for logging in often. A username out of attempts is
+    rejected before its password is checked, so rejected attempts never reach the password hashing pool.
+
+    Without rate limit Redis, attempts are counted in this worker by a `LocalRateLimiter`, which admits
+    its share of the limits just like the fallback used while Redis is down.
+    """
+    client = request.client.host if request.client else "unknown"
+    result = await _count_login_attempt(f"ip:{client}", cost=1)
+    request.state.rate_limit = result
+    if not result.allowed:
+        raise _reject_login(result)
+
+    username = f"user:{form_data.username.lower()}"
+    failures = await _count_login_attempt(username, cost=0)
+    if failures.remaining <= 0:
+        raise _reject_login(replace(failures, allowed=False, retry_after=failures.reset_after))
+
+    try:
+        yield
+    except UnauthorizedException:
+        await _count_login_attempt(username, cost=1)
+        raise
@@ -1,8 +1,10 @@
 from fastapi import APIRouter
 
 
+from .cache import router as cache_router
 from .flights import router as flights_router
 from .health import router as health_router
+from .locations import router as locations_router
 from .login import router as login_router
 from .logout import router as logout_router
 from .posts import router as posts_router
@@ -20,4 +22,6 @@ router.include_router(posts_router)
 router.include_router(tasks_router)
 router.include_router(tiers_router)
 router.include_router(rate_limits_router)
-router.include_router(flights_router) 
\ No newline at end of file
+router.include_router(flights_router)
+router.include_router(locations_router)
+router.include_router(cache_router) 
\ No newline at end of file
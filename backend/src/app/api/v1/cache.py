@@ -0,0 +1,66 @@
+from typing import Annotated, Any
+
+from fastapi import APIRouter, Depends, Query, Request
+from fastapi.responses import PlainTextResponse
+from redis.asyncio import Redis
+
+from ...api.dependencies import get_current_superuser
+from ...core.utils.cache import async_get_redis
+from ...core.utils.cache_stats import cache_stats, to_prometheus
+from ...core.utils.redis_connections import redis_connections
+from ...core.utils.redis_connections import to_prometheus as pools_to_prometheus
+
+router = APIRouter(prefix="/cache", tags=["cache"])
+
+
+@router.get("/stats", dependencies=[Depends(get_current_superuser)], response_model=None)
+async def read_cache_stats(
+    request: Request,
+    redis: Annotated[Redis | None, Depends(async_get_redis)],
+    format: str = Query(default="json", pattern="^(json|prometheus)$", description="Response format"),
+) -> dict[str, Any] | PlainTextResponse:
+    """Return hit, miss, size and latency counters for every `@cache` key prefix, summed over all workers.
+
+    Parameters
+    ----------
+    request: Request
+        FastAPI request object
+    redis: Redis | None
+        Redis client holding the aggregated counters. Without it, only this worker's counters are returned
+    format: str
+        ``json`` (default) or ``prometheus`` for the text exposition format
+
+    Returns
+    -------
+    Dict[str, Any] | PlainTextResponse
+        The counters by key prefix
+    """
+    totals = await cache_stats.collect(redis) if redis is not None else cache_stats.snapshot()
+    if format == "prometheus":
+        return PlainTextResponse(to_prometheus(totals), media_type="text/plain; version=0.0.4")
+    return {"data": totals}
+
+
+@router.get("/connections", dependencies=[Depends(get_current_superuser)], response_model=None)
+async def read_connection_stats(
+    request: Request,
+    format: str = Query(default="json", pattern="^(json|prometheus)$", description="Response format"),
+) -> dict[str, Any] | PlainTextResponse:
+    """Return the utilization of this worker's Redis connection pools.
+
+    Parameters
+    ----------
+    request: Request
+        FastAPI request object
+    format: str
+        ``json`` (default) or ``prometheus`` for the text exposition format
+
+    Returns
+    -------
+    Dict[str, Any] | PlainTextResponse
+        Connections in use and idle, the pool limit and the clients sharing each pool, by Redis URL
+    """
+    stats = redis_connections.stats()
+    if format == "prometheus":
+        return PlainTextResponse(pools_to_prometheus(stats), media_type="text/plain; version=0.0.4")
+    return {"data": stats}
@@ -1,17 +1,85 @@
+import math
+from collections.abc import Awaitable, Callable
+from datetime import datetime
 from typing import Any
 
 from fastapi import APIRouter, Depends, Query, Request
 
-from ...api.dependencies import rate_limiter_dependency
-from ...core.utils.cache import cache
+from ...api.dependencies import concurrency_limiter_dependency, weighted_rate_limiter
+from ...core.utils.cache import CachedResult, CacheStatus, cache
 from ...schemas.flight import OneWaySearchRequest, RoundTripSearchRequest
-from ...services.flight_service import flight_service
+from ...services.flight_service import UpstreamResponseError, flight_service
 
 router = APIRouter(prefix="/flights", tags=["flights"])
 
+# Routes without flights are re-checked sooner than normal results; upstream failures are only
+# cached long enough to absorb a burst of retries.
+EMPTY_RESULT_EXPIRATION = 300
+UPSTREAM_ERROR_EXPIRATION = 10
 
-@router.get("/search/round-trip")
-@cache(key_prefix="round_trip_flights:{source}_{destination}", expiration=1800)
+# A search costs one unit per started week searched on each leg and per page of results, so a
+# default search of up to a week per leg fits in the anonymous limit several times. Wider date
+# ranges are charged as a month: the upstream does not search further than it returns results for.
+RESULTS_PER_PAGE = 20
+DAYS_PER_UNIT = 7
+MAX_CHARGED_DAYS = 31
+
+
+def _searched_days(request: Request, start: str, end: str) -> int:
+    """Days between two date query parameters, inclusive, or 1 when either is missing or invalid."""
+    try:
+        first = datetime.fromisoformat(request.query_params[start]).date()
+        last = datetime.fromisoformat(request.query_params[end]).date()
+    except (KeyError, ValueError):
+        return 1
+    return min(max((last - first).days + 1, 1), MAX_CHARGED_DAYS)
+
+
+def search_cost(*legs: tuple[str, str]) -> Callable[[Request], int]:
+    """Estimate the cost of a flight search whose legs are searched between the given date parameters."""
+
+    def estimate(request: Request) -> int:
+        try:
+            limit = min(max(int(request.query_params.get("limit", RESULTS_PER_PAGE)), 1), 100)
+        except ValueError:
+            limit = RESULTS_PER_PAGE
+        pages = math.ceil(limit / RESULTS_PER_PAGE)
+        return pages * sum(math.ceil(_searched_days(request, start, end) / DAYS_PER_UNIT) for start, end in legs)
+
+    return estimate
+
+
+round_trip_cost = search_cost(
+    ("outbound_department_date_start", "outbound_department_date_end"),
+    ("inbound_departure_date_start", "inbound_departure_date_end"),
+)
+one_way_cost = search_cost(("departure_date_start", "departure_date_end"))
+
+
+async def _search(
+    search: Callable[[dict[str, Any]], Awaitable[dict[str, Any]]], params: dict[str, Any]
+) -> CachedResult:
+    try:
+        data = await search(params)
+    except UpstreamResponseError:
+        return CachedResult({"data": []}, status=CacheStatus.ERROR)
+
+    return CachedResult(data, status=CacheStatus.OK if data.get("data") else CacheStatus.EMPTY)
+
+
+@router.get(
+    "/search/round-trip",
+    response_model=None,
+    dependencies=[Depends(weighted_rate_limiter(round_trip_cost)), Depends(concurrency_limiter_dependency)],
+)
+@cache(
+    key_prefix="round_trip_flights:{source}_{destination}",
+    expiration=1800,
+    empty_expiration=EMPTY_RESULT_EXPIRATION,
+    error_expiration=UPSTREAM_ERROR_EXPIRATION,
+    stampede_protection=True,
+    raw_response=True,
+)
 async def search_round_trip_flights(
     request: Request,
     source: str = Query(..., description="Origin location (e.g., Country:GB, City:london_gb)"),
@@ -46,11 +114,14 @@ async def search_round_trip_flights(
     inbound_departure_date_end: str | None = Query(default=None, description="Inbound end date"),
     outbound_department_date_start: str | None = Query(default=None, description="Outbound start date"),
     outbound_department_date_end: str | None = Query(default=None, description="Outbound end date"),
-) -> dict[str, Any]:
+) -> CachedResult:
     """Search for round-trip flights.
 
     Returns a list of available round-trip flight options based on search criteria.
-    Results are cached for 30 minutes to improve performance.
+    Results are cached for 30 minutes to improve performance; cache hits are served as the stored JSON bytes.
+    Empty results are cached for 5 minutes, and upstream errors (answered with an empty list) for 10 seconds.
+    Each search costs one rate limit unit per started week searched on each leg and per page of 20
+    results, at most the tier's whole limit, and the number of searches a client has in flight at once may be limited.
 
     Parameters
     ----------
@@ -68,8 +139,8 @@ async def search_round_trip_flights(
 
     Returns
     -------
-    Dict[str, Any]
-        Flight search results from API
+    CachedResult
+        Flight search results from API, unwrapped by the cache decorator
 
     Raises
     ------
@@ -111,12 +182,22 @@ async def search_round_trip_flights(
         outbound_department_date_end=outbound_department_date_end,
     )
 
-    data = await flight_service.search_round_trip(search_request.model_dump())
-    return data
+    return await _search(flight_service.search_round_trip, search_request.model_dump())
 
 
-@router.get("/search/one-way")
-@cache(key_prefix="one_way_flights:{source}_{destination}", expiration=1800)
+@router.get(
+    "/search/one-way",
+    response_model=None,
+    dependencies=[Depends(weighted_rate_limiter(one_way_cost)), Depends(concurrency_limiter_dependency)],
+)
+@cache(
+    key_prefix="one_way_flights:{source}_{destination}",
+    expiration=1800,
+    empty_expiration=EMPTY_RESULT_EXPIRATION,
+    error_expiration=UPSTREAM_ERROR_EXPIRATION,
+    stampede_protection=True,
+    raw_response=True,
+)
 async def search_one_way_flights(
     request: Request,
     source: str = Query(..., description="Origin location (e.g., Country:GB, City:london_gb)"),
@@ -149,11 +230,14 @@ async def search_one_way_flights(
     limit: int = Query(default=20, ge=1, le=100, description="Number of results"),
     departure_date_start: str | None = Query(default=None, description="Departure start date"),
     departure_date_end: str | None = Query(default=None, description="Departure end date"),
-) -> dict[str, Any]:
+) -> CachedResult:
     """Search for one-way flights.
 
     Returns a list of available one-way flight options based on search criteria.
-    Results are cached for 30 minutes to improve performance.
+    Results are cached for 30 minutes to improve performance; cache hits are served as the stored JSON bytes.
+    Empty results are cached for 5 minutes, and upstream errors (answered with an empty list) for 10 seconds.
+    Each search costs one rate limit unit per started week searched on each leg and per page of 20
+    results, at most the tier's whole limit, and the number of searches a client has in flight at once may be limited.
 
     Parameters
     ----------
@@ -171,8 +255,8 @@ async def search_one_way_flights(
 
     Returns
     -------
-    Dict[str, Any]
-        Flight search results from API
+    CachedResult
+        Flight search results from API, unwrapped by the cache decorator
 
     Raises
     ------
@@ -212,5 +296,4 @@ async def search_one_way_flights(
         departure_date_end=departure_date_end,
     )
 
-    data = await flight_service.search_one_way(search_request.model_dump())
-    return data
\ No newline at end of file
+    return await _search(flight_service.search_one_way, search_request.model_dump())
@@ -12,6 +12,8 @@ from ...core.db.database import async_get_db
 from ...core.health import check_database_health, check_redis_health
 from ...core.schemas import HealthCheck, ReadyCheck
 from ...core.utils.cache import async_get_redis
+from ...core.utils.password_hashing import password_hashing
+from ...core.utils.rate_limit import rate_limiter
 
 router = APIRouter(tags=["health"])
 
@@ -35,10 +37,12 @@ async def health():
 
 
 @router.get("/ready", response_model=ReadyCheck)
-async def ready(redis: Annotated[Redis, Depends(async_get_redis)], db: Annotated[AsyncSession, Depends(async_get_db)]):
+async def ready(
+    redis: Annotated[Redis | None, Depends(async_get_redis)], db: Annotated[AsyncSession, Depends(async_get_db)]
+):
     database_status = await check_database_health(db=db)
     LOGGER.debug(f"Database health check status: {database_status}")
-    redis_status = await check_redis_health(redis=redis)
+    redis_status = redis is not None and await check_redis_health(redis=redis)
     LOGGER.debug(f"Redis health check status: {redis_status}")
 
     overall_status = STATUS_HEALTHY if database_status and redis_status else STATUS_UNHEALTHY
@@ -53,5 +57,20 @@ async def ready(redis: Annotated[Redis, Depends(async_get_redis)], db: Annotated
         "redis": STATUS_HEALTHY if redis_status else STATUS_UNHEALTHY,
         "timestamp": datetime.now(UTC).isoformat(timespec="seconds"),
     }
+    # A degraded rate limiter still serves requests from its local fallback, so it does not fail readiness.
+    if rate_limiter.client is not None:
+        response["rate_limiter"] = rate_limiter.health()["status"]
 
     return JSONResponse(status_code=http_status, content=response)
+
+
+@router.get("/health/rate-limiter")
+async def rate_limiter_health() -> dict:
+    """Return whether rate limits are enforced through Redis or by the per-worker fallback."""
+    return rate_limiter.health()
+
+
+@router.get("/health/password-hashing")
+async def password_hashing_health() -> dict:
+    """Return the load, queueing and rejections of the password hashing pool."""
+    return password_hashing.stats()
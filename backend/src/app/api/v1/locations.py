@@ -0,0 +1,48 @@
+from typing import Any
+
+from fastapi import APIRouter, Query, Request
+
+from ...schemas.location import NearbyAirportsResponse
+from ...services.flight_service import flight_service
+
+router = APIRouter(prefix="/locations", tags=["locations"])
+
+
+@router.get("/nearby", response_model=NearbyAirportsResponse)
+async def read_nearby_airports(
+    request: Request,
+    lat: float = Query(..., ge=-90, le=90, description="Latitude of the client in degrees"),
+    lon: float = Query(..., ge=-180, le=180, description="Longitude of the client in degrees"),
+    radius: float = Query(default=150, gt=0, le=2000, description="Search radius in kilometres"),
+    limit: int = Query(default=10, ge=1, le=50, description="Maximum number of airports"),
+) -> dict[str, Any]:
+    """Find the airports closest to a coordinate.
+
+    Lets the frontend turn the browser geolocation into search locations without shipping
+    the airport list to the client.
+
+    Parameters
+    ----------
+    request: Request
+        FastAPI request object
+    lat: float
+        Latitude of the client
+    lon: float
+        Longitude of the client
+    radius: float
+        Search radius in kilometres (default: 150)
+    limit: int
+        Maximum number of airports to return (default: 10)
+
+    Returns
+    -------
+    Dict[str, Any]
+        The airports within ``radius``, nearest first
+
+    Raises
+    ------
+    FlightServiceError
+        If no airport coordinates dataset is configured
+    """
+    airports = flight_service.location_processor.find_nearby_airports(lat, lon, radius_km=radius, limit=limit)
+    return {"latitude": lat, "longitude": lon, "radius_km": radius, "data": airports}
@@ -5,9 +5,10 @@ from fastapi import APIRouter, Depends, Request, Response
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from ...api.dependencies import login_rate_limiter_dependency
 from ...core.config import settings
 from ...core.db.database import async_get_db
-from ...core.exceptions.http_exceptions import UnauthorizedException
+from ...core.exceptions.http_exceptions import CustomException, UnauthorizedException
 from ...core.schemas import Token
 from ...core.security import (
     ACCESS_TOKEN_EXPIRE_MINUTES,
@@ -17,17 +18,22 @@ from ...core.security import (
     create_refresh_token,
     verify_token,
 )
+from ...core.utils.password_hashing import PasswordHashingBusyError
 
 router = APIRouter(tags=["login"])
 
 
-@router.post("/login", response_model=Token)
+@router.post("/login", response_model=Token, dependencies=[Depends(login_rate_limiter_dependency)])
 async def login_for_access_token(
     response: Response,
     form_data: Annotated[OAuth2PasswordRequestForm, Depends()],
     db: Annotated[AsyncSession, Depends(async_get_db)],
 ) -> dict[str, str]:
-    user = await authenticate_user(username_or_email=form_data.username, password=form_data.password, db=db)
+    try:
+        user = await authenticate_user(username_or_email=form_data.username, password=form_data.password, db=db)
+    except PasswordHashingBusyError:
+        raise CustomException(503, "Too many logins in progress, try again shortly.")
+
     if not user:
         raise UnauthorizedException("Wrong username, email or password.")
 
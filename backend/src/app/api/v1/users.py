@@ -6,8 +6,14 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from ...api.dependencies import get_current_superuser, get_current_user
 from ...core.db.database import async_get_db
-from ...core.exceptions.http_exceptions import DuplicateValueException, ForbiddenException, NotFoundException
+from ...core.exceptions.http_exceptions import (
+    CustomException,
+    DuplicateValueException,
+    ForbiddenException,
+    NotFoundException,
+)
 from ...core.security import blacklist_token, get_password_hash, oauth2_scheme
+from ...core.utils.password_hashing import PasswordHashingBusyError, password_hashing
 from ...crud.crud_rate_limit import crud_rate_limits
 from ...crud.crud_tier import crud_tiers
 from ...crud.crud_users import crud_users
@@ -30,7 +36,12 @@ async def write_user(
         raise DuplicateValueException("Username not available")
 
     user_internal_dict = user.model_dump()
-    user_internal_dict["hashed_password"] = get_password_hash(password=user_internal_dict["password"])
+    try:
+        user_internal_dict["hashed_password"] = await password_hashing.run(
+            get_password_hash, password=user_internal_dict["password"]
+        )
+    except PasswordHashingBusyError:
+        raise CustomException(503, "Too many sign-ups in progress, try again shortly.")
     del user_internal_dict["password"]
 
     user_internal = UserCreateInternal(**user_internal_dict)
@@ -1,7 +1,7 @@
 import os
 from enum import Enum
 
-from pydantic import SecretStr, computed_field
+from pydantic import AliasChoices, Field, SecretStr, computed_field
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -19,6 +19,15 @@ class CryptSettings(BaseSettings):
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     REFRESH_TOKEN_EXPIRE_DAYS: int = 7
+    TOKEN_CACHE_MAX_ENTRIES: int = 10_000
+    PASSWORD_HASH_WORKERS: int = 4
+    PASSWORD_HASH_MAX_PENDING: int = 64
+
+
+class UserCacheSettings(BaseSettings):
+    USER_CACHE_TTL: float = 30.0
+    USER_CACHE_MAX_ENTRIES: int = 10_000
+    USER_CACHE_INVALIDATION_CHANNEL: str = "users:invalidations"
 
 
 class DatabaseSettings(BaseSettings):
@@ -78,10 +87,36 @@ class TestSettings(BaseSettings):
     ...
 
 
+class RedisConnectionSettings(BaseSettings):
+    REDIS_MAX_CONNECTIONS: int | None = None
+    REDIS_POOL_TIMEOUT: float = 5.0
+    REDIS_HEALTH_CHECK_INTERVAL: int = 30
+    REDIS_SOCKET_KEEPALIVE: bool = True
+
+
 class RedisCacheSettings(BaseSettings):
     REDIS_CACHE_HOST: str = "localhost"
     REDIS_CACHE_PORT: int = 6379
     REDIS_CACHE_ENABLED: bool = False
+    REDIS_CACHE_LOCAL_ENABLED: bool = False
+    REDIS_CACHE_LOCAL_MAX_ENTRIES: int = 1024
+    REDIS_CACHE_LOCAL_TTL: int = 30
+    REDIS_CACHE_LOCAL_MAX_BYTES: int | None = None
+    REDIS_CACHE_LOCAL_PREFIX_QUOTAS: dict[str, int] = {}
+    REDIS_CACHE_INVALIDATION_CHANNEL: str = "cache:invalidations"
+    REDIS_CACHE_CODEC: str = "json"
+    REDIS_CACHE_COMPRESSION: str | None = None
+    REDIS_CACHE_COMPRESSION_MIN_SIZE: int = 1024
+    REDIS_CACHE_STATS_FLUSH_INTERVAL: float = 10.0
+    REDIS_CACHE_SNAPSHOT_FILE: str | None = None
+    REDIS_CACHE_SNAPSHOT_TOP_N: int = 1000
+    REDIS_CACHE_SNAPSHOT_ON_SHUTDOWN: bool = False
+    REDIS_CACHE_WARM_ON_STARTUP: bool = False
+    REDIS_CACHE_WARM_GUARD_TTL: int = 300
+    REDIS_CACHE_TRACKING_PREFIXES: list[str] = []
+    REDIS_CACHE_TRACKING_MAX_ENTRIES: int = 10_000
+    REDIS_CACHE_NODES: list[str] = []
+    REDIS_CACHE_SHARD_RETRY_AFTER: float = 5.0
 
     @computed_field  # type: ignore[prop-decorator]
     @property
@@ -89,6 +124,13 @@ class RedisCacheSettings(BaseSettings):
         return f"redis://{self.REDIS_CACHE_HOST}:{self.REDIS_CACHE_PORT}"
 
 
+class TokenBlacklistSettings(BaseSettings):
+    TOKEN_BLACKLIST_CHANNEL: str = "token_blacklist"
+    TOKEN_BLACKLIST_BLOOM_CAPACITY: int = 100_000
+    TOKEN_BLACKLIST_BLOOM_ERROR_RATE: float = 0.01
+    TOKEN_BLACKLIST_REFRESH_INTERVAL: float = 3600.0
+
+
 class ClientSideCacheSettings(BaseSettings):
     CLIENT_CACHE_MAX_AGE: int = 60
 
@@ -98,11 +140,32 @@ class RedisQueueSettings(BaseSettings):
     REDIS_QUEUE_PORT: int = 6379
     REDIS_QUEUE_ENABLED: bool = False
 
+    @computed_field  # type: ignore[prop-decorator]
+    @property
+    def REDIS_QUEUE_URL(self) -> str:
+        return f"redis://{self.REDIS_QUEUE_HOST}:{self.REDIS_QUEUE_PORT}"
+
 
 class RedisRateLimiterSettings(BaseSettings):
     REDIS_RATE_LIMIT_HOST: str = "localhost"
     REDIS_RATE_LIMIT_PORT: int = 6379
     REDIS_RATE_LIMIT_ENABLED: bool = False
+    REDIS_RATE_LIMIT_ALGORITHM: str = "fixed_window"
+    REDIS_RATE_LIMIT_LEASE_FRACTION: float = 0.0
+    REDIS_RATE_LIMIT_LEASE_MAX_KEYS: int = 10_000
+    REDIS_RATE_LIMIT_RULES_CHANNEL: str = "ratelimit:rules"
+    REDIS_RATE_LIMIT_RULES_REFRESH_INTERVAL: float = 300.0
+    REDIS_RATE_LIMIT_CONCURRENCY_LEASE: float = 60.0
+    REDIS_RATE_LIMIT_CONCURRENCY_WAIT: float = 1.0
+    REDIS_RATE_LIMIT_TIMEOUT: float | None = 0.25
+    REDIS_RATE_LIMIT_FALLBACK_ENABLED: bool = True
+    # Workers the limits are divided over while Redis is down. Read from WEB_CONCURRENCY, which gunicorn and
+    # uvicorn use for their worker count, when it is set; the default matches the bundled gunicorn setup (-w 4).
+    # Overestimating only makes the fallback stricter, while underestimating admits more than the limit.
+    REDIS_RATE_LIMIT_FALLBACK_WORKERS: int = Field(
+        default=4, validation_alias=AliasChoices("REDIS_RATE_LIMIT_FALLBACK_WORKERS", "WEB_CONCURRENCY")
+    )
+    REDIS_RATE_LIMIT_FALLBACK_RETRY_INTERVAL: float = 5.0
 
     @computed_field  # type: ignore[prop-decorator]
     @property
@@ -113,6 +176,9 @@ class RedisRateLimiterSettings(BaseSettings):
 class DefaultRateLimitSettings(BaseSettings):
     DEFAULT_RATE_LIMIT_LIMIT: int = 10
     DEFAULT_RATE_LIMIT_PERIOD: int = 3600
+    DEFAULT_RATE_LIMIT_CONCURRENCY: int | None = None
+    LOGIN_RATE_LIMIT_LIMIT: int = 10
+    LOGIN_RATE_LIMIT_PERIOD: int = 300
 
 
 class CRUDAdminSettings(BaseSettings):
@@ -156,14 +222,21 @@ class RapidAPISettings(BaseSettings):
     RAPIDAPI_HOST: str = "kiwi-com-cheap-flights.p.rapidapi.com"
 
 
+class LocationSettings(BaseSettings):
+    AIRPORT_COORDINATES_FILE: str | None = None
+
+
 class Settings(
     AppSettings,
     SQLiteSettings,
     PostgresSettings,
     CryptSettings,
+    UserCacheSettings,
     FirstUserSettings,
     TestSettings,
+    RedisConnectionSettings,
     RedisCacheSettings,
+    TokenBlacklistSettings,
     ClientSideCacheSettings,
     RedisQueueSettings,
     RedisRateLimiterSettings,
@@ -172,6 +245,7 @@ class Settings(
     EnvironmentSettings,
     CORSSettings,
     RapidAPISettings,
+    LocationSettings,
 ):
     model_config = SettingsConfigDict(
         env_file=os.path.join(os.path.dirname(os.path.realpath(__file__)), "..", "..", ".env"),
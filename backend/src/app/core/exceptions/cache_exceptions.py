@@ -14,3 +14,15 @@ class MissingClientError(Exception):
     def __init__(self, message: str = "Client is None.") -> None:
         self.message = message
         super().__init__(self.message)
+
+
+class UnsupportedCodecError(Exception):
+    def __init__(self, message: str = "Cache codec not supported.") -> None:
+        self.message = message
+        super().__init__(self.message)
+
+
+class CacheKeyTemplateError(Exception):
+    def __init__(self, message: str = "Cache key template references unknown parameters.") -> None:
+        self.message = message
+        super().__init__(self.message)
@@ -20,6 +20,7 @@ class ReadyCheck(BaseModel):
     app: str
     database: str
     redis: str
+    rate_limiter: str | None = None
     timestamp: str
 
 
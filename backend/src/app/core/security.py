@@ -1,25 +1,32 @@
+import time
+from collections import OrderedDict
 from datetime import UTC, datetime, timedelta
 from enum import Enum
 from typing import Any, Literal
 
 import bcrypt
 from fastapi.security import OAuth2PasswordBearer
-from jose import JWTError, jwt
+from jose import ExpiredSignatureError, JWTError, jwt
 from pydantic import SecretStr
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from ..crud.crud_users import crud_users
 from .config import settings
-from .db.crud_token_blacklist import crud_token_blacklist
-from .schemas import TokenBlacklistCreate, TokenData
+from .schemas import TokenData
+from .utils.password_hashing import password_hashing
+from .utils.token_blacklist import token_blacklist, token_hash
 
 SECRET_KEY: SecretStr = settings.SECRET_KEY
 ALGORITHM = settings.ALGORITHM
 ACCESS_TOKEN_EXPIRE_MINUTES = settings.ACCESS_TOKEN_EXPIRE_MINUTES
 REFRESH_TOKEN_EXPIRE_DAYS = settings.REFRESH_TOKEN_EXPIRE_DAYS
+TOKEN_CACHE_MAX_ENTRIES = settings.TOKEN_CACHE_MAX_ENTRIES
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/login")
 
+# Payloads of verified tokens by token hash, kept until the token expires.
+_decoded_tokens: OrderedDict[str, dict[str, Any]] = OrderedDict()
+
 
 class TokenType(str, Enum):
     ACCESS = "access"
@@ -27,7 +34,16 @@ class TokenType(str, Enum):
 
 
 async def verify_password(plain_password: str, hashed_password: str) -> bool:
-    correct_password: bool = bcrypt.checkpw(plain_password.encode(), hashed_password.encode())
+    """Check a password in the password hashing pool, off the event loop.
+
+    Raises
+    ------
+    PasswordHashingBusyError
+        If the pool's queue is full.
+    """
+    correct_password: bool = await password_hashing.run(
+        bcrypt.checkpw, plain_password.encode(), hashed_password.encode()
+    )
     return correct_password
 
 
@@ -73,6 +89,32 @@ async def create_refresh_token(data: dict[str, Any], expires_delta: timedelta |
     return encoded_jwt
 
 
+def decode_token(token: str) -> dict[str, Any]:
+    """Verify a JWT's signature and expiry and return its payload, decoding each token only once.
+
+    Raises
+    ------
+    JWTError
+        If the token is invalid or expired.
+    """
+    digest = token_hash(token)
+    payload = _decoded_tokens.get(digest)
+    if payload is not None:
+        if payload.get("exp", 0) <= time.time():
+            del _decoded_tokens[digest]
+            raise ExpiredSignatureError("Signature has expired.")
+        _decoded_tokens.move_to_end(digest)
+        # Callers get their own copy, so changing it cannot alter the payload cached for later requests.
+        return dict(payload)
+
+    decoded: dict[str, Any] = jwt.decode(token, SECRET_KEY.get_secret_value(), algorithms=[ALGORITHM])
+    if "exp" in decoded and TOKEN_CACHE_MAX_ENTRIES > 0:
+        _decoded_tokens[digest] = dict(decoded)
+        while len(_decoded_tokens) > TOKEN_CACHE_MAX_ENTRIES:
+            _decoded_tokens.popitem(last=False)
+    return decoded
+
+
 async def verify_token(token: str, expected_token_type: TokenType, db: AsyncSession) -> TokenData | None:
     """Verify a JWT token and return TokenData if valid.
 
@@ -90,12 +132,12 @@ async def verify_token(token: str, expected_token_type: TokenType, db: AsyncSess
     TokenData | None
         TokenData instance if the token is valid, None otherwise.
     """
-    is_blacklisted = await crud_token_blacklist.exists(db, token=token)
+    is_blacklisted = await token_blacklist.contains(db, token)
     if is_blacklisted:
         return None
 
     try:
-        payload = jwt.decode(token, SECRET_KEY.get_secret_value(), algorithms=[ALGORITHM])
+        payload = decode_token(token)
         username_or_email: str | None = payload.get("sub")
         token_type: str | None = payload.get("token_type")
 
@@ -121,16 +163,14 @@ async def blacklist_tokens(access_token: str, refresh_token: str, db: AsyncSessi
         Database session for performing database operations.
     """
     for token in [access_token, refresh_token]:
-        payload = jwt.decode(token, SECRET_KEY.get_secret_value(), algorithms=[ALGORITHM])
+        payload = decode_token(token)
         exp_timestamp = payload.get("exp")
         if exp_timestamp is not None:
-            expires_at = datetime.fromtimestamp(exp_timestamp)
-            await crud_token_blacklist.create(db, object=TokenBlacklistCreate(token=token, expires_at=expires_at))
+            await token_blacklist.add(db, token, exp_timestamp)
 
 
 async def blacklist_token(token: str, db: AsyncSession) -> None:
-    payload = jwt.decode(token, SECRET_KEY.get_secret_value(), algorithms=[ALGORITHM])
+    payload = decode_token(token)
     exp_timestamp = payload.get("exp")
     if exp_timestamp is not None:
-        expires_at = datetime.fromtimestamp(exp_timestamp)
-        await crud_token_blacklist.create(db, object=TokenBlacklistCreate(token=token, expires_at=expires_at))
+        await token_blacklist.add(db, token, exp_timestamp)
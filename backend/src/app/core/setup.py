@@ -4,33 +4,52 @@ from typing import Any
 
 import anyio
 import fastapi
-import redis.asyncio as redis
-from arq import create_pool
-from arq.connections import RedisSettings
+from arq.connections import ArqRedis
 from fastapi import APIRouter, Depends, FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.openapi.docs import get_redoc_html, get_swagger_ui_html
 from fastapi.openapi.utils import get_openapi
+from redis.exceptions import RedisError
+from sqlalchemy.exc import SQLAlchemyError
 
 from ..api.dependencies import get_current_superuser
-from ..core.utils.rate_limit import rate_limiter
+from ..core.utils.rate_limit import LocalRateLimiter, TokenLeases, rate_limiter
 from ..middleware.client_cache_middleware import ClientCacheMiddleware
+from ..middleware.rate_limit_headers_middleware import RateLimitHeadersMiddleware
 from ..models import *  # noqa: F403
 from .config import (
     AppSettings,
     ClientSideCacheSettings,
     CORSSettings,
+    CryptSettings,
     DatabaseSettings,
     EnvironmentOption,
     EnvironmentSettings,
     RedisCacheSettings,
+    RedisConnectionSettings,
     RedisQueueSettings,
     RedisRateLimiterSettings,
+    TokenBlacklistSettings,
+    UserCacheSettings,
     settings,
 )
-from .db.database import Base
+from .db.database import Base, local_session
 from .db.database import async_engine as engine
+from .logger import logging
 from .utils import cache, queue
+from .utils.cache_codecs import get_codec, validate_compression
+from .utils.cache_sharding import ShardedClients
+from .utils.cache_snapshot import dump_snapshot, load_snapshot_once
+from .utils.cache_stats import start_stats_flusher, stop_stats_flusher
+from .utils.client_tracking import ClientTracking
+from .utils.local_cache import LocalCache
+from .utils.password_hashing import password_hashing
+from .utils.rate_limit_rules import rate_limit_rules
+from .utils.redis_connections import redis_connections
+from .utils.token_blacklist import token_blacklist
+from .utils.user_cache import user_cache
+
+logger = logging.getLogger(__name__)
 
 
 # -------------- database --------------
@@ -39,35 +58,184 @@ async def create_tables() -> None:
         await conn.run_sync(Base.metadata.create_all)
 
 
+# -------------- redis connections --------------
+def configure_redis_connections() -> None:
+    redis_connections.configure(
+        max_connections=settings.REDIS_MAX_CONNECTIONS,
+        pool_timeout=settings.REDIS_POOL_TIMEOUT,
+        health_check_interval=settings.REDIS_HEALTH_CHECK_INTERVAL,
+        socket_keepalive=settings.REDIS_SOCKET_KEEPALIVE,
+    )
+
+
 # -------------- cache --------------
 async def create_redis_cache_pool() -> None:
-    cache.pool = redis.ConnectionPool.from_url(settings.REDIS_CACHE_URL)
-    cache.client = redis.Redis.from_pool(cache.pool)  # type: ignore
+    cache.client = redis_connections.register("cache", settings.REDIS_CACHE_URL)
+    cache.pool = cache.client.connection_pool
+
+    get_codec(settings.REDIS_CACHE_CODEC)
+    validate_compression(settings.REDIS_CACHE_COMPRESSION)
+    cache.default_codec = settings.REDIS_CACHE_CODEC
+    cache.default_compression = settings.REDIS_CACHE_COMPRESSION
+    cache.compression_min_size = settings.REDIS_CACHE_COMPRESSION_MIN_SIZE
+
+    if settings.REDIS_CACHE_LOCAL_ENABLED:
+        cache.local_cache = LocalCache(
+            max_entries=settings.REDIS_CACHE_LOCAL_MAX_ENTRIES,
+            ttl=settings.REDIS_CACHE_LOCAL_TTL,
+            max_bytes=settings.REDIS_CACHE_LOCAL_MAX_BYTES,
+            prefix_quotas=settings.REDIS_CACHE_LOCAL_PREFIX_QUOTAS,
+        )
+        await cache.start_invalidation_listener(
+            settings.REDIS_CACHE_INVALIDATION_CHANNEL, subscriber=redis_connections.subscriber(settings.REDIS_CACHE_URL)
+        )
+
+    if settings.REDIS_CACHE_NODES:
+        shard_names = {url: f"cache_shard_{i}" for i, url in enumerate(settings.REDIS_CACHE_NODES)}
+        cache.shards = ShardedClients(
+            settings.REDIS_CACHE_NODES,
+            retry_after=settings.REDIS_CACHE_SHARD_RETRY_AFTER,
+            connect=lambda url: redis_connections.register(shard_names[url], url),
+        )
+
+    try:
+        await cache.load_scripts()
+    except RedisError as e:
+        logger.warning(f"Cache scripts not loaded at startup, loading them on first use: {e}")
+
+    if settings.REDIS_CACHE_TRACKING_PREFIXES and cache.shards is not None:
+        logger.warning("Client tracking only covers a single cache node and is disabled with REDIS_CACHE_NODES")
+    elif settings.REDIS_CACHE_TRACKING_PREFIXES:
+        cache.tracking = ClientTracking(
+            cache.pool, settings.REDIS_CACHE_TRACKING_PREFIXES, max_entries=settings.REDIS_CACHE_TRACKING_MAX_ENTRIES
+        )
+        await cache.tracking.start()
+
+    await start_stats_flusher(cache.client, settings.REDIS_CACHE_STATS_FLUSH_INTERVAL)
+
+    if settings.REDIS_CACHE_WARM_ON_STARTUP and settings.REDIS_CACHE_SNAPSHOT_FILE:
+        try:
+            await load_snapshot_once(
+                cache.client,
+                settings.REDIS_CACHE_SNAPSHOT_FILE,
+                guard_ttl=settings.REDIS_CACHE_WARM_GUARD_TTL,
+                shards=cache.shards,
+            )
+        except (OSError, ValueError, RedisError) as e:
+            logger.warning(f"Cache warm-up skipped: {e}")
 
 
 async def close_redis_cache_pool() -> None:
+    await user_cache.stop()
+    await token_blacklist.stop()
+    await cache.stop_invalidation_listener()
+    cache.local_cache = None
+
+    if cache.tracking is not None:
+        await cache.tracking.stop()
+        cache.tracking = None
+
+    await stop_stats_flusher(cache.client)
+
+    if settings.REDIS_CACHE_SNAPSHOT_ON_SHUTDOWN and settings.REDIS_CACHE_SNAPSHOT_FILE and cache.client is not None:
+        try:
+            await dump_snapshot(
+                cache.client,
+                settings.REDIS_CACHE_SNAPSHOT_FILE,
+                top_n=settings.REDIS_CACHE_SNAPSHOT_TOP_N,
+                shards=cache.shards,
+            )
+        except (OSError, RedisError) as e:
+            logger.warning(f"Cache snapshot skipped: {e}")
+
+    if cache.shards is not None:
+        await cache.shards.aclose()
+        cache.shards = None
+
+    cache.client = None
+    cache.pool = None
+
+
+# -------------- token blacklist --------------
+async def start_token_blacklist() -> None:
+    token_blacklist.configure(settings.TOKEN_BLACKLIST_BLOOM_CAPACITY, settings.TOKEN_BLACKLIST_BLOOM_ERROR_RATE)
+    if cache.client is not None:
+        await token_blacklist.start(
+            cache.client,
+            channel=settings.TOKEN_BLACKLIST_CHANNEL,
+            refresh_interval=settings.TOKEN_BLACKLIST_REFRESH_INTERVAL,
+            subscriber=redis_connections.subscriber(settings.REDIS_CACHE_URL),
+        )
+
+
+# -------------- user cache --------------
+async def start_user_cache() -> None:
+    user_cache.ttl = settings.USER_CACHE_TTL
+    user_cache.max_entries = settings.USER_CACHE_MAX_ENTRIES
     if cache.client is not None:
-        await cache.client.aclose()  # type: ignore
+        # Only publishes and subscribes, so all of its traffic goes through the subscriber pool.
+        await user_cache.start(
+            redis_connections.subscriber(settings.REDIS_CACHE_URL), channel=settings.USER_CACHE_INVALIDATION_CHANNEL
+        )
 
 
 # -------------- queue --------------
 async def create_redis_queue_pool() -> None:
-    queue.pool = await create_pool(RedisSettings(host=settings.REDIS_QUEUE_HOST, port=settings.REDIS_QUEUE_PORT))
+    queue.pool = redis_connections.register(  # type: ignore
+        "queue", settings.REDIS_QUEUE_URL, factory=lambda pool: ArqRedis(pool_or_conn=pool)
+    )
 
 
 async def close_redis_queue_pool() -> None:
-    if queue.pool is not None:
-        await queue.pool.aclose()  # type: ignore
+    queue.pool = None
 
 
 # -------------- rate limit --------------
 async def create_redis_rate_limit_pool() -> None:
-    rate_limiter.initialize(settings.REDIS_RATE_LIMIT_URL)  # type: ignore
+    rate_limiter.initialize(settings.REDIS_RATE_LIMIT_URL, algorithm=settings.REDIS_RATE_LIMIT_ALGORITHM)  # type: ignore
+    rate_limiter.concurrency_lease = settings.REDIS_RATE_LIMIT_CONCURRENCY_LEASE
+    rate_limiter.concurrency_wait = settings.REDIS_RATE_LIMIT_CONCURRENCY_WAIT
+    rate_limiter.timeout = settings.REDIS_RATE_LIMIT_TIMEOUT
+    if settings.REDIS_RATE_LIMIT_FALLBACK_ENABLED:
+        rate_limiter.fallback = LocalRateLimiter(
+            workers=settings.REDIS_RATE_LIMIT_FALLBACK_WORKERS, max_keys=settings.REDIS_RATE_LIMIT_LEASE_MAX_KEYS
+        )
+        rate_limiter.retry_interval = settings.REDIS_RATE_LIMIT_FALLBACK_RETRY_INTERVAL
+
+    if settings.REDIS_RATE_LIMIT_LEASE_FRACTION > 0:
+        rate_limiter.leases = TokenLeases(
+            rate_limiter.check,
+            lease_fraction=settings.REDIS_RATE_LIMIT_LEASE_FRACTION,
+            max_keys=settings.REDIS_RATE_LIMIT_LEASE_MAX_KEYS,
+        )
+
+    # Only publishes and subscribes, so all of its traffic goes through the subscriber pool.
+    await rate_limit_rules.start(
+        redis_connections.subscriber(settings.REDIS_RATE_LIMIT_URL),
+        channel=settings.REDIS_RATE_LIMIT_RULES_CHANNEL,
+        refresh_interval=settings.REDIS_RATE_LIMIT_RULES_REFRESH_INTERVAL,
+    )
+
+
+async def load_rate_limit_rules() -> None:
+    try:
+        async with local_session() as db:
+            await rate_limit_rules.load(db)
+    except SQLAlchemyError as e:
+        logger.warning(f"Rate limit rules not loaded at startup, loading them on first use: {e}")
 
 
 async def close_redis_rate_limit_pool() -> None:
-    if rate_limiter.client is not None:
-        await rate_limiter.client.aclose()  # type: ignore
+    await rate_limit_rules.stop()
+
+    if rate_limiter.leases is not None:
+        rate_limiter.leases.clear()
+        rate_limiter.leases = None
+
+    rate_limiter.fallback = None
+    rate_limiter.degraded_since = None
+    rate_limiter.client = None
+    rate_limiter.pool = None
 
 
 # -------------- application --------------
@@ -80,11 +248,15 @@ def lifespan_factory(
     settings: (
         DatabaseSettings
         | RedisCacheSettings
+        | RedisConnectionSettings
         | AppSettings
         | ClientSideCacheSettings
         | CORSSettings
         | RedisQueueSettings
         | RedisRateLimiterSettings
+        | TokenBlacklistSettings
+        | UserCacheSettings
+        | CryptSettings
         | EnvironmentSettings
     ),
     create_tables_on_start: bool = True,
@@ -100,7 +272,13 @@ def lifespan_factory(
 
         await set_threadpool_tokens()
 
+        if isinstance(settings, CryptSettings):
+            password_hashing.configure(settings.PASSWORD_HASH_WORKERS, settings.PASSWORD_HASH_MAX_PENDING)
+
         try:
+            if isinstance(settings, RedisConnectionSettings):
+                configure_redis_connections()
+
             if isinstance(settings, RedisCacheSettings) and settings.REDIS_CACHE_ENABLED:
                 await create_redis_cache_pool()
 
@@ -113,6 +291,15 @@ def lifespan_factory(
             if create_tables_on_start:
                 await create_tables()
 
+            if isinstance(settings, RedisRateLimiterSettings) and settings.REDIS_RATE_LIMIT_ENABLED:
+                await load_rate_limit_rules()
+
+            if isinstance(settings, TokenBlacklistSettings):
+                await start_token_blacklist()
+
+            if isinstance(settings, UserCacheSettings):
+                await start_user_cache()
+
             initialization_complete.set()
 
             yield
@@ -127,6 +314,9 @@ def lifespan_factory(
             if isinstance(settings, RedisRateLimiterSettings) and settings.REDIS_RATE_LIMIT_ENABLED:
                 await close_redis_rate_limit_pool()
 
+            await redis_connections.aclose()
+            password_hashing.shutdown()
+
     return lifespan
 
 
@@ -136,11 +326,15 @@ def create_application(
     settings: (
         DatabaseSettings
         | RedisCacheSettings
+        | RedisConnectionSettings
         | AppSettings
         | ClientSideCacheSettings
         | CORSSettings
         | RedisQueueSettings
         | RedisRateLimiterSettings
+        | TokenBlacklistSettings
+        | UserCacheSettings
+        | CryptSettings
         | EnvironmentSettings
     ),
     create_tables_on_start: bool = True,
@@ -163,11 +357,16 @@ def create_application(
 
         - AppSettings: Configures basic app metadata like name, description, contact, and license info.
         - DatabaseSettings: Adds event handlers for initializing database tables during startup.
+        - RedisConnectionSettings: Configures the connection pools shared by the Redis clients.
         - RedisCacheSettings: Sets up event handlers for creating and closing a Redis cache pool.
         - ClientSideCacheSettings: Integrates middleware for client-side caching.
         - CORSSettings: Integrates CORS middleware with specified origins.
         - RedisQueueSettings: Sets up event handlers for creating and closing a Redis queue pool.
-        - RedisRateLimiterSettings: Sets up event handlers for creating and closing a Redis rate limiter pool.
+        - RedisRateLimiterSettings: Sets up event handlers for creating and closing a Redis rate limiter pool,
+          and middleware adding `RateLimit-*` headers to rate limited responses.
+        - TokenBlacklistSettings: Shares token revocations through the cache Redis, when it is enabled.
+        - UserCacheSettings: Sizes the cache of authenticated users, invalidated through the cache Redis when enabled.
+        - CryptSettings: Sizes the thread pool that hashes and checks passwords.
         - EnvironmentSettings: Conditionally sets documentation URLs and integrates custom routes for API documentation
           based on the environment type.
 
@@ -211,6 +410,9 @@ def create_application(
     if isinstance(settings, ClientSideCacheSettings):
         application.add_middleware(ClientCacheMiddleware, max_age=settings.CLIENT_CACHE_MAX_AGE)
 
+    if isinstance(settings, RedisRateLimiterSettings):
+        application.add_middleware(RateLimitHeadersMiddleware)
+
     if isinstance(settings, CORSSettings):
         application.add_middleware(
             CORSMiddleware,
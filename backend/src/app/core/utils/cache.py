@@ -1,145 +1,292 @@
+import asyncio
+import contextlib
 import functools
+import hashlib
+import inspect
 import json
+import logging
+import math
+import random
 import re
-from collections.abc import AsyncGenerator, Callable
+import string
+import time
+import uuid
+from collections.abc import AsyncGenerator, Callable, Iterable
+from dataclasses import dataclass
+from enum import StrEnum
 from typing import Any
 
-from fastapi import Request
+from fastapi import Request, Response
 from fastapi.encoders import jsonable_encoder
 from redis.asyncio import ConnectionPool, Redis
-
-from ..exceptions.cache_exceptions import CacheIdentificationInferenceError, InvalidRequestError, MissingClientError
+from redis.asyncio.client import Pipeline
+from redis.exceptions import NoScriptError, RedisError
+
+from ..exceptions.cache_exceptions import (
+    CacheIdentificationInferenceError,
+    CacheKeyTemplateError,
+    InvalidRequestError,
+    UnsupportedCodecError,
+)
+from .cache_codecs import JSON_CODECS, decode, decompress, encode, get_codec, validate_compression
+from .cache_sharding import ShardedClients
+from .cache_stats import PrefixStats, cache_stats
+from .client_tracking import ClientTracking
+from .local_cache import LocalCache
+
+logger = logging.getLogger(__name__)
 
 pool: ConnectionPool | None = None
 client: Redis | None = None
+local_cache: LocalCache | None = None
+tracking: ClientTracking | None = None
+# When set, cache keys are spread over these nodes; `client` stays the node used for pub/sub and bookkeeping.
+shards: ShardedClients | None = None
+# Glob patterns matching the keys of every `@cache` key prefix declared so far, for maintenance tools.
+key_patterns: set[str] = set()
+
+default_codec: str = "json"
+default_compression: str | None = None
+compression_min_size: int = 1024
+
+invalidation_channel: str = "cache:invalidations"
+_instance_id: str = uuid.uuid4().hex
+_invalidation_task: asyncio.Task | None = None
+_subscriber: Redis | None = None
+
+_ENVELOPE_MAGIC = b"\x00qw1"
+_RELEASE_LOCK_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+_LOCK_POLL_INTERVAL = 0.05
+
+_TAG_PREFIX = "cache:tag:"
+# Adds a key to a tag set and extends the set's TTL so it never expires before one of its members.
+_TAG_KEY_SCRIPT = """
+redis.call("sadd", KEYS[1], ARGV[1])
+if redis.call("ttl", KEYS[1]) < tonumber(ARGV[2]) then
+    redis.call("expire", KEYS[1], ARGV[2])
+end
+return 1
+"""
+# Unlinks every member of the given tag sets and the sets themselves; returns the unlinked members.
+_INVALIDATE_TAGS_SCRIPT = """
+local members = {}
+for _, tag in ipairs(KEYS) do
+    for _, member in ipairs(redis.call("smembers", tag)) do
+        table.insert(members, member)
+    end
+end
+for i = 1, #members, 1000 do
+    redis.call("unlink", unpack(members, i, math.min(i + 999, #members)))
+end
+redis.call("unlink", unpack(KEYS))
+return members
+"""
+# Scripts queued in pipelines are called by SHA: registered scripts would cost a SCRIPT EXISTS round trip per pipeline.
+_TAG_KEY_SHA = hashlib.sha1(_TAG_KEY_SCRIPT.encode()).hexdigest()
+_INVALIDATE_TAGS_SHA = hashlib.sha1(_INVALIDATE_TAGS_SCRIPT.encode()).hexdigest()
+_PIPELINED_SCRIPTS = (_TAG_KEY_SCRIPT, _INVALIDATE_TAGS_SCRIPT)
+
+
+class CacheStatus(StrEnum):
+    OK = "ok"
+    EMPTY = "empty"
+    ERROR = "error"
+
+
+@dataclass
+class CachedResult:
+    """Result envelope a cached endpoint can return to choose how long its value is kept.
+
+    The decorator unwraps it, so clients only ever see `data`. Plain return values are treated as `OK`.
 
-
-def _infer_resource_id(kwargs: dict[str, Any], resource_id_type: type | tuple[type, ...]) -> int | str:
-    """Infer the resource ID from a dictionary of keyword arguments.
-
-    Parameters
-    ----------
-    kwargs: Dict[str, Any]
-        A dictionary of keyword arguments.
-    resource_id_type: Union[type, Tuple[type, ...]]
-        The expected type of the resource ID, which can be integer (int) or a string (str).
-
-    Returns
+    Example
     -------
-    Union[None, int, str]
-        The inferred resource ID. If it cannot be inferred or does not match the expected type, it returns None.
-
-    Note
-    ----
-        - When `resource_id_type` is `int`, the function looks for an argument with the key 'id'.
-        - When `resource_id_type` is `str`, it attempts to infer the resource ID as a string.
+    >>> return CachedResult({"data": []}, status=CacheStatus.EMPTY if not results else CacheStatus.OK)
     """
-    resource_id: int | str | None = None
-    for arg_name, arg_value in kwargs.items():
-        if isinstance(arg_value, resource_id_type):
-            if (resource_id_type is int) and ("id" in arg_name):
-                resource_id = arg_value
 
-            elif (resource_id_type is int) and ("id" not in arg_name):
-                pass
+    data: Any
+    status: CacheStatus = CacheStatus.OK
 
-            elif resource_id_type is str:
-                resource_id = arg_value
 
-    if resource_id is None:
-        raise CacheIdentificationInferenceError
+KeyBuilder = Callable[[dict[str, Any]], str]
 
-    return resource_id
 
+def _template_fields(template: str) -> list[str]:
+    """Return the names referenced by a ``str.format`` template.
 
-def _extract_data_inside_brackets(input_string: str) -> list[str]:
-    """Extract data inside curly brackets from a given string using regular expressions.
+    Example
+    -------
+    >>> _template_fields("{username}_posts:page_{page}")
+    ['username', 'page']
+    """
+    return [field for _, field, _, _ in string.Formatter().parse(template) if field is not None]
 
-    Parameters
-    ----------
-    input_string: str
-        The input string in which to find data enclosed within curly brackets.
 
-    Returns
-    -------
-    List[str]
-        A list of strings containing the data found inside the curly brackets within the input string.
+def key_pattern(template: str) -> str:
+    """Return the glob pattern matching the keys cached under a key prefix template.
 
     Example
     -------
-    >>> _extract_data_inside_brackets("The {quick} brown {fox} jumps over the {lazy} dog.")
-    ['quick', 'fox', 'lazy']
+    >>> key_pattern("{username}_posts:page_{page}")
+    '*_posts:page_*:*'
     """
-    data_inside_brackets = re.findall(r"{(.*?)}", input_string)
-    return data_inside_brackets
+    parts = []
+    for literal, field, _, _ in string.Formatter().parse(template):
+        parts.append(re.sub(r"([*?\[\]\\])", r"\\\1", literal))
+        if field is not None:
+            parts.append("*")
+    return "".join(parts) + ":*"
 
 
-def _construct_data_dict(data_inside_brackets: list[str], kwargs: dict[str, Any]) -> dict[str, Any]:
-    """Construct a dictionary based on data inside brackets and keyword arguments.
+def _compile_template(template: str, parameters: set[str] | None) -> KeyBuilder:
+    """Parse a key template once and return a function formatting it from keyword arguments.
 
     Parameters
     ----------
-    data_inside_brackets: List[str]
-        A list of keys inside brackets.
-    kwargs: Dict[str, Any]
-        A dictionary of keyword arguments.
-
-    Returns
-    -------
-    Dict[str, Any]: A dictionary with keys from data_inside_brackets and corresponding values from kwargs.
+    template: str
+        A ``str.format`` template such as ``"{username}_posts:page_{page}"``.
+    parameters: set[str] | None
+        Names accepted by the decorated function, used to reject templates referencing unknown arguments.
+        ``None`` disables the check (the function accepts ``**kwargs``).
+
+    Raises
+    ------
+    CacheKeyTemplateError
+        If the template references a name that is not a parameter of the decorated function.
     """
-    data_dict = {}
-    for key in data_inside_brackets:
-        data_dict[key] = kwargs[key]
-    return data_dict
+    fields = _template_fields(template)
+    if parameters is not None:
+        unknown = [field for field in fields if field not in parameters]
+        if unknown:
+            raise CacheKeyTemplateError(f"Cache key template '{template}' references unknown parameters {unknown}.")
 
+    if not fields:
+        return lambda kwargs: template
 
-def _format_prefix(prefix: str, kwargs: dict[str, Any]) -> str:
-    """Format a prefix using keyword arguments.
+    return template.format_map
 
-    Parameters
-    ----------
-    prefix: str
-        The prefix template to be formatted.
-    kwargs: Dict[str, Any]
-        A dictionary of keyword arguments.
 
-    Returns
-    -------
-    str: The formatted prefix.
+def _compile_resource_id(
+    func: Callable, resource_id_name: Any, resource_id_type: type | tuple[type, ...], parameters: set[str] | None
+) -> Callable[[dict[str, Any]], int | str]:
+    """Return a function extracting the resource ID from the keyword arguments of ``func``.
+
+    When `resource_id_name` is not given, the candidate arguments are narrowed once from the signature:
+    for `int` ids only arguments whose name contains ``"id"`` are considered, and at call time the last
+    candidate whose value has the expected type is used.
     """
-    data_inside_brackets = _extract_data_inside_brackets(prefix)
-    data_dict = _construct_data_dict(data_inside_brackets, kwargs)
-    formatted_prefix = prefix.format(**data_dict)
-    return formatted_prefix
+    if resource_id_name:
+        if parameters is not None and resource_id_name not in parameters:
+            raise CacheKeyTemplateError(f"Resource id '{resource_id_name}' is not a parameter of {func.__name__}.")
+        return lambda kwargs: kwargs[resource_id_name]
 
+    def candidates_for(names: Iterable[str]) -> list[str]:
+        if resource_id_type is int:
+            return [name for name in names if "id" in name]
+        if resource_id_type is str:
+            return list(names)
+        return []
 
-def _format_extra_data(to_invalidate_extra: dict[str, str], kwargs: dict[str, Any]) -> dict[str, Any]:
-    """Format extra data based on provided templates and keyword arguments.
+    # Functions taking ``**kwargs`` can't be narrowed ahead of time, so their arguments are scanned per call.
+    static_candidates = candidates_for(inspect.signature(func).parameters) if parameters is not None else None
 
-    This function takes a dictionary of templates and their associated values and a dictionary of keyword arguments.
-    It formats the templates with the corresponding values from the keyword arguments and returns a dictionary
-    where keys are the formatted templates and values are the associated keyword argument values.
+    def resolve(kwargs: dict[str, Any]) -> int | str:
+        resource_id: int | str | None = None
+        for name in static_candidates if static_candidates is not None else candidates_for(kwargs):
+            value = kwargs.get(name)
+            if isinstance(value, resource_id_type):
+                resource_id = value  # type: ignore[assignment]
 
-    Parameters
-    ----------
-    to_invalidate_extra: Dict[str, str]
-        A dictionary where keys are templates and values are the associated values.
-    kwargs: Dict[str, Any]
-        A dictionary of keyword arguments.
+        if resource_id is None:
+            raise CacheIdentificationInferenceError
 
-    Returns
-    -------
-        Dict[str, Any]: A dictionary where keys are formatted templates and values
-        are associated keyword argument values.
+        return resource_id
+
+    return resolve
+
+
+def _function_parameters(func: Callable) -> set[str] | None:
+    parameters = inspect.signature(func).parameters
+    if any(p.kind is inspect.Parameter.VAR_KEYWORD for p in parameters.values()):
+        return None
+    return set(parameters)
+
+
+def _unwrap(result: Any) -> tuple[Any, CacheStatus]:
+    if isinstance(result, CachedResult):
+        return result.data, result.status
+    return result, CacheStatus.OK
+
+
+def _client_for(key: str) -> Redis | None:
+    """Return the client holding ``key``: its shard's when sharded (``None`` while that shard is down)."""
+    if shards is None:
+        return client
+    return shards.client_for(key)
+
+
+def _nodes() -> dict[str, Redis]:
+    """Return every node cache keys may live on, by name, leaving out shards that are down."""
+    if shards is None:
+        return {"": client} if client is not None else {}
+    return shards.available()
+
+
+def _group_by_node(keys: list[str]) -> dict[str, list[str]]:
+    if shards is None:
+        return {"": keys} if client is not None else {}
+    return shards.group(keys)
+
+
+@contextlib.contextmanager
+def _shard_fallback(node: str | None = None, key: str | None = None):
+    """Swallow Redis errors from a shard and mark it down, so its keys are treated as misses.
+
+    Without sharding, errors are raised as before.
     """
-    formatted_extra = {}
-    for prefix, id_template in to_invalidate_extra.items():
-        formatted_prefix = _format_prefix(prefix, kwargs)
-        id = _extract_data_inside_brackets(id_template)[0]
-        formatted_extra[formatted_prefix] = kwargs[id]
+    try:
+        yield
+    except RedisError:
+        if shards is None:
+            raise
+        shards.mark_down(node if node is not None else shards.ring.node_for(key))  # type: ignore[arg-type]
+
 
-    return formatted_extra
+def queue_tag_registration(pipe: Pipeline, cache_key: str, tags: list[str], ttl: int) -> None:
+    """Queue the registration of ``cache_key`` under each tag so it can be invalidated without scanning."""
+    for tag in tags:
+        pipe.evalsha(_TAG_KEY_SHA, 1, _TAG_PREFIX + tag, cache_key, ttl)
+
+
+def _queue_tag_invalidation(pipe: Pipeline, tags: list[str]) -> None:
+    """Queue the unlinking of every key registered under ``tags``; the reply lists the unlinked keys."""
+    pipe.evalsha(_INVALIDATE_TAGS_SHA, len(tags), *(_TAG_PREFIX + tag for tag in tags))
+
+
+async def load_scripts() -> None:
+    """Load the scripts queued in pipelines on every node, so pipelines call them by SHA in their own round trip."""
+    for node, node_client in _nodes().items():
+        with _shard_fallback(node=node):
+            for script in _PIPELINED_SCRIPTS:
+                await node_client.script_load(script)
+
+
+async def execute_pipeline(pipe: Pipeline, node_client: Redis) -> list[Any]:
+    """Execute a pipeline calling scripts by SHA, loading them and running it again if the node lost them."""
+    commands = list(pipe.command_stack)
+    try:
+        results: list[Any] = await pipe.execute()
+    except NoScriptError:
+        for script in _PIPELINED_SCRIPTS:
+            await node_client.script_load(script)
+        pipe.command_stack = commands
+        results = await pipe.execute()
+    return results
 
 
 async def _delete_keys_by_pattern(pattern: str) -> None:
@@ -164,23 +311,376 @@ async def _delete_keys_by_pattern(pattern: str) -> None:
     - The SCAN command is used with a count of 100 to retrieve keys in batches.
       This count can be adjusted based on the size of your dataset and Redis performance.
 
-    - The function uses the delete command to remove keys in bulk. If the dataset
+    - The function uses the unlink command to remove keys in bulk. If the dataset
       is extremely large, consider implementing additional logic to handle bulk deletion
       more efficiently.
 
     - Be cautious with patterns that could match a large number of keys, as deleting
       many keys simultaneously may impact the performance of the Redis server.
     """
+    for node, node_client in _nodes().items():
+        with _shard_fallback(node=node):
+            cursor = 0
+            while True:
+                cursor, keys = await node_client.scan(cursor, match=pattern, count=100)
+                if keys:
+                    await node_client.unlink(*keys)
+                if cursor == 0:
+                    break
+
+
+def _pack(payload: bytes, meta: dict[str, Any]) -> bytes:
+    """Prefix a cached payload with its metadata header.
+
+    The stored value is ``magic + json(meta) + "\\n" + payload``. Payloads written before the header
+    existed are plain JSON and are read back with empty metadata by `unpack_entry`.
+    """
+    return _ENVELOPE_MAGIC + json.dumps(meta, separators=(",", ":")).encode() + b"\n" + payload
+
+
+def unpack_entry(raw: bytes) -> tuple[dict[str, Any], bytes]:
+    """Split a stored cache value into its metadata header and its encoded payload."""
+    if not raw.startswith(_ENVELOPE_MAGIC):
+        return {}, raw
+
+    header, _, payload = raw[len(_ENVELOPE_MAGIC) :].partition(b"\n")
+    return json.loads(header), payload
+
+
+def _should_recompute(meta: dict[str, Any], beta: float) -> bool:
+    """Decide whether to refresh a cached value before or after its logical expiry (XFetch).
+
+    The probability of an early refresh rises as the expiry approaches and is proportional to how
+    long the value took to compute (``meta["d"]``), so slow values are refreshed earlier and a single
+    request, rather than every concurrent one, usually ends up recomputing.
+    """
+    expires_at = meta.get("x")
+    if expires_at is None:
+        return False
+
+    delta = meta.get("d", 0.0)
+    return bool(time.time() - delta * beta * math.log(1.0 - random.random()) >= expires_at)
+
+
+async def _get_cached(cache_key: str, stats: PrefixStats | None = None) -> bytes | None:
+    if local_cache is not None:
+        cached_data = local_cache.get(cache_key)
+        if cached_data:
+            if stats is not None:
+                stats.local_hits += 1
+            return cached_data
+
+    node_client = _client_for(cache_key)
+    if node_client is None:
+        return None
+
+    started = time.perf_counter()
+    cached_data = None
+    with _shard_fallback(key=cache_key):
+        cached_data = await (
+            tracking.get(node_client, cache_key) if tracking is not None else node_client.get(cache_key)
+        )
+    if stats is not None:
+        stats.redis_seconds += time.perf_counter() - started
+        stats.redis_calls += 1
+    if cached_data:
+        _fill_local(cache_key, cached_data)
+    return cached_data or None
+
+
+def _fill_local(cache_key: str, cached_data: bytes) -> None:
+    """Copy a value read from Redis to the local cache, until its logical expiry at the latest.
+
+    Short-lived results such as empty and failed ones keep their own expiry, and values served stale
+    while being recomputed are not copied at all.
+    """
+    if local_cache is None:
+        return
+
+    expires_at = unpack_entry(cached_data)[0].get("x")
+    ttl = local_cache.ttl if expires_at is None else min(expires_at - time.time(), local_cache.ttl)
+    if ttl > 0:
+        local_cache.set(cache_key, cached_data, ttl=ttl)
+
+
+async def _acquire_lock(cache_key: str, lease: int) -> str | None:
+    """Try to become the single request recomputing ``cache_key``; returns the lock token on success."""
+    node_client = _client_for(cache_key)
+    if node_client is None:
+        return None
+
+    token = uuid.uuid4().hex
+    acquired = False
+    with _shard_fallback(key=cache_key):
+        acquired = bool(await node_client.set(f"lock:{cache_key}", token, nx=True, ex=lease))
+    return token if acquired else None
+
+
+async def _release_lock(cache_key: str, token: str) -> None:
+    node_client = _client_for(cache_key)
+    if node_client is None:
+        return
+
+    try:
+        release = node_client.register_script(_RELEASE_LOCK_SCRIPT)
+        await release(keys=[f"lock:{cache_key}"], args=[token])
+    except Exception as e:
+        logger.warning(f"Failed to release cache lock for {cache_key}: {e}")
+
+
+async def _lookup_protected(
+    cache_key: str, stats: PrefixStats, beta: float, lease: int, wait: float
+) -> tuple[bytes | None, str | None]:
+    """Look up a key guarded against stampedes.
+
+    Returns
+    -------
+    tuple[bytes | None, str | None]
+        The value to serve, if any, and the lock token when this caller should recompute the value.
+        A stale value is served while another worker holds the lock; a caller that finds nothing waits
+        up to ``wait`` seconds for the lock holder to store one.
+    """
+    cached_data = await _get_cached(cache_key, stats)
+    if cached_data:
+        meta, _ = unpack_entry(cached_data)
+        if not _should_recompute(meta, beta):
+            return cached_data, None
+
+        lock_token = await _acquire_lock(cache_key, lease)
+        return (None, lock_token) if lock_token is not None else (cached_data, None)
+
+    lock_token = await _acquire_lock(cache_key, lease)
+    if lock_token is None:
+        return await _wait_for_value(cache_key, wait), None
+    return None, lock_token
+
+
+async def _wait_for_value(cache_key: str, timeout: float) -> bytes | None:
+    """Poll for a value being recomputed by another request, for at most ``timeout`` seconds."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        await asyncio.sleep(_LOCK_POLL_INTERVAL)
+        cached_data = await _get_cached(cache_key)
+        if cached_data:
+            return cached_data
+    return None
+
+
+def _accepts_encoding(accept_encoding: str, encoding: str) -> bool:
+    """Check whether an ``Accept-Encoding`` header allows ``encoding`` (ignoring ``q=0`` entries)."""
+    for part in accept_encoding.split(","):
+        token, _, params = part.strip().partition(";")
+        if token.strip().lower() not in (encoding, "*"):
+            continue
+        q = params.strip()
+        if q.startswith("q="):
+            try:
+                return float(q[2:]) > 0
+            except ValueError:
+                return False
+        return True
+    return False
+
+
+def _etag_for(payload: bytes) -> str:
+    """Weak validator for a stored payload, shared by its compressed and identity representations."""
+    return 'W/"' + hashlib.blake2b(payload, digest_size=16).hexdigest() + '"'
+
+
+def _raw_response(request: Request, payload: bytes, meta: dict[str, Any]) -> Response:
+    """Build the HTTP response for a cached JSON payload without decoding it.
+
+    A compressed payload is sent as-is when the client accepts its encoding and is only
+    decompressed otherwise; a matching ``If-None-Match`` short-circuits to ``304``.
+    """
+    headers = {}
+    etag = meta.get("e")
+    if etag is not None:
+        headers["ETag"] = etag
+        if request.headers.get("if-none-match") == etag:
+            return Response(status_code=304, headers=headers)
+
+    encoding = meta.get("z")
+    if encoding is not None:
+        headers["Vary"] = "Accept-Encoding"
+        if _accepts_encoding(request.headers.get("accept-encoding", ""), encoding):
+            headers["Content-Encoding"] = encoding
+        else:
+            payload = decompress(payload, encoding)
+
+    return Response(content=payload, media_type=meta.get("t", "application/json"), headers=headers)
+
+
+def _invalidation_message(keys: list[str] | None = None, patterns: list[str] | None = None) -> str:
+    return json.dumps({"origin": _instance_id, "keys": keys or [], "patterns": patterns or []})
+
+
+async def _publish_invalidation(keys: list[str] | None = None, patterns: list[str] | None = None) -> None:
+    """Tell every other worker to drop the given keys and patterns from its local cache.
+
+    Messages carry the id of the publishing worker, which has already updated its own
+    local cache and ignores its own messages.
+    """
+    if client is None or local_cache is None or not (keys or patterns):
+        return
+
+    try:
+        await client.publish(invalidation_channel, _invalidation_message(keys, patterns))
+    except Exception as e:
+        logger.warning(f"Failed to publish cache invalidation: {e}")
+
+
+def _apply_invalidation(message: dict[str, Any]) -> None:
+    if local_cache is None or message.get("origin") == _instance_id:
+        return
+
+    local_cache.delete(*message.get("keys", []))
+    for pattern in message.get("patterns", []):
+        local_cache.delete_pattern(pattern)
+
+
+async def _listen_for_invalidations() -> None:
+    """Keep the local cache consistent with invalidations published by other workers.
+
+    If the subscription drops, messages may have been missed, so the local cache is cleared
+    before subscribing again.
+    """
+    while client is not None:
+        pubsub = (_subscriber or client).pubsub()
+        try:
+            await pubsub.subscribe(invalidation_channel)
+            async for message in pubsub.listen():
+                if message.get("type") != "message":
+                    continue
+                try:
+                    _apply_invalidation(json.loads(message["data"]))
+                except (ValueError, TypeError):
+                    logger.warning("Ignoring malformed cache invalidation message")
+
+        except asyncio.CancelledError:
+            raise
+
+        except Exception as e:
+            logger.warning(f"Cache invalidation subscription lost: {e}")
+            if local_cache is not None:
+                local_cache.clear()
+            await asyncio.sleep(1)
+
+        finally:
+            await pubsub.aclose()  # type: ignore
+
+
+async def start_invalidation_listener(channel: str | None = None, subscriber: Redis | None = None) -> None:
+    """Start the background task that applies invalidations from other workers to the local cache.
+
+    The subscription is made with ``subscriber`` when given, so it does not hold a connection of `client`'s pool.
+    """
+    global invalidation_channel, _invalidation_task, _subscriber
+
+    if channel is not None:
+        invalidation_channel = channel
+    _subscriber = subscriber
+
+    if client is None or local_cache is None or _invalidation_task is not None:
+        return
+
+    _invalidation_task = asyncio.create_task(_listen_for_invalidations())
+
+
+async def stop_invalidation_listener() -> None:
+    global _invalidation_task
+
+    if _invalidation_task is None:
+        return
+
+    _invalidation_task.cancel()
+    try:
+        await _invalidation_task
+    except asyncio.CancelledError:
+        pass
+    _invalidation_task = None
+
+
+async def _store(
+    cache_key: str, stored_data: bytes, ttl: int, tags: list[str] | None = None, stats: PrefixStats | None = None
+) -> None:
+    """Write a value, its tag registrations and the local cache broadcast in a single round trip.
+
+    Tags are registered on the shard holding the key. The broadcast goes through `client`, so it is
+    sent separately when the key lives on another shard.
+    """
+    node_client = _client_for(cache_key)
+    if node_client is None:
+        return
+
+    pipe = node_client.pipeline(transaction=False)
+    pipe.set(cache_key, stored_data, ex=ttl)
+    if tags:
+        queue_tag_registration(pipe, cache_key, tags, ttl)
+
+    if local_cache is not None:
+        local_cache.set(cache_key, stored_data, ttl=min(local_cache.ttl, ttl))
+        if node_client is client:
+            pipe.publish(invalidation_channel, _invalidation_message(keys=[cache_key]))
+
+    started = time.perf_counter()
+    with _shard_fallback(key=cache_key):
+        await execute_pipeline(pipe, node_client)
+    if stats is not None:
+        stats.redis_seconds += time.perf_counter() - started
+        stats.redis_calls += 1
+        stats.bytes_written += len(stored_data)
+
+    if local_cache is not None and node_client is not client:
+        await _publish_invalidation(keys=[cache_key])
+
+
+async def _invalidate(
+    cache_key: str,
+    extra_keys: list[str] | None = None,
+    patterns: list[str] | None = None,
+    tags: list[str] | None = None,
+) -> None:
+    """Delete ``cache_key`` with the extra keys, tags and patterns, in Redis and locally.
+
+    Keys and tags are removed with a single pipelined round trip per node; patterns still need a SCAN each.
+    When sharded, every shard keeps its own tag sets, so tags are invalidated on all of them concurrently.
+    """
     if client is None:
         return
 
-    cursor = 0
-    while True:
-        cursor, keys = await client.scan(cursor, match=pattern, count=100)
-        if keys:
-            await client.delete(*keys)
-        if cursor == 0:
-            break
+    invalidated_keys = [cache_key, *(extra_keys or [])]
+    groups = _group_by_node(invalidated_keys)
+
+    async def invalidate_on(node: str, node_client: Redis) -> list[str]:
+        node_keys = groups.get(node)
+        if not node_keys and not tags:
+            return []
+
+        pipe = node_client.pipeline(transaction=False)
+        if node_keys:
+            pipe.unlink(*node_keys)
+        if tags:
+            _queue_tag_invalidation(pipe, tags)
+
+        results = []
+        with _shard_fallback(node=node):
+            results = await execute_pipeline(pipe, node_client)
+        if not tags or not results:
+            return []
+        return [member.decode() if isinstance(member, bytes) else member for member in results[-1]]
+
+    for members in await asyncio.gather(*(invalidate_on(node, c) for node, c in _nodes().items())):
+        invalidated_keys.extend(members)
+
+    for pattern in patterns or []:
+        await _delete_keys_by_pattern(pattern)
+
+    if local_cache is not None:
+        local_cache.delete(*invalidated_keys)
+        for pattern in patterns or []:
+            local_cache.delete_pattern(pattern)
+        await _publish_invalidation(keys=invalidated_keys, patterns=patterns)
 
 
 def cache(
@@ -190,6 +690,18 @@ def cache(
     resource_id_type: type | tuple[type, ...] = int,
     to_invalidate_extra: dict[str, Any] | None = None,
     pattern_to_invalidate_extra: list[str] | None = None,
+    stampede_protection: bool = False,
+    lock_lease: int = 30,
+    lock_wait: float = 2.0,
+    stale_ttl: int = 60,
+    early_recompute_beta: float = 1.0,
+    codec: str | None = None,
+    compression: str | None = None,
+    raw_response: bool = False,
+    tags: list[str] | None = None,
+    tags_to_invalidate: list[str] | None = None,
+    empty_expiration: int | None = None,
+    error_expiration: int = 0,
 ) -> Callable:
     """Cache decorator for FastAPI endpoints.
 
@@ -215,6 +727,42 @@ def cache(
     pattern_to_invalidate_extra: List[str] | None, optional
         A list of string patterns for cache keys that should be invalidated when the decorated function is called.
         This allows for bulk invalidation of cache keys based on a matching pattern.
+    stampede_protection: bool, default False
+        If True, only one request recomputes an expired or about-to-expire key. It holds a per-key lock
+        (``SET NX`` with a lease) while the others are served the previous value, or poll briefly for the
+        new one when there is no previous value.
+    lock_lease: int, default 30
+        Seconds after which the recompute lock is released even if its holder never finishes.
+    lock_wait: float, default 2.0
+        Seconds a request without any cached value waits for the lock holder before computing itself.
+    stale_ttl: int, default 60
+        Seconds an expired value is kept in Redis so it can be served while it is being recomputed.
+    early_recompute_beta: float, default 1.0
+        Aggressiveness of probabilistic early recomputation (XFetch). Values above 1 favour earlier refreshes.
+    codec: str | None, optional
+        Serializer for the cached value: ``"json"``, ``"orjson"`` or ``"msgpack"``. Defaults to the module-wide
+        `default_codec`. The codec is stored with each value, so it can be changed without flushing the cache.
+    compression: str | None, optional
+        ``"gzip"`` or ``"zstd"``, applied to values of at least `compression_min_size` bytes. Defaults to the
+        module-wide `default_compression`.
+    raw_response: bool, default False
+        If True, GET requests return a `Response` built directly from the stored bytes, with the content type and
+        ETag saved alongside them, instead of decoding the value for FastAPI to encode again. Compressed values are
+        sent pre-compressed to clients that accept the encoding. Requires a JSON codec; any `response_model` of
+        the endpoint is not applied to these responses.
+    tags: List[str] | None, optional
+        Templates (formatted like `key_prefix`) of tags the cached key is registered under on GET requests,
+        e.g. ``["user:{username}:posts"]``.
+    tags_to_invalidate: List[str] | None, optional
+        Templates of tags whose keys are all deleted when the decorated function is called with a method other
+        than GET. This takes one round trip regardless of the size of the keyspace, unlike
+        `pattern_to_invalidate_extra`.
+    empty_expiration: int | None, optional
+        Expiration, in seconds, of results returned as ``CachedResult(..., status=CacheStatus.EMPTY)``.
+        Defaults to `expiration`.
+    error_expiration: int, default 0
+        Expiration, in seconds, of results returned as ``CachedResult(..., status=CacheStatus.ERROR)``.
+        With 0 they are returned to the caller but never cached.
 
     Returns
     -------
@@ -281,68 +829,246 @@ def cache(
     ----
     - resource_id_type is used only if resource_id is not passed.
     - `to_invalidate_extra` and `pattern_to_invalidate_extra` are used for cache invalidation on methods other than GET.
-    - Using `pattern_to_invalidate_extra` can be resource-intensive on large datasets. Use it judiciously and
-      consider the potential impact on Redis performance.
+    - Using `pattern_to_invalidate_extra` can be resource-intensive on large datasets, since it scans the whole
+      keyspace. Prefer `tags` and `tags_to_invalidate`.
+    - When a local cache is configured (`local_cache`), GET requests are answered from worker memory first.
+      Writes and invalidations are broadcast over Redis pub/sub so other workers drop their local copies.
+      A local entry may outlive its Redis key by at most the local cache TTL.
+    - With `stampede_protection`, the time it took to compute a value is stored next to it and used to refresh
+      popular keys shortly before they expire, so most recomputes happen while the old value is still served.
+    - Endpoints that can tell an empty or failed upstream result from a normal one should return a `CachedResult`
+      so those are kept for `empty_expiration` or `error_expiration` instead. Only `OK` values are served stale.
     """
 
+    if codec is not None:
+        get_codec(codec)
+        if raw_response and codec not in JSON_CODECS:
+            raise UnsupportedCodecError(f"Cache codec '{codec}' cannot be served as a raw JSON response.")
+    validate_compression(compression)
+
+    def _codec_for_call() -> str:
+        selected = codec or default_codec
+        if raw_response and selected not in JSON_CODECS:
+            return "json"
+        return selected
+
+    stats = cache_stats.for_prefix(key_prefix)
+    key_patterns.add(key_pattern(key_prefix))
+    expirations = {
+        CacheStatus.OK: expiration,
+        CacheStatus.EMPTY: expiration if empty_expiration is None else empty_expiration,
+        CacheStatus.ERROR: error_expiration,
+    }
+
+    def _respond(request: Request, payload: bytes, meta: dict[str, Any]) -> Any:
+        if raw_response and meta.get("c", "json") in JSON_CODECS:
+            return _raw_response(request, payload, meta)
+        return decode(payload, meta)
+
+    def _serve_hit(request: Request, cached_data: bytes) -> Any:
+        started = time.perf_counter()
+        meta, payload = unpack_entry(cached_data)
+        response = _respond(request, payload, meta)
+        stats.deserialize_seconds += time.perf_counter() - started
+        stats.hits += 1
+        stats.bytes_read += len(cached_data)
+        if meta.get("x", math.inf) < time.time():
+            stats.stale += 1
+        return response
+
     def wrapper(func: Callable) -> Callable:
+        # Templates are parsed and checked against the signature once, here, rather than on every request.
+        parameters = _function_parameters(func)
+        build_prefix = _compile_template(key_prefix, parameters)
+        resolve_resource_id = _compile_resource_id(func, resource_id_name, resource_id_type, parameters)
+        build_tags = [_compile_template(tag, parameters) for tag in tags or []]
+        build_tags_to_invalidate = [_compile_template(tag, parameters) for tag in tags_to_invalidate or []]
+        build_patterns = [_compile_template(pattern, parameters) for pattern in pattern_to_invalidate_extra or []]
+        build_extra_keys = []
+        for prefix, id_template in (to_invalidate_extra or {}).items():
+            id_fields = _template_fields(id_template)
+            if not id_fields or (parameters is not None and id_fields[0] not in parameters):
+                raise CacheKeyTemplateError(f"Invalid id template '{id_template}' in to_invalidate_extra.")
+            build_extra_keys.append((_compile_template(prefix, parameters), id_fields[0]))
+
         @functools.wraps(func)
         async def inner(request: Request, *args: Any, **kwargs: Any) -> Any:
             if client is None:
                 # raise MissingClientError
                 # Bypass cache if Redis client is not available
-                return await func(request, *args, **kwargs)
+                return _unwrap(await func(request, *args, **kwargs))[0]
 
-            if resource_id_name:
-                resource_id = kwargs[resource_id_name]
-            else:
-                resource_id = _infer_resource_id(kwargs=kwargs, resource_id_type=resource_id_type)
-
-            formatted_key_prefix = _format_prefix(key_prefix, kwargs)
-            cache_key = f"{formatted_key_prefix}:{resource_id}"
+            cache_key = f"{build_prefix(kwargs)}:{resolve_resource_id(kwargs)}"
             if request.method == "GET":
-                if to_invalidate_extra is not None or pattern_to_invalidate_extra is not None:
+                if (
+                    to_invalidate_extra is not None
+                    or pattern_to_invalidate_extra is not None
+                    or tags_to_invalidate is not None
+                ):
                     raise InvalidRequestError
 
-                cached_data = await client.get(cache_key)
+                cache_stats.record_read(cache_key)
+                if not stampede_protection:
+                    lock_token = None
+                    cached_data = await _get_cached(cache_key, stats)
+                else:
+                    cached_data, lock_token = await _lookup_protected(
+                        cache_key, stats, early_recompute_beta, lock_lease, lock_wait
+                    )
                 if cached_data:
-                    return json.loads(cached_data.decode())
+                    return _serve_hit(request, cached_data)
+
+                stats.misses += 1
+                try:
+                    started = time.monotonic()
+                    result, status = _unwrap(await func(request, *args, **kwargs))
+                    compute_time = time.monotonic() - started
+
+                    serialize_started = time.perf_counter()
+                    serializable_data = jsonable_encoder(result)
+                    payload, meta = encode(
+                        serializable_data,
+                        codec=_codec_for_call(),
+                        compression=compression or default_compression,
+                        min_size=compression_min_size,
+                    )
+                    ttl = expirations[status]
+                    meta.update({"x": time.time() + ttl, "d": round(compute_time, 4)})
+                    if status is not CacheStatus.OK:
+                        meta["s"] = status.value
+                    key_tags = [build(kwargs) for build in build_tags]
+                    if key_tags:
+                        meta["g"] = key_tags
+                    if raw_response:
+                        meta.update({"t": "application/json", "e": _etag_for(payload)})
+                    stored_data = _pack(payload, meta)
+                    stats.serialize_seconds += time.perf_counter() - serialize_started
+
+                    if ttl > 0:
+                        await _store(
+                            cache_key,
+                            stored_data,
+                            ttl=ttl + stale_ttl if stampede_protection and status is CacheStatus.OK else ttl,
+                            tags=key_tags,
+                            stats=stats,
+                        )
+
+                finally:
+                    if lock_token is not None:
+                        await _release_lock(cache_key, lock_token)
+
+                if raw_response:
+                    return _raw_response(request, payload, meta)
+                return serializable_data
+
+            result = _unwrap(await func(request, *args, **kwargs))[0]
+
+            await _invalidate(
+                cache_key,
+                extra_keys=[f"{build(kwargs)}:{kwargs[id_field]}" for build, id_field in build_extra_keys],
+                patterns=[build(kwargs) + "*" for build in build_patterns],
+                tags=[build(kwargs) for build in build_tags_to_invalidate],
+            )
 
-            result = await func(request, *args, **kwargs)
+            return result
 
-            if request.method == "GET":
-                serializable_data = jsonable_encoder(result)
-                serialized_data = json.dumps(serializable_data)
+        return inner
 
-                await client.set(cache_key, serialized_data)
-                await client.expire(cache_key, expiration)
+    return wrapper
 
-                return json.loads(serialized_data)
 
-            else:
-                await client.delete(cache_key)
-                if to_invalidate_extra is not None:
-                    formatted_extra = _format_extra_data(to_invalidate_extra, kwargs)
-                    for prefix, id in formatted_extra.items():
-                        extra_cache_key = f"{prefix}:{id}"
-                        await client.delete(extra_cache_key)
+async def get_many(keys: list[str]) -> dict[str, Any]:
+    """Fetch several cached values at once.
 
-                if pattern_to_invalidate_extra is not None:
-                    for pattern in pattern_to_invalidate_extra:
-                        formatted_pattern = _format_prefix(pattern, kwargs)
-                        await _delete_keys_by_pattern(formatted_pattern + "*")
+    Keys found in the local cache are served from memory; the rest are read with a single ``MGET`` per node.
 
-            return result
+    Parameters
+    ----------
+    keys: List[str]
+        The cache keys to fetch.
 
-        return inner
+    Returns
+    -------
+    Dict[str, Any]
+        The decoded values of the keys that were found. Missing keys are omitted.
+    """
+    found: dict[str, bytes] = {}
+    if local_cache is not None:
+        for key in keys:
+            cached_data = local_cache.get(key)
+            if cached_data:
+                found[key] = cached_data
+
+    missing = [key for key in keys if key not in found]
+    if missing and client is not None:
+        nodes = _nodes()
+        for node, node_keys in _group_by_node(missing).items():
+            values = []
+            with _shard_fallback(node=node):
+                values = await nodes[node].mget(node_keys)
+            for key, cached_data in zip(node_keys, values):
+                if cached_data:
+                    found[key] = cached_data
+                    _fill_local(key, cached_data)
 
-    return wrapper
+    results = {}
+    for key, cached_data in found.items():
+        meta, payload = unpack_entry(cached_data)
+        results[key] = decode(payload, meta)
+    return results
 
 
-async def async_get_redis() -> AsyncGenerator[Redis, None]:
-    """Get a Redis client from the pool for each request."""
-    client = Redis(connection_pool=pool)
-    try:
-        yield client
-    finally:
-        await client.aclose()  # type: ignore
+async def set_many(
+    items: dict[str, Any], expiration: int = 3600, codec: str | None = None, compression: str | None = None
+) -> None:
+    """Cache several values in a single pipelined round trip per node.
+
+    Parameters
+    ----------
+    items: Dict[str, Any]
+        Mapping of cache key to value. Values are passed through `jsonable_encoder` like decorated results.
+    expiration: int, default 3600
+        Time to live of every key, in seconds.
+    codec: str | None, optional
+        Codec to serialize with. Defaults to the module-wide `default_codec`.
+    compression: str | None, optional
+        Compression for large values. Defaults to the module-wide `default_compression`.
+    """
+    if client is None or not items:
+        return
+
+    stored: dict[str, bytes] = {}
+    for key, value in items.items():
+        payload, meta = encode(
+            jsonable_encoder(value),
+            codec=codec or default_codec,
+            compression=compression or default_compression,
+            min_size=compression_min_size,
+        )
+        meta["x"] = time.time() + expiration
+        stored[key] = _pack(payload, meta)
+        if local_cache is not None:
+            local_cache.set(key, stored[key], ttl=min(local_cache.ttl, expiration))
+
+    published = local_cache is None
+    nodes = _nodes()
+    for node, node_keys in _group_by_node(list(stored)).items():
+        pipe = nodes[node].pipeline(transaction=False)
+        for key in node_keys:
+            pipe.set(key, stored[key], ex=expiration)
+        if not published and nodes[node] is client:
+            pipe.publish(invalidation_channel, _invalidation_message(keys=list(items)))
+            published = True
+        with _shard_fallback(node=node):
+            await pipe.execute()
+
+    if not published:
+        await _publish_invalidation(keys=list(items))
+
+
+async def async_get_redis() -> AsyncGenerator[Redis | None, None]:
+    """Yield the shared cache client, or None when the cache is disabled.
+
+    Each command borrows a connection from its pool for its own duration.
+    """
+    yield client
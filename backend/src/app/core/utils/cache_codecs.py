@@ -0,0 +1,132 @@
+import gzip
+import importlib
+import json
+from types import ModuleType
+from typing import Any, Protocol
+
+from ..exceptions.cache_exceptions import UnsupportedCodecError
+
+
+def _optional_module(name: str) -> ModuleType | None:
+    try:
+        return importlib.import_module(name)
+    except ImportError:  # pragma: no cover - optional dependency
+        return None
+
+
+orjson = _optional_module("orjson")
+msgpack = _optional_module("msgpack")
+zstandard = _optional_module("zstandard")
+
+
+class Codec(Protocol):
+    name: str
+
+    def dumps(self, data: Any) -> bytes: ...
+
+    def loads(self, payload: bytes) -> Any: ...
+
+
+class JSONCodec:
+    name = "json"
+
+    def dumps(self, data: Any) -> bytes:
+        return json.dumps(data).encode()
+
+    def loads(self, payload: bytes) -> Any:
+        return json.loads(payload)
+
+
+class OrjsonCodec:
+    name = "orjson"
+
+    def dumps(self, data: Any) -> bytes:
+        dumped: bytes = orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS)  # type: ignore[union-attr]
+        return dumped
+
+    def loads(self, payload: bytes) -> Any:
+        return orjson.loads(payload)  # type: ignore[union-attr]
+
+
+class MsgpackCodec:
+    name = "msgpack"
+
+    def dumps(self, data: Any) -> bytes:
+        packed: bytes = msgpack.packb(data, use_bin_type=True)  # type: ignore[union-attr]
+        return packed
+
+    def loads(self, payload: bytes) -> Any:
+        return msgpack.unpackb(payload, raw=False, strict_map_key=False)  # type: ignore[union-attr]
+
+
+def _available_codecs() -> dict[str, Codec]:
+    codecs: dict[str, Codec] = {"json": JSONCodec()}
+    if orjson is not None:
+        codecs["orjson"] = OrjsonCodec()
+    if msgpack is not None:
+        codecs["msgpack"] = MsgpackCodec()
+    return codecs
+
+
+CODECS = _available_codecs()
+COMPRESSIONS = ("gzip", "zstd") if zstandard is not None else ("gzip",)
+
+# Codecs whose output is a JSON document and can be sent to clients as-is.
+JSON_CODECS = ("json", "orjson")
+
+
+def get_codec(name: str) -> Codec:
+    """Return the codec registered under ``name``.
+
+    Raises
+    ------
+    UnsupportedCodecError
+        If the codec is unknown or its optional dependency is not installed.
+    """
+    codec = CODECS.get(name)
+    if codec is None:
+        raise UnsupportedCodecError(f"Cache codec '{name}' is not available.")
+    return codec
+
+
+def validate_compression(name: str | None) -> None:
+    if name is not None and name not in COMPRESSIONS:
+        raise UnsupportedCodecError(f"Cache compression '{name}' is not available.")
+
+
+def compress(payload: bytes, algorithm: str) -> bytes:
+    if algorithm == "zstd":
+        compressed: bytes = zstandard.ZstdCompressor(level=3).compress(payload)  # type: ignore[union-attr]
+        return compressed
+    return gzip.compress(payload, compresslevel=5)
+
+
+def decompress(payload: bytes, algorithm: str) -> bytes:
+    if algorithm == "zstd":
+        decompressed: bytes = zstandard.ZstdDecompressor().decompress(payload)  # type: ignore[union-attr]
+        return decompressed
+    return gzip.decompress(payload)
+
+
+def encode(data: Any, codec: str, compression: str | None = None, min_size: int = 1024) -> tuple[bytes, dict[str, Any]]:
+    """Serialize ``data`` and compress it when it is at least ``min_size`` bytes.
+
+    Returns
+    -------
+    tuple[bytes, dict[str, Any]]
+        The payload and the header fields describing it: ``c`` is the codec and ``z`` the compression,
+        omitted when the payload was stored uncompressed.
+    """
+    payload = get_codec(codec).dumps(data)
+    meta: dict[str, Any] = {"c": codec}
+    if compression is not None and len(payload) >= min_size:
+        payload = compress(payload, compression)
+        meta["z"] = compression
+    return payload, meta
+
+
+def decode(payload: bytes, meta: dict[str, Any]) -> Any:
+    """Inverse of :func:`encode`. Values without a codec tag were written as plain JSON."""
+    if "z" in meta:
+        payload = decompress(payload, meta["z"])
+    return get_codec(meta.get("c", "json")).loads(payload)
@@ -0,0 +1,99 @@
+import logging
+
+from redis.asyncio import Redis
+
+from .cache import execute_pipeline, queue_tag_registration, unpack_entry
+from .hash_ring import HashRing
+
+logger = logging.getLogger(__name__)
+
+# Per-shard bookkeeping keys that belong to the shard they are on and are never moved, even if a pattern matches.
+_LOCAL_KEY_PREFIXES = ("cache:", "lock:")
+
+
+async def rebalance(
+    old_nodes: list[str], new_nodes: list[str], patterns: list[str], replicas: int = 160, batch_size: int = 500
+) -> int:
+    """Move the cached keys whose owner differs between two shard lists, keeping their remaining TTL.
+
+    With consistent hashing only the keys that land on a different shard are moved, roughly
+    ``1 / len(new_nodes)`` of them when a shard is added. Keys are copied with ``DUMP`` / ``RESTORE``
+    and unlinked from their old shard. Tags stored in a moved value's header are registered on the new
+    shard, so tag invalidation keeps finding it.
+
+    Only keys matching `patterns` are scanned, so queue jobs, rate limit counters and other data sharing
+    an instance with a shard stay where they are. Keys that do not hold a string are skipped.
+
+    Parameters
+    ----------
+    old_nodes: list[str]
+        Shard URLs the keys are currently distributed over.
+    new_nodes: list[str]
+        Shard URLs the keys should be distributed over.
+    patterns: list[str]
+        Glob patterns of the keys to move, usually `cache.key_patterns`.
+    replicas: int, default 160
+        Points per shard; must match the value used by the application.
+    batch_size: int, default 500
+        Keys scanned and moved per round trip.
+
+    Returns
+    -------
+    int
+        The number of keys moved.
+    """
+    new_ring = HashRing(new_nodes, replicas=replicas)
+    clients = {url: Redis.from_url(url) for url in {*old_nodes, *new_nodes}}
+    moved = 0
+    try:
+        for source_node in old_nodes:
+            source = clients[source_node]
+            async for batch in _scan_batches(source, patterns, batch_size):
+                targets: dict[str, list[str]] = {}
+                for key in batch:
+                    node = new_ring.node_for(key)
+                    if node != source_node and not key.startswith(_LOCAL_KEY_PREFIXES):
+                        targets.setdefault(node, []).append(key)
+
+                for target_node, keys in targets.items():
+                    pipe = source.pipeline(transaction=False)
+                    for key in keys:
+                        pipe.dump(key)
+                        pipe.pttl(key)
+                        pipe.get(key)
+                    results = await pipe.execute(raise_on_error=False)
+
+                    target = clients[target_node]
+                    restore = target.pipeline(transaction=False)
+                    restored = []
+                    for key, dumped, pttl, value in zip(keys, results[::3], results[1::3], results[2::3]):
+                        if isinstance(value, Exception) or dumped is None or pttl == -2:
+                            continue
+                        restore.restore(key, max(pttl, 0), dumped, replace=True)
+                        restored.append(key)
+                        if pttl > 0 and value:
+                            queue_tag_registration(restore, key, unpack_entry(value)[0].get("g", []), pttl // 1000 + 1)
+                    if not restored:
+                        continue
+
+                    await execute_pipeline(restore, target)
+                    await source.unlink(*restored)
+                    moved += len(restored)
+
+    finally:
+        for client in clients.values():
+            await client.aclose()  # type: ignore
+
+    logger.info(f"Moved {moved} cache keys")
+    return moved
+
+
+async def _scan_batches(client: Redis, patterns: list[str], batch_size: int):
+    for pattern in patterns:
+        cursor = 0
+        while True:
+            cursor, keys = await client.scan(cursor, match=pattern, count=batch_size)
+            if keys:
+                yield [k.decode() if isinstance(k, bytes) else k for k in keys]
+            if cursor == 0:
+                break
@@ -0,0 +1,80 @@
+import logging
+import time
+from collections.abc import Callable
+
+from redis.asyncio import Redis
+
+from .hash_ring import HashRing
+
+logger = logging.getLogger(__name__)
+
+
+class ShardedClients:
+    """Redis clients of several cache nodes, with keys routed by a consistent hash ring.
+
+    A shard that fails is marked down for `retry_after` seconds. Meanwhile `client_for` returns ``None``
+    for its keys and the cache treats them as misses, instead of sending them to another shard whose
+    copies would not be invalidated when the shard comes back. Invalidations sent while a shard is down
+    are lost too, so its values may be served until they expire once it is back.
+
+    Parameters
+    ----------
+    urls: list[str]
+        Redis URLs of the shards. All workers must use the same list to route keys identically.
+    replicas: int, default 160
+        Points per shard on the hash ring.
+    retry_after: float, default 5.0
+        Seconds a failed shard is skipped before it is tried again.
+    connect: Callable[[str], Redis], optional
+        Creates the client of a shard from its URL. The application passes clients registered with
+        `redis_connections`, so shards use the shared pools; defaults to a standalone ``Redis.from_url``.
+    """
+
+    def __init__(
+        self,
+        urls: list[str],
+        replicas: int = 160,
+        retry_after: float = 5.0,
+        connect: Callable[[str], Redis] = Redis.from_url,
+    ) -> None:
+        self.ring = HashRing(urls, replicas=replicas)
+        self.clients = {url: connect(url) for url in urls}
+        self.retry_after = retry_after
+        self._down_until: dict[str, float] = {}
+
+    def __len__(self) -> int:
+        return len(self.clients)
+
+    def is_up(self, node: str) -> bool:
+        down_until = self._down_until.get(node)
+        if down_until is None:
+            return True
+        if down_until <= time.monotonic():
+            del self._down_until[node]
+            return True
+        return False
+
+    def mark_down(self, node: str) -> None:
+        if self.is_up(node):
+            logger.warning(f"Cache shard {node} failed; bypassing it for {self.retry_after}s")
+        self._down_until[node] = time.monotonic() + self.retry_after
+
+    def client_for(self, key: str) -> Redis | None:
+        node = self.ring.node_for(key)
+        return self.clients[node] if self.is_up(node) else None
+
+    def group(self, keys: list[str]) -> dict[str, list[str]]:
+        """Group keys by the shard that owns them, leaving out shards that are down."""
+        groups: dict[str, list[str]] = {}
+        for key in keys:
+            node = self.ring.node_for(key)
+            if self.is_up(node):
+                groups.setdefault(node, []).append(key)
+        return groups
+
+    def available(self) -> dict[str, Redis]:
+        return {node: client for node, client in self.clients.items() if self.is_up(node)}
+
+    async def aclose(self) -> None:
+        for client in self.clients.values():
+            await client.aclose()  # type: ignore
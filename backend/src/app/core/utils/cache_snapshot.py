@@ -0,0 +1,158 @@
+import base64
+import json
+import logging
+import os
+import tempfile
+import time
+from typing import Any
+
+from redis.asyncio import Redis
+
+from .cache import execute_pipeline, queue_tag_registration, unpack_entry
+from .cache_sharding import ShardedClients
+from .cache_stats import HOT_KEYS_KEY
+
+logger = logging.getLogger(__name__)
+
+_BATCH_SIZE = 500
+LOAD_GUARD_KEY = "cache:snapshot:loading"
+
+
+def _by_node(client: Redis, shards: ShardedClients | None, keys: list[str]) -> list[tuple[Redis, list[str]]]:
+    if shards is None:
+        return [(client, keys)]
+    return [(shards.clients[node], node_keys) for node, node_keys in shards.group(keys).items()]
+
+
+async def dump_snapshot(client: Redis, path: str, top_n: int = 1000, shards: ShardedClients | None = None) -> int:
+    """Write the ``top_n`` most read cache entries to a JSON lines file.
+
+    Keys are ranked by the read counts the cache decorator keeps in Redis (see `cache_stats`). Each line holds
+    the key, its base64 encoded value and its absolute expiry time in epoch milliseconds, so the remaining TTL
+    is still correct when the snapshot is loaded later. The file is written to a temporary file of its own
+    and then moved into place, so concurrent dumps from several workers never mix their entries.
+
+    Parameters
+    ----------
+    client: Redis
+        Client of the instance to snapshot.
+    path: str
+        Destination file.
+    top_n: int, default 1000
+        Maximum number of entries to write.
+    shards: ShardedClients | None, optional
+        When the cache is sharded, values are read from the shard owning each key. Entries on shards
+        that are down are skipped.
+
+    Returns
+    -------
+    int
+        The number of entries written. Keys that expired or were never given a TTL are skipped.
+    """
+    keys = [k.decode() if isinstance(k, bytes) else k for k in await client.zrevrange(HOT_KEYS_KEY, 0, top_n - 1)]
+
+    entries = []
+    for start in range(0, len(keys), _BATCH_SIZE):
+        for node_client, batch in _by_node(client, shards, keys[start : start + _BATCH_SIZE]):
+            pipe = node_client.pipeline(transaction=False)
+            for key in batch:
+                pipe.get(key)
+                pipe.pttl(key)
+            results = await pipe.execute()
+
+            now_ms = int(time.time() * 1000)
+            for key, value, pttl in zip(batch, results[::2], results[1::2]):
+                if value is None or pttl is None or pttl <= 0:
+                    continue
+                entries.append({"k": key, "v": base64.b64encode(value).decode(), "x": now_ms + pttl})
+
+    fd, tmp_path = tempfile.mkstemp(
+        dir=os.path.dirname(path) or ".", prefix=f"{os.path.basename(path)}.", suffix=".tmp"
+    )
+    try:
+        with os.fdopen(fd, "w") as f:
+            for entry in entries:
+                f.write(json.dumps(entry) + "\n")
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+    logger.info(f"Wrote {len(entries)} cache entries to {path}")
+    return len(entries)
+
+
+async def load_snapshot(client: Redis, path: str, overwrite: bool = False, shards: ShardedClients | None = None) -> int:
+    """Load a snapshot written by `dump_snapshot` with pipelined writes.
+
+    Entries keep their original expiry time, so the time spent between dump and load counts against
+    their TTL, and entries that have expired in the meantime are skipped. Tags stored in an entry's header
+    are registered again so tag invalidation keeps working for loaded keys.
+
+    Parameters
+    ----------
+    client: Redis
+        Client of the instance to warm.
+    path: str
+        Snapshot file.
+    overwrite: bool, default False
+        If False, keys that already exist are left untouched, so loading never replaces fresher values.
+    shards: ShardedClients | None, optional
+        When the cache is sharded, each entry is written to the shard owning its key.
+
+    Returns
+    -------
+    int
+        The number of entries sent to Redis.
+    """
+    with open(path) as f:
+        entries = {entry["k"]: entry for entry in map(json.loads, filter(str.strip, f))}
+
+    keys = list(entries)
+    loaded = 0
+    for start in range(0, len(keys), _BATCH_SIZE):
+        for node_client, batch in _by_node(client, shards, keys[start : start + _BATCH_SIZE]):
+            pipe = node_client.pipeline(transaction=False)
+            now_ms = int(time.time() * 1000)
+            for key in batch:
+                remaining_ms = entries[key]["x"] - now_ms
+                if remaining_ms <= 0:
+                    continue
+
+                value = base64.b64decode(entries[key]["v"])
+                pipe.set(key, value, px=remaining_ms, nx=not overwrite)
+                queue_tag_registration(pipe, key, _tags_of(value), remaining_ms // 1000 + 1)
+                loaded += 1
+
+            await execute_pipeline(pipe, node_client)
+
+    logger.info(f"Loaded {loaded} cache entries from {path}")
+    return loaded
+
+
+async def load_snapshot_once(
+    client: Redis, path: str, guard_ttl: int = 300, shards: ShardedClients | None = None
+) -> int | None:
+    """Load a snapshot unless another worker started loading it in the last ``guard_ttl`` seconds.
+
+    Every worker of a deployment starts with the same settings; the first one to set `LOAD_GUARD_KEY`
+    loads the snapshot and the others skip it.
+
+    Returns
+    -------
+    int | None
+        The number of entries sent to Redis, or None if another worker is loading the snapshot.
+    """
+    if not await client.set(LOAD_GUARD_KEY, os.getpid(), nx=True, ex=guard_ttl):
+        logger.info(f"Cache snapshot {path} is loaded by another worker")
+        return None
+    return await load_snapshot(client, path, shards=shards)
+
+
+def _tags_of(value: bytes) -> list[str]:
+    try:
+        meta: dict[str, Any] = unpack_entry(value)[0]
+    except ValueError:
+        return []
+    tags: list[str] = meta.get("g", [])
+    return tags
@@ -0,0 +1,213 @@
+import asyncio
+import heapq
+import logging
+from dataclasses import asdict, dataclass, fields
+from typing import Any
+
+from redis.asyncio import Redis
+
+logger = logging.getLogger(__name__)
+
+STATS_KEY_PREFIX = "cache:stats:"
+STATS_INDEX_KEY = "cache:stats:prefixes"
+HOT_KEYS_KEY = "cache:stats:hot_keys"
+HOT_KEYS_LIMIT = 10_000
+
+
+@dataclass
+class PrefixStats:
+    """Counters for a single `@cache` key prefix.
+
+    Timings are cumulative, in seconds. `hits` includes `local_hits` and `stale` hits.
+    """
+
+    hits: int = 0
+    local_hits: int = 0
+    misses: int = 0
+    stale: int = 0
+    bytes_read: int = 0
+    bytes_written: int = 0
+    serialize_seconds: float = 0.0
+    deserialize_seconds: float = 0.0
+    redis_seconds: float = 0.0
+    redis_calls: int = 0
+
+
+METRICS = tuple(field.name for field in fields(PrefixStats))
+
+_METRIC_HELP = {
+    "hits": ("counter", "Cache hits, including local and stale hits."),
+    "local_hits": ("counter", "Cache hits answered from the worker-local cache."),
+    "misses": ("counter", "Cache misses that ran the decorated function."),
+    "stale": ("counter", "Values served past their logical expiry while being recomputed."),
+    "bytes_read": ("counter", "Bytes of cached values read."),
+    "bytes_written": ("counter", "Bytes of cached values written."),
+    "serialize_seconds": ("counter", "Time spent encoding values before storing them."),
+    "deserialize_seconds": ("counter", "Time spent decoding cached values."),
+    "redis_seconds": ("counter", "Time spent waiting on Redis."),
+    "redis_calls": ("counter", "Round trips made to Redis."),
+}
+
+
+class CacheStats:
+    """Per-worker cache counters, grouped by key prefix.
+
+    Counters are plain attributes updated from the event loop, so recording never takes a lock
+    or touches the network. They are periodically added to per-prefix hashes in Redis with
+    ``HINCRBYFLOAT`` and reset, which lets any worker read the totals of the whole deployment.
+
+    Reads of individual keys are counted the same way into a sorted set, trimmed to the
+    `HOT_KEYS_LIMIT` most read keys, which is what cache snapshots are taken from. Between flushes,
+    or while they fail, at most `max_tracked_keys` keys are counted; when a new key arrives past
+    that, only the most read half is kept.
+
+    Parameters
+    ----------
+    max_tracked_keys: int, default HOT_KEYS_LIMIT
+        Maximum number of keys whose reads are counted in this worker.
+    """
+
+    def __init__(self, max_tracked_keys: int = HOT_KEYS_LIMIT) -> None:
+        self.max_tracked_keys = max(max_tracked_keys, 2)
+        self._prefixes: dict[str, PrefixStats] = {}
+        self._key_reads: dict[str, int] = {}
+
+    def for_prefix(self, prefix: str) -> PrefixStats:
+        stats = self._prefixes.get(prefix)
+        if stats is None:
+            stats = self._prefixes[prefix] = PrefixStats()
+        return stats
+
+    def record_read(self, key: str) -> None:
+        reads = self._key_reads.get(key)
+        if reads is None and len(self._key_reads) >= self.max_tracked_keys:
+            self._trim_key_reads()
+        self._key_reads[key] = (reads or 0) + 1
+
+    def _trim_key_reads(self) -> None:
+        keep = heapq.nlargest(self.max_tracked_keys // 2, self._key_reads.items(), key=lambda item: item[1])
+        self._key_reads = dict(keep)
+
+    def snapshot(self) -> dict[str, dict[str, float]]:
+        return {prefix: asdict(stats) for prefix, stats in self._prefixes.items()}
+
+    def reset(self) -> None:
+        for stats in self._prefixes.values():
+            for metric in METRICS:
+                setattr(stats, metric, type(getattr(stats, metric))())
+
+    async def flush(self, client: Redis) -> None:
+        """Add this worker's counters to the shared totals in Redis and reset them."""
+        snapshot = self.snapshot()
+        key_reads, self._key_reads = self._key_reads, {}
+        self.reset()
+
+        pipe = client.pipeline(transaction=False)
+        queued = False
+        for prefix, values in snapshot.items():
+            changed = {metric: value for metric, value in values.items() if value}
+            if not changed:
+                continue
+            queued = True
+            pipe.sadd(STATS_INDEX_KEY, prefix)
+            for metric, value in changed.items():
+                pipe.hincrbyfloat(f"{STATS_KEY_PREFIX}{prefix}", metric, value)
+
+        if key_reads:
+            queued = True
+            for key, reads in key_reads.items():
+                pipe.zincrby(HOT_KEYS_KEY, reads, key)
+            pipe.zremrangebyrank(HOT_KEYS_KEY, 0, -HOT_KEYS_LIMIT - 1)
+
+        if not queued:
+            return
+
+        try:
+            await pipe.execute()
+        except Exception as e:
+            logger.warning(f"Failed to flush cache stats: {e}")
+            self._merge(snapshot)
+            for key, reads in key_reads.items():
+                self._key_reads[key] = self._key_reads.get(key, 0) + reads
+            if len(self._key_reads) > self.max_tracked_keys:
+                self._trim_key_reads()
+
+    def _merge(self, snapshot: dict[str, dict[str, float]]) -> None:
+        for prefix, values in snapshot.items():
+            stats = self.for_prefix(prefix)
+            for metric, value in values.items():
+                setattr(stats, metric, getattr(stats, metric) + value)
+
+    async def collect(self, client: Redis) -> dict[str, dict[str, float]]:
+        """Flush this worker's counters, then return the totals of all workers by prefix."""
+        await self.flush(client)
+
+        prefixes = sorted(p.decode() if isinstance(p, bytes) else p for p in await client.smembers(STATS_INDEX_KEY))
+        if not prefixes:
+            return {}
+
+        pipe = client.pipeline(transaction=False)
+        for prefix in prefixes:
+            pipe.hgetall(f"{STATS_KEY_PREFIX}{prefix}")
+
+        totals = {}
+        for prefix, values in zip(prefixes, await pipe.execute()):
+            decoded = {(k.decode() if isinstance(k, bytes) else k): float(v) for k, v in values.items()}
+            totals[prefix] = {metric: decoded.get(metric, 0.0) for metric in METRICS}
+        return totals
+
+
+def _escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_value(value: float) -> str:
+    value = float(value)
+    return str(int(value)) if value.is_integer() else repr(value)
+
+
+def to_prometheus(totals: dict[str, dict[str, Any]], namespace: str = "cache") -> str:
+    """Render the collected totals in the Prometheus text exposition format."""
+    lines = []
+    for metric in METRICS:
+        kind, description = _METRIC_HELP[metric]
+        name = f"{namespace}_{metric}_total"
+        lines.append(f"# HELP {name} {description}")
+        lines.append(f"# TYPE {name} {kind}")
+        for prefix, values in totals.items():
+            lines.append(f'{name}{{prefix="{_escape_label(prefix)}"}} {_format_value(values.get(metric, 0))}')
+    return "\n".join(lines) + "\n"
+
+
+cache_stats = CacheStats()
+_flush_task: asyncio.Task | None = None
+
+
+async def _flush_periodically(client: Redis, interval: float) -> None:
+    while True:
+        await asyncio.sleep(interval)
+        await cache_stats.flush(client)
+
+
+async def start_stats_flusher(client: Redis, interval: float) -> None:
+    """Start the background task that pushes this worker's counters to Redis every ``interval`` seconds."""
+    global _flush_task
+
+    if _flush_task is None and interval > 0:
+        _flush_task = asyncio.create_task(_flush_periodically(client, interval))
+
+
+async def stop_stats_flusher(client: Redis | None = None) -> None:
+    """Stop the flush task, pushing any remaining counters first when a client is given."""
+    global _flush_task
+
+    if _flush_task is not None:
+        _flush_task.cancel()
+        try:
+            await _flush_task
+        except asyncio.CancelledError:
+            pass
+        _flush_task = None
+
+    if client is not None:
+        await cache_stats.flush(client)
@@ -0,0 +1,157 @@
+import asyncio
+import logging
+
+from redis.asyncio import Redis
+from redis.asyncio.connection import Connection, ConnectionPool
+from redis.exceptions import ResponseError
+
+from .local_cache import LocalCache
+
+logger = logging.getLogger(__name__)
+
+INVALIDATION_CHANNEL = "__redis__:invalidate"
+
+
+class ClientTracking:
+    """Server-assisted client-side caching (``CLIENT TRACKING``) for keys under a few prefixes.
+
+    A dedicated connection enables tracking in broadcast mode for `prefixes`, redirected to itself, and
+    subscribes to ``__redis__:invalidate``. Redis then reports every write, expiry or eviction of a key
+    under those prefixes, by any client, so values read through `get` can be served from worker memory
+    until they change. Broadcast mode does not depend on which connection read a key, so the pooled
+    connections used for the reads need no setup.
+
+    The RESP2 form of tracking (redirection to a subscribed connection) is used rather than RESP3 push
+    messages, which the asyncio client only partially supports and which would require switching the
+    whole pool to RESP3.
+
+    Parameters
+    ----------
+    pool: ConnectionPool
+        Pool of the Redis instance whose keys are tracked; the listener connection is made from it.
+    prefixes: list[str]
+        Key prefixes to track. Reads of other keys always go to Redis.
+    max_entries: int, default 10000
+        Maximum number of values kept locally.
+    ttl: int, default 300
+        Safety net, in seconds, after which a local value is dropped even without an invalidation.
+    """
+
+    def __init__(self, pool: ConnectionPool, prefixes: list[str], max_entries: int = 10_000, ttl: int = 300) -> None:
+        self.pool = pool
+        self.prefixes = tuple(prefixes)
+        self.values = LocalCache(max_entries=max_entries, ttl=ttl)
+        self.active = False
+        self._task: asyncio.Task | None = None
+        self._ready = asyncio.Event()
+        # Reads in flight per key, and keys invalidated while a read was in flight: those replies may be stale.
+        self._inflight: dict[str, int] = {}
+        self._dirty: set[str] = set()
+
+    def tracks(self, key: str) -> bool:
+        return key.startswith(self.prefixes)
+
+    async def start(self, timeout: float = 5.0) -> None:
+        """Start the listener and wait (up to ``timeout`` seconds) for tracking to be enabled."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._listen())
+        try:
+            await asyncio.wait_for(self._ready.wait(), timeout)
+        except TimeoutError:
+            logger.warning("Client tracking not enabled yet; reads go to Redis until it is")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._deactivate()
+
+    async def get(self, client: Redis, key: str) -> bytes | None:
+        """``GET`` a key, answering tracked keys from memory until Redis invalidates them."""
+        if not self.active or not self.tracks(key):
+            return await client.get(key)
+
+        value = self.values.get(key)
+        if value is not None:
+            return value
+
+        self._inflight[key] = self._inflight.get(key, 0) + 1
+        try:
+            value = await client.get(key)
+        finally:
+            remaining = self._inflight.pop(key) - 1
+            if remaining:
+                self._inflight[key] = remaining
+
+        if key in self._dirty:
+            if not remaining:
+                self._dirty.discard(key)
+        elif value is not None and self.active:
+            self.values.set(key, value)
+        return value
+
+    def invalidate(self, keys: list[bytes | str] | None) -> None:
+        """Apply an invalidation message. ``None`` means Redis flushed the database."""
+        if keys is None:
+            self.values.clear()
+            self._dirty.update(self._inflight)
+            return
+
+        for raw_key in keys:
+            key = raw_key.decode() if isinstance(raw_key, bytes) else raw_key
+            self.values.delete(key)
+            if key in self._inflight:
+                self._dirty.add(key)
+
+    def _deactivate(self) -> None:
+        self.active = False
+        self.values.clear()
+        self._dirty.update(self._inflight)
+
+    async def _enable(self, connection: Connection) -> None:
+        await connection.send_command("CLIENT", "ID")
+        client_id = await connection.read_response()
+
+        args: list = ["CLIENT", "TRACKING", "ON", "REDIRECT", client_id, "BCAST"]
+        for prefix in self.prefixes:
+            args.extend(["PREFIX", prefix])
+        await connection.send_command(*args)
+        if await connection.read_response() not in (b"OK", "OK"):
+            raise ResponseError("CLIENT TRACKING was not enabled")
+
+        await connection.send_command("SUBSCRIBE", INVALIDATION_CHANNEL)
+        await connection.read_response()
+
+    async def _listen(self) -> None:
+        """Keep the tracking connection alive.
+
+        Invalidations may have been missed while it was down, so local values are dropped and reads go
+        to Redis until tracking is enabled again on a new connection.
+        """
+        while True:
+            connection = self.pool.make_connection()
+            try:
+                await connection.connect()
+                await self._enable(connection)
+                self.active = True
+                self._ready.set()
+                while True:
+                    message = await connection.read_response(timeout=None)
+                    if isinstance(message, list) and len(message) == 3 and message[0] in (b"message", "message"):
+                        data = message[2]
+                        self.invalidate(None if data is None else data if isinstance(data, list) else [data])
+
+            except asyncio.CancelledError:
+                raise
+
+            except Exception as e:
+                logger.warning(f"Client tracking connection lost: {e}")
+                self._deactivate()
+                await asyncio.sleep(1)
+
+            finally:
+                await connection.disconnect()
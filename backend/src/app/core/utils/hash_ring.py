@@ -0,0 +1,68 @@
+import bisect
+import hashlib
+
+
+def _hash(value: str) -> int:
+    return int.from_bytes(hashlib.blake2b(value.encode(), digest_size=8).digest(), "big")
+
+
+class HashRing:
+    """Consistent hash ring mapping keys to nodes.
+
+    Each node is placed on the ring at `replicas` pseudo-random points, and a key belongs to the first
+    node point at or after its own hash. Adding or removing a node only moves the keys between that
+    node's points and their predecessors, about ``1 / len(nodes)`` of all keys, instead of nearly all
+    of them as with ``hash(key) % len(nodes)``.
+
+    Parameters
+    ----------
+    nodes: list[str]
+        Node names, e.g. Redis URLs. The same names always produce the same ring, on every worker.
+    replicas: int, default 160
+        Points per node. More points spread keys more evenly at the cost of a larger ring.
+    """
+
+    def __init__(self, nodes: list[str], replicas: int = 160) -> None:
+        self.replicas = replicas
+        self._points: list[int] = []
+        self._owners: list[str] = []
+        self.nodes: list[str] = []
+        for node in nodes:
+            self.add_node(node)
+
+    def __len__(self) -> int:
+        return len(self.nodes)
+
+    def add_node(self, node: str) -> None:
+        if node in self.nodes:
+            return
+
+        self.nodes.append(node)
+        for i in range(self.replicas):
+            point = _hash(f"{node}#{i}")
+            index = bisect.bisect(self._points, point)
+            self._points.insert(index, point)
+            self._owners.insert(index, node)
+
+    def remove_node(self, node: str) -> None:
+        if node not in self.nodes:
+            return
+
+        self.nodes.remove(node)
+        kept = [(p, o) for p, o in zip(self._points, self._owners) if o != node]
+        self._points = [p for p, _ in kept]
+        self._owners = [o for _, o in kept]
+
+    def node_for(self, key: str) -> str:
+        """Return the node owning ``key``.
+
+        Raises
+        ------
+        ValueError
+            If the ring has no nodes.
+        """
+        if not self._points:
+            raise ValueError("Hash ring has no nodes")
+
+        index = bisect.bisect(self._points, _hash(key)) % len(self._points)
+        return self._owners[index]
@@ -0,0 +1,281 @@
+import time
+import zlib
+from collections import OrderedDict
+from fnmatch import fnmatchcase
+
+_WINDOW_SHARE = 0.01
+_PROTECTED_SHARE = 0.8
+
+
+class FrequencySketch:
+    """Count-min sketch estimating how often keys were seen recently.
+
+    Counters saturate at 15, like TinyLFU's 4-bit counters, and are all halved once `sample_size`
+    keys have been recorded, so the estimates follow a changing workload instead of remembering
+    old popularity forever. A doorkeeper set absorbs the first sighting of each key, so a scan of
+    keys that are never seen again does not fill the counters with noise.
+
+    Parameters
+    ----------
+    capacity: int
+        Number of entries the cache holds. Each row has four counters per entry, rounded up to a power
+        of two, and counters are halved every ``10 * capacity`` recorded keys.
+    depth: int, default 4
+        Number of rows. An estimate is the minimum of one counter per row.
+    """
+
+    _SEEDS = (0x9E3779B97F4A7C15, 0xC2B2AE3D27D4EB4F, 0x165667B19E3779F9, 0x27D4EB2F165667C5)
+
+    def __init__(self, capacity: int, depth: int = 4) -> None:
+        self._bits = max(4, (4 * max(capacity, 1) - 1).bit_length())
+        self.width = 1 << self._bits
+        self.depth = min(depth, len(self._SEEDS))
+        self.sample_size = 10 * max(capacity, 1)
+        self._rows = [bytearray(self.width) for _ in range(self.depth)]
+        self._doorkeeper: set[int] = set()
+        self._additions = 0
+
+    def _indexes(self, h: int) -> list[int]:
+        # Multiply-shift hashing: the top bits of a 64-bit product with a different odd seed per row.
+        return [((h * seed) & 0xFFFFFFFFFFFFFFFF) >> (64 - self._bits) for seed in self._SEEDS[: self.depth]]
+
+    def frequency(self, key: str) -> int:
+        h = zlib.crc32(key.encode())
+        return (h in self._doorkeeper) + min(row[i] for row, i in zip(self._rows, self._indexes(h)))
+
+    def increment(self, key: str) -> None:
+        h = zlib.crc32(key.encode())
+        if h not in self._doorkeeper:
+            self._doorkeeper.add(h)
+        else:
+            # Conservative update: only the smallest counters grow, which limits overestimates from collisions.
+            indexes = self._indexes(h)
+            smallest = min(row[i] for row, i in zip(self._rows, indexes))
+            if smallest < 15:
+                for row, i in zip(self._rows, indexes):
+                    if row[i] == smallest:
+                        row[i] += 1
+
+        self._additions += 1
+        if self._additions >= self.sample_size:
+            self._rows = [bytearray(c >> 1 for c in row) for row in self._rows]
+            self._doorkeeper.clear()
+            self._additions //= 2
+
+
+class LocalCache:
+    """In-process cache with a per-entry TTL, used as the L1 in front of Redis.
+
+    Values are stored exactly as they are stored in Redis, so an L1 hit skips the network
+    round trip but still returns an independent copy once decoded.
+
+    Eviction follows W-TinyLFU: new entries go to a small LRU window, and an entry leaving the
+    window only enters the main region if a `FrequencySketch` says it is used more often than the
+    entry it would evict there. A burst of one-off keys therefore churns through the window
+    without pushing out the frequently read ones. The main region is a segmented LRU, where
+    entries read again after admission are protected from the next evictions.
+
+    Parameters
+    ----------
+    max_entries: int
+        Maximum number of entries kept per worker.
+    ttl: int
+        Default time to live, in seconds, for entries set without an explicit ttl.
+    max_bytes: int | None, optional
+        Maximum total size of the keys and values kept per worker. If None, only `max_entries`
+        bounds the cache.
+    prefix_quotas: dict[str, int] | None, optional
+        Maximum share of the cache for keys starting with each prefix, in bytes when `max_bytes` is
+        set and in entries otherwise. When a prefix is over its quota its own least recently used
+        entries are evicted, so one key family cannot take over the whole cache.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        ttl: int = 30,
+        max_bytes: int | None = None,
+        prefix_quotas: dict[str, int] | None = None,
+    ) -> None:
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.prefix_quotas = dict(prefix_quotas or {})
+
+        capacity = max_entries if max_bytes is None else max_bytes
+        self._window_max = max(1, int(capacity * _WINDOW_SHARE))
+        self._main_max = max(capacity - self._window_max, 0)
+        self._protected_max = self._main_max * _PROTECTED_SHARE
+
+        # key -> (expires_at, value, weight), each segment ordered from least to most recently used.
+        self._window: OrderedDict[str, tuple[float, bytes, int]] = OrderedDict()
+        self._probation: OrderedDict[str, tuple[float, bytes, int]] = OrderedDict()
+        self._protected: OrderedDict[str, tuple[float, bytes, int]] = OrderedDict()
+        self._window_weight = 0
+        self._probation_weight = 0
+        self._protected_weight = 0
+
+        self._prefix_keys: dict[str, OrderedDict[str, None]] = {prefix: OrderedDict() for prefix in self.prefix_quotas}
+        self._prefix_weight: dict[str, int] = dict.fromkeys(self.prefix_quotas, 0)
+
+        self.sketch = FrequencySketch(max_entries)
+
+    def __len__(self) -> int:
+        return len(self._window) + len(self._probation) + len(self._protected)
+
+    def __contains__(self, key: str) -> bool:
+        entry = self._find(key)
+        return entry is not None and entry[0] > time.monotonic()
+
+    @property
+    def weight(self) -> int:
+        """Total weight of the cached entries: their size in bytes when `max_bytes` is set, else their number."""
+        return self._window_weight + self._probation_weight + self._protected_weight
+
+    def get(self, key: str) -> bytes | None:
+        self.sketch.increment(key)
+
+        entry = self._find(key)
+        if entry is None:
+            return None
+
+        expires_at, value, weight = entry
+        if expires_at <= time.monotonic():
+            self._remove(key)
+            return None
+
+        if key in self._window:
+            self._window.move_to_end(key)
+        elif key in self._protected:
+            self._protected.move_to_end(key)
+        else:
+            del self._probation[key]
+            self._probation_weight -= weight
+            self._protected[key] = entry
+            self._protected_weight += weight
+            self._demote_protected()
+
+        prefix = self._prefix_of(key)
+        if prefix is not None:
+            self._prefix_keys[prefix].move_to_end(key)
+        return value
+
+    def set(self, key: str, value: bytes, ttl: float | None = None) -> None:
+        if self.max_entries <= 0:
+            return
+
+        self.sketch.increment(key)
+        self._remove(key)
+
+        weight = self._weigh(key, value)
+        prefix = self._prefix_of(key)
+        if weight > max(self._main_max, self._window_max):
+            return
+        if prefix is not None and weight > self.prefix_quotas[prefix]:
+            return
+
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        self._window[key] = (expires_at, value, weight)
+        self._window_weight += weight
+        if prefix is not None:
+            self._prefix_keys[prefix][key] = None
+            self._prefix_weight[prefix] += weight
+            self._enforce_quota(prefix)
+
+        # Both bounds apply together: small entries can fill the byte budget of the window past `max_entries`.
+        while (self._window_weight > self._window_max or len(self) > self.max_entries) and self._window:
+            candidate, entry = self._window.popitem(last=False)
+            self._window_weight -= entry[2]
+            self._admit(candidate, entry)
+
+    def delete(self, *keys: str) -> None:
+        for key in keys:
+            self._remove(key)
+
+    def delete_pattern(self, pattern: str) -> None:
+        """Delete every key matching a Redis-style glob pattern."""
+        for segment in (self._window, self._probation, self._protected):
+            for key in [k for k in segment if fnmatchcase(k, pattern)]:
+                self._remove(key)
+
+    def clear(self) -> None:
+        self._window.clear()
+        self._probation.clear()
+        self._protected.clear()
+        self._window_weight = self._probation_weight = self._protected_weight = 0
+        for keys in self._prefix_keys.values():
+            keys.clear()
+        self._prefix_weight = dict.fromkeys(self.prefix_quotas, 0)
+
+    def _weigh(self, key: str, value: bytes) -> int:
+        return 1 if self.max_bytes is None else len(key) + len(value)
+
+    def _prefix_of(self, key: str) -> str | None:
+        for prefix in self.prefix_quotas:
+            if key.startswith(prefix):
+                return prefix
+        return None
+
+    def _find(self, key: str) -> tuple[float, bytes, int] | None:
+        return self._window.get(key) or self._probation.get(key) or self._protected.get(key)
+
+    def _pop(self, key: str) -> tuple[float, bytes, int] | None:
+        if key in self._window:
+            entry = self._window.pop(key)
+            self._window_weight -= entry[2]
+        elif key in self._probation:
+            entry = self._probation.pop(key)
+            self._probation_weight -= entry[2]
+        elif key in self._protected:
+            entry = self._protected.pop(key)
+            self._protected_weight -= entry[2]
+        else:
+            return None
+        return entry
+
+    def _remove(self, key: str) -> None:
+        entry = self._pop(key)
+        if entry is not None:
+            self._forget(key, entry[2])
+
+    def _forget(self, key: str, weight: int) -> None:
+        """Drop a key that is no longer in any segment from its prefix's accounting."""
+        prefix = self._prefix_of(key)
+        if prefix is not None and key in self._prefix_keys[prefix]:
+            del self._prefix_keys[prefix][key]
+            self._prefix_weight[prefix] -= weight
+
+    def _enforce_quota(self, prefix: str) -> None:
+        keys = self._prefix_keys[prefix]
+        while self._prefix_weight[prefix] > self.prefix_quotas[prefix] and len(keys) > 1:
+            self._remove(next(iter(keys)))
+
+    def _demote_protected(self) -> None:
+        while self._protected_weight > self._protected_max and self._protected:
+            key, entry = self._protected.popitem(last=False)
+            self._protected_weight -= entry[2]
+            self._probation[key] = entry
+            self._probation_weight += entry[2]
+
+    def _admit(self, candidate: str, entry: tuple[float, bytes, int]) -> None:
+        """Move a key leaving the window into the main region, if it is used more than what it would evict."""
+        now = time.monotonic()
+        frequency = self.sketch.frequency(candidate)
+        while self._main_weight + entry[2] > self._main_max or len(self) + 1 > self.max_entries:
+            victims = self._probation or self._protected
+            if not victims:
+                self._forget(candidate, entry[2])
+                return
+
+            victim, (expires_at, _, _) = next(iter(victims.items()))
+            if expires_at > now and frequency <= self.sketch.frequency(victim):
+                self._forget(candidate, entry[2])
+                return
+            self._remove(victim)
+
+        self._probation[candidate] = entry
+        self._probation_weight += entry[2]
+
+    @property
+    def _main_weight(self) -> int:
+        return self._probation_weight + self._protected_weight
@@ -0,0 +1,106 @@
+import asyncio
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, TypeVar
+
+T = TypeVar("T")
+
+
+class PasswordHashingBusyError(Exception):
+    """Raised when more password hashes are waiting than the pool accepts."""
+
+
+class PasswordHashingPool:
+    """Bounded thread pool running bcrypt away from the event loop.
+
+    bcrypt releases the GIL while it hashes, so worker threads hash in parallel and the event loop keeps
+    serving other requests during a burst of logins. At most `max_workers` hashes run at once and
+    `max_pending` more wait in line; further calls fail immediately with `PasswordHashingBusyError`
+    instead of queueing without bound.
+
+    Parameters
+    ----------
+    max_workers: int, default 4
+        Hashes computed concurrently.
+    max_pending: int, default 64
+        Hashes allowed to wait for a worker.
+    """
+
+    def __init__(self, max_workers: int = 4, max_pending: int = 64) -> None:
+        self.configure(max_workers, max_pending)
+        self._executor: ThreadPoolExecutor | None = None
+        self._in_flight = 0
+        self._in_flight_lock = threading.Lock()
+        self.completed = 0
+        self.rejected = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self.run_seconds = 0.0
+
+    def configure(self, max_workers: int = 4, max_pending: int = 64) -> None:
+        """Set the pool size; takes effect when the pool is next started."""
+        self.max_workers = max(max_workers, 1)
+        self.max_pending = max(max_pending, 0)
+
+    async def run(self, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """Run ``fn(*args, **kwargs)`` in the pool.
+
+        Raises
+        ------
+        PasswordHashingBusyError
+            If `max_pending` calls are already waiting for a worker.
+        """
+        if self._in_flight >= self.max_workers + self.max_pending:
+            self.rejected += 1
+            raise PasswordHashingBusyError("Too many password hashes waiting.")
+
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="password-hashing")
+
+        submitted_at = time.perf_counter()
+
+        def timed() -> tuple[T, float, float]:
+            started_at = time.perf_counter()
+            result = fn(*args, **kwargs)
+            return result, started_at - submitted_at, time.perf_counter() - started_at
+
+        with self._in_flight_lock:
+            self._in_flight += 1
+        # The slot is held until the hash is done, even if the caller is cancelled while its thread keeps running.
+        future = self._executor.submit(timed)
+        future.add_done_callback(self._release)
+        result, waited, ran = await asyncio.wrap_future(future)
+
+        self.completed += 1
+        self.wait_seconds += waited
+        self.max_wait_seconds = max(self.max_wait_seconds, waited)
+        self.run_seconds += ran
+        return result
+
+    def _release(self, future: Future) -> None:
+        with self._in_flight_lock:
+            self._in_flight -= 1
+
+    def stats(self) -> dict[str, Any]:
+        """Pool limits, current load and totals since startup, with average queueing and hashing times."""
+        return {
+            "max_workers": self.max_workers,
+            "max_pending": self.max_pending,
+            "running": min(self._in_flight, self.max_workers),
+            "queued": max(self._in_flight - self.max_workers, 0),
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "avg_wait_ms": round(self.wait_seconds / self.completed * 1000, 2) if self.completed else 0.0,
+            "max_wait_ms": round(self.max_wait_seconds * 1000, 2),
+            "avg_run_ms": round(self.run_seconds / self.completed * 1000, 2) if self.completed else 0.0,
+        }
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+password_hashing = PasswordHashingPool()
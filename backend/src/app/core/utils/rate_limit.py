@@ -1,19 +1,419 @@
+import asyncio
+import math
+import time
+import uuid
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
 from datetime import UTC, datetime
-from typing import Optional
+from enum import StrEnum
+from typing import Any
 
 from redis.asyncio import ConnectionPool, Redis
+from redis.commands.core import AsyncScript
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from ...core.logger import logging
 from ...schemas.rate_limit import sanitize_path
+from .redis_connections import redis_connections
 
 logger = logging.getLogger(__name__)
 
 
+class RateLimitAlgorithm(StrEnum):
+    FIXED_WINDOW = "fixed_window"
+    SLIDING_LOG = "sliding_log"
+    SLIDING_WINDOW = "sliding_window"
+    GCRA = "gcra"
+
+
+@dataclass
+class RateLimitResult:
+    """Outcome of a rate limit check.
+
+    `reset_after` is the number of seconds until the full limit is available again, and `retry_after`
+    the number of seconds until a rejected request of the same cost would be allowed (0 when allowed).
+    """
+
+    allowed: bool
+    limit: int
+    remaining: int
+    reset_after: float
+    retry_after: float
+
+
+def rate_limit_headers(result: RateLimitResult) -> dict[str, str]:
+    """Headers describing a rate limit result, following the IETF ``RateLimit`` header fields draft.
+
+    ``Retry-After`` is only included when the request was rejected.
+    """
+    headers = {
+        "RateLimit-Limit": str(result.limit),
+        "RateLimit-Remaining": str(max(result.remaining, 0)),
+        "RateLimit-Reset": str(math.ceil(result.reset_after)),
+    }
+    if not result.allowed:
+        headers["Retry-After"] = str(max(math.ceil(result.retry_after), 1))
+    return headers
+
+
+# Every script takes KEYS[1] = the counter key and ARGV = limit, period in ms, cost, and a unique id,
+# reads the clock with TIME so all workers share the server's clock, and returns
+# {allowed, remaining, reset_after_ms, retry_after_ms}.
+_SCRIPT_PREAMBLE = """
+local limit = tonumber(ARGV[1])
+local period = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local time = redis.call("TIME")
+local now = tonumber(time[1]) * 1000 + math.floor(tonumber(time[2]) / 1000)
+"""
+
+# Window starting with the first request, counted with one key that expires at the end of the window.
+_FIXED_WINDOW_SCRIPT = (
+    _SCRIPT_PREAMBLE
+    + """
+local current = tonumber(redis.call("GET", KEYS[1]) or "0")
+local reset = redis.call("PTTL", KEYS[1])
+if reset < 0 then
+    reset = period
+end
+if current + cost > limit then
+    return {0, math.max(limit - current, 0), reset, reset}
+end
+current = redis.call("INCRBY", KEYS[1], cost)
+if current == cost then
+    redis.call("PEXPIRE", KEYS[1], period)
+end
+return {1, limit - current, reset, 0}
+"""
+)
+
+# Exact: one sorted set member per admitted unit of cost, scored by its time.
+_SLIDING_LOG_SCRIPT = (
+    _SCRIPT_PREAMBLE
+    + """
+redis.call("ZREMRANGEBYSCORE", KEYS[1], "-inf", now - period)
+local count = redis.call("ZCARD", KEYS[1])
+local admitted = count + cost <= limit
+if admitted then
+    for i = 1, cost do
+        redis.call("ZADD", KEYS[1], now, ARGV[4] .. ":" .. i)
+    end
+    redis.call("PEXPIRE", KEYS[1], period)
+    count = count + cost
+end
+
+local reset = 0
+local retry = 0
+local oldest = redis.call("ZRANGE", KEYS[1], 0, 0, "WITHSCORES")
+if oldest[2] then
+    reset = tonumber(oldest[2]) + period - now
+end
+if not admitted then
+    if cost > limit then
+        retry = period
+    else
+        local freeing = redis.call("ZRANGE", KEYS[1], count + cost - limit - 1, count + cost - limit - 1, "WITHSCORES")
+        retry = tonumber(freeing[2]) + period - now
+    end
+end
+return {admitted and 1 or 0, math.max(limit - count, 0), reset, retry}
+"""
+)
+
+# Approximation of a sliding window from the counts of the current and previous fixed windows, the
+# previous one weighted by how much of it still overlaps the sliding window.
+_SLIDING_WINDOW_SCRIPT = (
+    _SCRIPT_PREAMBLE
+    + """
+local window = math.floor(now / period)
+local elapsed = now - window * period
+local state = redis.call("HMGET", KEYS[1], "w", "c", "p")
+local stored = tonumber(state[1])
+local current = tonumber(state[2]) or 0
+local previous = tonumber(state[3]) or 0
+if stored == nil or stored < window - 1 then
+    current, previous = 0, 0
+elseif stored == window - 1 then
+    current, previous = 0, current
+end
+
+local weight = (period - elapsed) / period
+local estimate = previous * weight + current
+if estimate + cost > limit then
+    local retry = period - elapsed
+    if current + cost <= limit and previous > 0 then
+        local needed = 1 - (limit - current - cost) / previous
+        retry = math.ceil(needed * period - elapsed)
+    end
+    return {0, math.max(math.floor(limit - estimate), 0), period - elapsed, retry}
+end
+
+current = current + cost
+redis.call("HSET", KEYS[1], "w", window, "c", current, "p", previous)
+redis.call("PEXPIRE", KEYS[1], 2 * period)
+return {1, math.max(math.floor(limit - previous * weight - current), 0), period - elapsed, 0}
+"""
+)
+
+# Generic cell rate algorithm: one key holding the theoretical arrival time (TAT) of the next request.
+# Requests are spaced period / limit apart, with bursts of up to `limit` requests.
+_GCRA_SCRIPT = (
+    _SCRIPT_PREAMBLE
+    + """
+local interval = period / limit
+local tat = math.max(tonumber(redis.call("GET", KEYS[1]) or "0"), now)
+local new_tat = tat + interval * cost
+local allow_at = new_tat - period
+if allow_at > now then
+    local remaining = math.max(math.floor((period - (tat - now)) / interval), 0)
+    return {0, remaining, math.ceil(tat - now), math.ceil(allow_at - now)}
+end
+if cost > 0 then
+    redis.call("SET", KEYS[1], string.format("%d", math.ceil(new_tat)), "PX", math.ceil(new_tat - now))
+end
+return {1, math.floor((period - (new_tat - now)) / interval), math.ceil(new_tat - now), 0}
+"""
+)
+
+_SCRIPTS = {
+    RateLimitAlgorithm.FIXED_WINDOW: _FIXED_WINDOW_SCRIPT,
+    RateLimitAlgorithm.SLIDING_LOG: _SLIDING_LOG_SCRIPT,
+    RateLimitAlgorithm.SLIDING_WINDOW: _SLIDING_WINDOW_SCRIPT,
+    RateLimitAlgorithm.GCRA: _GCRA_SCRIPT,
+}
+
+# Concurrency slots: KEYS[1] = a sorted set of the requests holding a slot, scored by the expiry of their
+# lease, and ARGV = limit, lease in ms, holder id. Returns {acquired, slots held, ms until the oldest
+# lease expires}. Leases of requests whose worker crashed expire instead of holding their slot forever.
+_ACQUIRE_SLOT_SCRIPT = """
+local limit = tonumber(ARGV[1])
+local lease = tonumber(ARGV[2])
+local time = redis.call("TIME")
+local now = tonumber(time[1]) * 1000 + math.floor(tonumber(time[2]) / 1000)
+redis.call("ZREMRANGEBYSCORE", KEYS[1], "-inf", now)
+local held = redis.call("ZCARD", KEYS[1])
+if held >= limit then
+    local oldest = redis.call("ZRANGE", KEYS[1], 0, 0, "WITHSCORES")
+    return {0, held, tonumber(oldest[2]) - now}
+end
+redis.call("ZADD", KEYS[1], now + lease, ARGV[3])
+redis.call("PEXPIRE", KEYS[1], lease)
+return {1, held + 1, 0}
+"""
+
+
+@dataclass
+class _Lease:
+    tokens: int
+    remaining: int
+    expires_at: float
+    exact_until: float = 0.0
+    refill: asyncio.Task | None = None
+
+
+class TokenLeases:
+    """Per-worker token buckets leased in batches from the Redis rate limiter.
+
+    Each ``(user, path)`` gets a local bucket filled by consuming a batch of `lease_fraction` of its
+    limit with a single `RateLimiter.check`, so most requests are admitted without touching Redis.
+    When a bucket runs low, the next batch is leased in the background. A lease only lives until the
+    limit's window resets, and a batch that Redis refuses means the key is near its limit: requests
+    for it then go through exact checks until the window resets.
+
+    Leased tokens are consumed in Redis up front, so other workers see them as used. Unused tokens are
+    lost when a lease expires (under-admission), and tokens left over when a background refill extends
+    a lease into the next window can be spent there: a worker over-admits by less than one batch per
+    key and window.
+
+    Parameters
+    ----------
+    check: Callable[..., Awaitable[RateLimitResult]]
+        Exact check, normally `RateLimiter.check`.
+    lease_fraction: float, default 0.1
+        Batch size as a fraction of the limit. Limits whose batch would be under 2 tokens are always
+        checked exactly.
+    max_keys: int, default 10000
+        Buckets kept per worker; the least recently used is dropped first.
+    """
+
+    def __init__(
+        self, check: Callable[..., Awaitable[RateLimitResult]], lease_fraction: float = 0.1, max_keys: int = 10_000
+    ) -> None:
+        self._check = check
+        self.lease_fraction = lease_fraction
+        self.max_keys = max_keys
+        self._leases: OrderedDict[tuple, _Lease] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._leases)
+
+    def batch_size(self, limit: int) -> int:
+        return int(limit * self.lease_fraction)
+
+    async def acquire(self, user_id: int | str, path: str, limit: int, period: int, cost: int = 1) -> RateLimitResult:
+        batch = self.batch_size(limit)
+        if batch < 2 or cost == 0 or cost >= batch:
+            return await self._check(user_id=user_id, path=path, limit=limit, period=period, cost=cost)
+
+        key = (user_id, path, limit, period)
+        now = time.monotonic()
+        lease = self._leases.get(key)
+        if lease is not None:
+            self._leases.move_to_end(key)
+            if lease.expires_at > now and lease.tokens >= cost:
+                lease.tokens -= cost
+                if lease.tokens < batch // 2 and lease.refill is None and lease.exact_until <= now:
+                    lease.refill = asyncio.create_task(self._refill(key, lease, batch))
+                return RateLimitResult(
+                    allowed=True,
+                    limit=limit,
+                    remaining=lease.remaining + lease.tokens,
+                    reset_after=max(lease.expires_at - now, 0),
+                    retry_after=0,
+                )
+            if lease.exact_until > now:
+                return await self._check(user_id=user_id, path=path, limit=limit, period=period, cost=cost)
+
+        return await self._lease(key, batch, cost)
+
+    async def _lease(self, key: tuple, batch: int, cost: int) -> RateLimitResult:
+        user_id, path, limit, period = key
+        result = await self._check(user_id=user_id, path=path, limit=limit, period=period, cost=batch)
+        now = time.monotonic()
+        if not result.allowed:
+            self._store(key, _Lease(tokens=0, remaining=0, expires_at=now, exact_until=now + result.reset_after))
+            return await self._check(user_id=user_id, path=path, limit=limit, period=period, cost=cost)
+
+        expires_at = now + min(result.reset_after or period, period)
+        self._store(key, _Lease(tokens=batch - cost, remaining=result.remaining, expires_at=expires_at))
+        return RateLimitResult(
+            allowed=True,
+            limit=limit,
+            remaining=result.remaining + batch - cost,
+            reset_after=result.reset_after,
+            retry_after=0,
+        )
+
+    async def _refill(self, key: tuple, lease: _Lease, batch: int) -> None:
+        user_id, path, limit, period = key
+        try:
+            result = await self._check(user_id=user_id, path=path, limit=limit, period=period, cost=batch)
+        except Exception as e:
+            logger.warning(f"Failed to lease rate limit tokens for {user_id} on {path}: {e}")
+            return
+        finally:
+            lease.refill = None
+
+        now = time.monotonic()
+        if result.allowed:
+            lease.tokens += batch
+            lease.remaining = result.remaining
+            lease.expires_at = now + min(result.reset_after or period, period)
+        else:
+            lease.exact_until = now + result.reset_after
+
+    def _store(self, key: tuple, lease: _Lease) -> None:
+        self._leases[key] = lease
+        self._leases.move_to_end(key)
+        while len(self._leases) > self.max_keys:
+            self._leases.popitem(last=False)
+
+    def clear(self) -> None:
+        for lease in self._leases.values():
+            if lease.refill is not None:
+                lease.refill.cancel()
+        self._leases.clear()
+
+
+class LocalRateLimiter:
+    """Per-worker limiter used while Redis is unavailable.
+
+    Each worker admits its share of a limit, ``ceil(limit / workers)``, with fixed windows counted in
+    memory, so the service as a whole stays close to the configured limits without any shared state.
+    Concurrency limits are shared the same way.
+
+    Parameters
+    ----------
+    workers: int, default 1
+        Number of workers serving the application, over which limits are divided.
+    max_keys: int, default 10000
+        Maximum number of ``(user, path)`` counters kept; the least recently used are dropped first.
+    """
+
+    def __init__(self, workers: int = 1, max_keys: int = 10_000) -> None:
+        self.workers = max(workers, 1)
+        self.max_keys = max_keys
+        self._windows: OrderedDict[tuple, tuple[float, int]] = OrderedDict()
+        self._slots: dict[tuple, set[str]] = {}
+
+    def share(self, limit: int) -> int:
+        return math.ceil(limit / self.workers)
+
+    def check(self, user_id: int | str, path: str, limit: int, period: int, cost: int = 1) -> RateLimitResult:
+        key = (user_id, sanitize_path(path), limit, period)
+        share = self.share(limit)
+        now = time.monotonic()
+        started_at, used = self._windows.get(key, (now, 0))
+        if now - started_at >= period:
+            started_at, used = now, 0
+
+        reset_after = started_at + period - now
+        allowed = used + cost <= share
+        if allowed:
+            used += cost
+        self._windows[key] = (started_at, used)
+        self._windows.move_to_end(key)
+        while len(self._windows) > self.max_keys:
+            self._windows.popitem(last=False)
+
+        return RateLimitResult(
+            allowed=allowed,
+            limit=limit,
+            remaining=max(share - used, 0),
+            reset_after=reset_after,
+            retry_after=0 if allowed else reset_after,
+        )
+
+    def acquire_slot(self, user_id: int | str, path: str, limit: int) -> str | None:
+        holders = self._slots.setdefault((user_id, sanitize_path(path)), set())
+        if len(holders) >= self.share(limit):
+            return None
+        holder = f"local:{uuid.uuid4().hex}"
+        holders.add(holder)
+        return holder
+
+    def release_slot(self, user_id: int | str, path: str, holder: str) -> None:
+        key = (user_id, sanitize_path(path))
+        holders = self._slots.get(key)
+        if holders is not None:
+            holders.discard(holder)
+            if not holders:
+                del self._slots[key]
+
+    def clear(self) -> None:
+        self._windows.clear()
+        self._slots.clear()
+
+
 class RateLimiter:
-    _instance: Optional["RateLimiter"] = None
-    pool: Optional[ConnectionPool] = None
-    client: Optional[Redis] = None
+    _instance: "RateLimiter | None" = None
+    pool: ConnectionPool | None = None
+    client: Redis | None = None
+    leases: TokenLeases | None = None
+    algorithm: RateLimitAlgorithm = RateLimitAlgorithm.FIXED_WINDOW
+    concurrency_lease: float = 60.0
+    concurrency_wait: float = 1.0
+    # Redis calls taking longer than `timeout` seconds fail. When `fallback` is set, failures switch
+    # the limiter to it, and Redis is tried again every `retry_interval` seconds until it answers.
+    timeout: float | None = None
+    fallback: LocalRateLimiter | None = None
+    retry_interval: float = 5.0
+    degraded_since: float | None = None
+    last_error: str | None = None
+    _retry_at: float = 0.0
+    _scripts: dict[RateLimitAlgorithm, AsyncScript] = {}
+    _slot_script: AsyncScript | None = None
 
     def __new__(cls) -> "RateLimiter":
         if cls._instance is None:
@@ -21,11 +421,21 @@ class RateLimiter:
         return cls._instance
 
     @classmethod
-    def initialize(cls, redis_url: str) -> None:
+    def initialize(cls, redis_url: str, algorithm: str = RateLimitAlgorithm.FIXED_WINDOW) -> None:
+        """Connect to Redis and select the algorithm used by `check`.
+
+        Raises
+        ------
+        ValueError
+            If ``algorithm`` is not a `RateLimitAlgorithm` value.
+        """
         instance = cls()
+        instance.algorithm = RateLimitAlgorithm(algorithm)
         if instance.pool is None:
-            instance.pool = ConnectionPool.from_url(redis_url)
-            instance.client = Redis(connection_pool=instance.pool)
+            instance.client = redis_connections.register("rate_limit", redis_url)
+            instance.pool = instance.client.connection_pool
+            instance._scripts = {}
+            instance._slot_script = None
 
     @classmethod
     def get_client(cls) -> Redis:
@@ -35,27 +445,201 @@ class RateLimiter:
             raise Exception("Redis client is not initialized.")
         return instance.client
 
-    async def is_rate_limited(self, db: AsyncSession, user_id: int, path: str, limit: int, period: int) -> bool:
-        client = self.get_client()
-        current_timestamp = int(datetime.now(UTC).timestamp())
-        window_start = current_timestamp - (current_timestamp % period)
+    @property
+    def degraded(self) -> bool:
+        return self.degraded_since is not None
 
-        sanitized_path = sanitize_path(path)
-        key = f"ratelimit:{user_id}:{sanitized_path}:{window_start}"
+    def health(self) -> dict[str, Any]:
+        """Whether requests are limited through Redis or by the local fallback, and since when."""
+        return {
+            "status": "degraded" if self.degraded else "healthy",
+            "fallback_enabled": self.fallback is not None,
+            "degraded_since": (
+                datetime.fromtimestamp(self.degraded_since, UTC).isoformat(timespec="seconds")
+                if self.degraded_since is not None
+                else None
+            ),
+            "last_error": self.last_error,
+        }
 
-        try:
-            current_count = await client.incr(key)
-            if current_count == 1:
-                await client.expire(key, period)
+    def _use_fallback(self) -> bool:
+        """Whether to skip Redis for this call; once per `retry_interval` a degraded call probes Redis instead."""
+        if self.fallback is None or not self.degraded:
+            return False
+        now = time.monotonic()
+        if now < self._retry_at:
+            return True
+        self._retry_at = now + self.retry_interval
+        return False
+
+    def _degrade(self, error: Exception) -> None:
+        if not self.degraded:
+            logger.warning(f"Rate limit Redis unavailable, limiting requests locally: {error!r}")
+            self.degraded_since = time.time()
+        self.last_error = repr(error)
+        self._retry_at = time.monotonic() + self.retry_interval
+
+    def _recover(self) -> None:
+        if self.degraded:
+            logger.info("Rate limit Redis available again, leaving local fallback.")
+            self.degraded_since = None
+            if self.fallback is not None:
+                self.fallback.clear()
+
+    async def _call(self, awaitable: Awaitable[Any]) -> Any:
+        if self.timeout is None:
+            return await awaitable
+        return await asyncio.wait_for(awaitable, self.timeout)
+
+    def _script(self, algorithm: RateLimitAlgorithm) -> AsyncScript:
+        script = self._scripts.get(algorithm)
+        if script is None:
+            script = self._scripts[algorithm] = self.get_client().register_script(_SCRIPTS[algorithm])
+        return script
 
-            if current_count > limit:
-                return True
+    async def check(
+        self,
+        user_id: int | str,
+        path: str,
+        limit: int,
+        period: int,
+        cost: int = 1,
+        algorithm: RateLimitAlgorithm | None = None,
+    ) -> RateLimitResult:
+        """Count a request against a limit and report whether it is allowed, in one round trip.
 
+        The algorithm runs as a server-side script, sent with ``EVALSHA`` (and loaded once when Redis does
+        not know it yet), so checking and counting are atomic and a crashed worker cannot leave a counter
+        without its expiry. Rejected requests are not counted.
+
+        Parameters
+        ----------
+        user_id: int | str
+            User id, or client address for anonymous requests.
+        path: str
+            Request path; it is sanitized into the key.
+        limit: int
+            Units allowed per period.
+        period: int
+            Period in seconds.
+        cost: int, default 1
+            Units consumed by this request. With 0, the remaining units are reported without counting anything.
+        algorithm: RateLimitAlgorithm | None, optional
+            Overrides the algorithm selected with `initialize`.
+        """
+        algorithm = algorithm or self.algorithm
+        key = f"ratelimit:{algorithm.value}:{user_id}:{sanitize_path(path)}"
+        try:
+            allowed, remaining, reset_ms, retry_ms = await self._call(
+                self._script(algorithm)(keys=[key], args=[limit, period * 1000, cost, uuid.uuid4().hex])
+            )
         except Exception as e:
             logger.exception(f"Error checking rate limit for user {user_id} on path {path}: {e}")
             raise e
 
-        return False
+        return RateLimitResult(
+            allowed=bool(allowed),
+            limit=limit,
+            remaining=int(remaining),
+            reset_after=int(reset_ms) / 1000,
+            retry_after=int(retry_ms) / 1000,
+        )
+
+    async def acquire(self, user_id: int | str, path: str, limit: int, period: int, cost: int = 1) -> RateLimitResult:
+        """Like `check`, but admitted from a local token lease when `leases` is set.
+
+        When Redis fails or times out and `fallback` is set, the request is checked by the fallback instead.
+        """
+        if self.fallback is not None and self._use_fallback():
+            return self.fallback.check(user_id=user_id, path=path, limit=limit, period=period, cost=cost)
+        try:
+            if self.leases is not None:
+                result = await self.leases.acquire(user_id=user_id, path=path, limit=limit, period=period, cost=cost)
+            else:
+                result = await self.check(user_id=user_id, path=path, limit=limit, period=period, cost=cost)
+        except Exception as e:
+            if self.fallback is None:
+                raise
+            self._degrade(e)
+            return self.fallback.check(user_id=user_id, path=path, limit=limit, period=period, cost=cost)
+
+        self._recover()
+        return result
+
+    async def acquire_slot(
+        self, user_id: int | str, path: str, limit: int, lease: float | None = None, wait: float | None = None
+    ) -> str | None:
+        """Take one of ``limit`` slots for concurrent requests of a user on a path.
+
+        Slots are leases in a Redis sorted set shared by all workers. A request that finds every slot
+        taken polls, with exponential backoff, until one is released or until ``wait`` seconds have passed.
+
+        Parameters
+        ----------
+        user_id: int | str
+            User id, or client address for anonymous requests.
+        path: str
+            Request path; it is sanitized into the key.
+        limit: int
+            Maximum number of requests in flight.
+        lease: float | None, optional
+            Seconds after which the slot is freed even if it was never released. Defaults to `concurrency_lease`.
+        wait: float | None, optional
+            Seconds to wait for a free slot. Defaults to `concurrency_wait`.
+
+        Returns
+        -------
+        str | None
+            The slot id to pass to `release_slot`, or None if no slot was free in time.
+        """
+        lease = self.concurrency_lease if lease is None else lease
+        wait = self.concurrency_wait if wait is None else wait
+        if self.fallback is not None and self._use_fallback():
+            return self.fallback.acquire_slot(user_id=user_id, path=path, limit=limit)
+        if self._slot_script is None:
+            self._slot_script = self.get_client().register_script(_ACQUIRE_SLOT_SCRIPT)
+
+        key = f"concurrency:{user_id}:{sanitize_path(path)}"
+        holder = uuid.uuid4().hex
+        deadline = time.monotonic() + wait
+        delay = 0.05
+        while True:
+            try:
+                acquired, _, _ = await self._call(
+                    self._slot_script(keys=[key], args=[limit, int(lease * 1000), holder])
+                )
+            except Exception as e:
+                if self.fallback is None:
+                    raise
+                self._degrade(e)
+                return self.fallback.acquire_slot(user_id=user_id, path=path, limit=limit)
+
+            self._recover()
+            if acquired:
+                return holder
+
+            left = deadline - time.monotonic()
+            if left <= 0:
+                return None
+            await asyncio.sleep(min(delay, left))
+            delay = min(delay * 2, 0.5)
+
+    async def release_slot(self, user_id: int | str, path: str, holder: str) -> None:
+        if holder.startswith("local:"):
+            if self.fallback is not None:
+                self.fallback.release_slot(user_id=user_id, path=path, holder=holder)
+            return
+        try:
+            await self._call(self.get_client().zrem(f"concurrency:{user_id}:{sanitize_path(path)}", holder))
+        except Exception as e:
+            if self.fallback is None:
+                raise
+            # The slot's lease expires on its own.
+            self._degrade(e)
+
+    async def is_rate_limited(self, db: AsyncSession, user_id: int, path: str, limit: int, period: int) -> bool:
+        result = await self.acquire(user_id=user_id, path=path, limit=limit, period=period)
+        return not result.allowed
 
 
 rate_limiter = RateLimiter()
@@ -0,0 +1,197 @@
+import asyncio
+import logging
+import time
+import uuid
+from typing import NamedTuple
+
+from redis.asyncio import Redis
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import ORMExecuteState, Session
+
+from ...models.rate_limit import RateLimit
+from ...models.tier import Tier
+
+logger = logging.getLogger(__name__)
+
+_CHANGED_FLAG = "rate_limit_rules_changed"
+_RULE_MODELS = (Tier, RateLimit)
+
+
+class RateLimitRule(NamedTuple):
+    """Rate limit of a tier on a path: ``limit`` units per ``period`` seconds, ``cost`` units per request
+    unit, and at most ``concurrency`` requests in flight (unbounded when None)."""
+
+    limit: int
+    period: int
+    cost: int = 1
+    concurrency: int | None = None
+
+
+class RateLimitRules:
+    """In-memory table of the rate limit and request cost of each ``(tier_id, sanitized path)``.
+
+    The table is loaded with one query per table and then answers every lookup from memory. Commits
+    that write tiers or rate limits, through the API, the admin views or any other session, invalidate
+    it in this worker and publish the change so other workers invalidate theirs too. The next request
+    then reloads it. A periodic invalidation also picks up changes made outside the application.
+    """
+
+    def __init__(self) -> None:
+        self.channel = "ratelimit:rules"
+        self._instance_id = uuid.uuid4().hex
+        self._tiers: dict[int, str] = {}
+        self._limits: dict[tuple[int, str], RateLimitRule] = {}
+        # Bumped by every invalidation; the table is current when it was loaded at the latest generation.
+        self._generation = 0
+        self._loaded_generation = -1
+        self._lock = asyncio.Lock()
+        self._client: Redis | None = None
+        self._task: asyncio.Task | None = None
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded_generation == self._generation
+
+    def tier_name(self, tier_id: int) -> str | None:
+        return self._tiers.get(tier_id)
+
+    def get(self, tier_id: int, path: str) -> RateLimitRule | None:
+        """Return the rate limit of a tier for a sanitized path, if it has one."""
+        return self._limits.get((tier_id, path))
+
+    def invalidate(self) -> None:
+        self._generation += 1
+
+    async def load(self, db: AsyncSession) -> None:
+        generation = self._generation
+        tiers = (await db.execute(select(Tier.id, Tier.name))).all()
+        limits = (
+            await db.execute(
+                select(
+                    RateLimit.tier_id,
+                    RateLimit.path,
+                    RateLimit.limit,
+                    RateLimit.period,
+                    RateLimit.cost,
+                    RateLimit.concurrency,
+                )
+            )
+        ).all()
+
+        self._tiers = dict(tiers)
+        self._limits = {
+            (tier_id, path): RateLimitRule(limit, period, cost, concurrency)
+            for tier_id, path, limit, period, cost, concurrency in limits
+        }
+        self._loaded_generation = generation
+
+    async def ensure_loaded(self, db: AsyncSession) -> None:
+        """Load the table if it was never loaded or was invalidated since, once for concurrent callers."""
+        if self.loaded:
+            return
+        async with self._lock:
+            if not self.loaded:
+                await self.load(db)
+
+    def changed(self) -> None:
+        """Invalidate the table here and, in the background, in every other worker."""
+        self.invalidate()
+        if self._client is None:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        loop.create_task(self._publish())
+
+    async def _publish(self) -> None:
+        if self._client is None:
+            return
+        try:
+            await self._client.publish(self.channel, self._instance_id)
+        except Exception as e:
+            logger.warning(f"Failed to publish rate limit rule change: {e}")
+
+    async def _listen(self, refresh_interval: float) -> None:
+        """Invalidate the table on changes published by other workers and every ``refresh_interval`` seconds.
+
+        If the subscription drops, changes may have been missed, so the table is invalidated before
+        subscribing again.
+        """
+        refreshed_at = time.monotonic()
+        while self._client is not None:
+            pubsub = self._client.pubsub()
+            try:
+                await pubsub.subscribe(self.channel)
+                while True:
+                    message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+                    origin = message["data"] if message is not None else None
+                    if origin is not None and origin not in (self._instance_id, self._instance_id.encode()):
+                        self.invalidate()
+
+                    if refresh_interval > 0 and time.monotonic() - refreshed_at >= refresh_interval:
+                        refreshed_at = time.monotonic()
+                        self.invalidate()
+
+            except asyncio.CancelledError:
+                raise
+
+            except Exception as e:
+                logger.warning(f"Rate limit rule subscription lost: {e}")
+                self.invalidate()
+                await asyncio.sleep(1)
+
+            finally:
+                await pubsub.aclose()  # type: ignore
+
+    async def start(self, client: Redis, channel: str | None = None, refresh_interval: float = 300) -> None:
+        """Start listening for rule changes made by other workers."""
+        if channel is not None:
+            self.channel = channel
+        self._client = client
+        if self._task is None:
+            self._task = asyncio.create_task(self._listen(refresh_interval))
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._client = None
+
+
+rate_limit_rules = RateLimitRules()
+
+
+def _is_rule_model(obj: object) -> bool:
+    return isinstance(obj, _RULE_MODELS)
+
+
+@event.listens_for(Session, "after_flush")
+def _flag_flushed_rule_changes(session: Session, flush_context: object) -> None:
+    if any(_is_rule_model(obj) for obj in (*session.new, *session.dirty, *session.deleted)):
+        session.info[_CHANGED_FLAG] = True
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _flag_bulk_rule_changes(orm_execute_state: ORMExecuteState) -> None:
+    mapper = orm_execute_state.bind_mapper
+    if orm_execute_state.is_select or mapper is None:
+        return
+    if issubclass(mapper.class_, _RULE_MODELS):
+        orm_execute_state.session.info[_CHANGED_FLAG] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_on_commit(session: Session) -> None:
+    if session.info.pop(_CHANGED_FLAG, False):
+        rate_limit_rules.changed()
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_on_rollback(session: Session) -> None:
+    session.info.pop(_CHANGED_FLAG, None)
@@ -0,0 +1,189 @@
+import logging
+from collections.abc import Callable
+from typing import Any
+from urllib.parse import urlsplit, urlunsplit
+
+from redis.asyncio import BlockingConnectionPool, ConnectionPool, Redis
+
+logger = logging.getLogger(__name__)
+
+
+def _normalize_url(url: str) -> str:
+    return url.rstrip("/")
+
+
+def _redact_url(url: str) -> str:
+    parts = urlsplit(url)
+    if parts.password is None:
+        return url
+    netloc = parts.netloc.replace(f":{parts.password}@", ":***@", 1)
+    return urlunsplit(parts._replace(netloc=netloc))
+
+
+def _connection_counts(pool: ConnectionPool) -> tuple[int, int]:
+    """Connections lent out and idle in ``pool``.
+
+    redis-py has no public counters for these, so its bookkeeping is read defensively: a version
+    without these attributes reports zeros instead of failing.
+    """
+    in_use = getattr(pool, "_in_use_connections", ())
+    idle = getattr(pool, "_available_connections", ())
+    return len(in_use), len(idle)
+
+
+class RedisConnectionManager:
+    """Named Redis clients sharing one connection pool per Redis URL.
+
+    The cache, the job queue and the rate limiter each register a logical client. Clients whose URLs
+    are equal draw their connections from the same pool, so a worker keeps a single set of sockets
+    per Redis instance instead of one per feature. Clients are created on top of an existing pool,
+    so closing one of them never disconnects the pool; `aclose` closes every pool at shutdown.
+
+    Pub/sub subscriptions hold their connection for as long as they listen, so they use `subscriber`
+    clients, on a separate pool per URL that `max_connections` does not apply to. Otherwise every
+    listener would permanently take one of the connections meant for commands.
+
+    Parameters
+    ----------
+    max_connections: int | None, optional
+        Connections per pool. When set, callers wait up to `pool_timeout` seconds for a free
+        connection instead of failing. If None, pools grow without limit.
+    pool_timeout: float, default 5.0
+        Seconds to wait for a free connection when a pool is at `max_connections`.
+    health_check_interval: int, default 30
+        Idle seconds after which a connection is checked with ``PING`` before being used.
+    socket_keepalive: bool, default True
+        Enable TCP keepalive, so connections dropped by the network are detected.
+    """
+
+    def __init__(
+        self,
+        max_connections: int | None = None,
+        pool_timeout: float = 5.0,
+        health_check_interval: int = 30,
+        socket_keepalive: bool = True,
+    ) -> None:
+        self.configure(max_connections, pool_timeout, health_check_interval, socket_keepalive)
+        self._pools: dict[str, ConnectionPool] = {}
+        self._subscriber_pools: dict[str, ConnectionPool] = {}
+        self._clients: dict[str, Redis] = {}
+        self._client_urls: dict[str, str] = {}
+
+    def configure(
+        self,
+        max_connections: int | None = None,
+        pool_timeout: float = 5.0,
+        health_check_interval: int = 30,
+        socket_keepalive: bool = True,
+    ) -> None:
+        """Set the options of pools created from now on."""
+        self.max_connections = max_connections
+        self.pool_timeout = pool_timeout
+        self.health_check_interval = health_check_interval
+        self.socket_keepalive = socket_keepalive
+
+    def pool(self, url: str) -> ConnectionPool:
+        """Return the pool for ``url``, creating it on first use."""
+        url = _normalize_url(url)
+        pool = self._pools.get(url)
+        if pool is None:
+            options: dict[str, Any] = {
+                "health_check_interval": self.health_check_interval,
+                "socket_keepalive": self.socket_keepalive,
+            }
+            if self.max_connections is None:
+                pool = ConnectionPool.from_url(url, **options)
+            else:
+                pool = BlockingConnectionPool.from_url(
+                    url, max_connections=self.max_connections, timeout=self.pool_timeout, **options
+                )
+            self._pools[url] = pool
+        return pool
+
+    def subscriber(self, url: str) -> Redis:
+        """Return a client for pub/sub subscriptions to ``url``, outside the pool used for commands."""
+        url = _normalize_url(url)
+        pool = self._subscriber_pools.get(url)
+        if pool is None:
+            pool = self._subscriber_pools[url] = ConnectionPool.from_url(
+                url, health_check_interval=self.health_check_interval, socket_keepalive=self.socket_keepalive
+            )
+        return Redis(connection_pool=pool)
+
+    def register(self, name: str, url: str, factory: Callable[[ConnectionPool], Redis] | None = None) -> Redis:
+        """Return the client called ``name``, creating it on the shared pool of ``url`` if needed.
+
+        Parameters
+        ----------
+        name: str
+            Logical name of the client, e.g. ``"cache"``.
+        url: str
+            Redis URL of the client.
+        factory: Callable[[ConnectionPool], Redis] | None, optional
+            Builds the client from the pool, for Redis subclasses such as arq's ``ArqRedis``.
+
+        Raises
+        ------
+        ValueError
+            If ``name`` is already registered with another URL.
+        """
+        url = _normalize_url(url)
+        existing = self._clients.get(name)
+        if existing is not None:
+            if self._client_urls[name] != url:
+                raise ValueError(f"Redis client {name!r} is already registered for another URL")
+            return existing
+
+        pool = self.pool(url)
+        client = factory(pool) if factory is not None else Redis(connection_pool=pool)
+        self._clients[name] = client
+        self._client_urls[name] = url
+        return client
+
+    def get(self, name: str) -> Redis | None:
+        return self._clients.get(name)
+
+    def stats(self) -> dict[str, dict[str, Any]]:
+        """Connections of each pool, by redacted URL.
+
+        Connections in use, idle, the pool limit and the clients using it, and the connections held
+        by subscriptions, which are not part of the pool.
+        """
+        stats = {}
+        for url, pool in self._pools.items():
+            in_use, idle = _connection_counts(pool)
+            subscriber_pool = self._subscriber_pools.get(url)
+            stats[_redact_url(url)] = {
+                "clients": sorted(name for name, client_url in self._client_urls.items() if client_url == url),
+                "max_connections": pool.max_connections,
+                "in_use": in_use,
+                "idle": idle,
+                "subscriptions": _connection_counts(subscriber_pool)[0] if subscriber_pool is not None else 0,
+            }
+        return stats
+
+    async def aclose(self) -> None:
+        for url, pool in [*self._pools.items(), *self._subscriber_pools.items()]:
+            try:
+                await pool.disconnect()
+            except Exception as e:
+                logger.warning(f"Failed to close Redis pool {_redact_url(url)}: {e}")
+        self._pools.clear()
+        self._subscriber_pools.clear()
+        self._clients.clear()
+        self._client_urls.clear()
+
+
+def to_prometheus(stats: dict[str, dict[str, Any]], namespace: str = "redis_pool") -> str:
+    """Render pool statistics as Prometheus gauges."""
+    lines = []
+    for metric, description in (("in_use", "Connections currently lent out."), ("idle", "Open idle connections.")):
+        name = f"{namespace}_connections_{metric}"
+        lines.append(f"# HELP {name} {description}")
+        lines.append(f"# TYPE {name} gauge")
+        for url, values in stats.items():
+            lines.append(f'{name}{{url="{url}"}} {values[metric]}')
+    return "\n".join(lines) + "\n"
+
+
+redis_connections = RedisConnectionManager()
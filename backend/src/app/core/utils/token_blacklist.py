@@ -0,0 +1,229 @@
+import asyncio
+import hashlib
+import math
+import time
+from datetime import datetime
+
+from redis.asyncio import Redis
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..db.crud_token_blacklist import crud_token_blacklist
+from ..db.database import local_session
+from ..db.token_blacklist import TokenBlacklist as TokenBlacklistModel
+from ..logger import logging
+from ..schemas import TokenBlacklistCreate
+
+logger = logging.getLogger(__name__)
+
+
+def token_hash(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+class BloomFilter:
+    """Set membership with false positives but no false negatives, in a fixed number of bits.
+
+    Parameters
+    ----------
+    capacity: int
+        Number of items the filter is sized for.
+    error_rate: float, default 0.01
+        False positive rate once `capacity` items were added.
+    """
+
+    def __init__(self, capacity: int, error_rate: float = 0.01) -> None:
+        capacity = max(capacity, 1)
+        self.size = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, digest: str) -> list[int]:
+        # Double hashing: two independent 64-bit values of the digest generate every position.
+        h1 = int(digest[:16], 16)
+        h2 = int(digest[16:32], 16) | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def add(self, digest: str) -> None:
+        for position in self._positions(digest):
+            self._bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, digest: str) -> bool:
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(digest))
+
+
+class TokenBlacklist:
+    """Revoked tokens, checked without I/O for the common case of a token that was never revoked.
+
+    The `token_blacklist` table remains the durable record. Revoked tokens are also stored in Redis
+    under the SHA-256 of the token, expiring with the token, and added to a per-worker Bloom filter
+    that other workers update from a pub/sub channel. A token missing from the filter is not revoked;
+    one in the filter is confirmed in Redis and then in the table, so false positives and a flushed
+    Redis never let a revoked token through.
+
+    The filter is only trusted while it is known to be complete: after it was loaded from the table
+    and while the subscription is up. Otherwise, and when Redis is not configured, every check goes
+    to Redis or the table. The filter is rebuilt every `refresh_interval` seconds, dropping expired tokens.
+
+    Tokens missing from Redis, e.g. after it was flushed, are copied from the table when a worker
+    subscribes, by one worker at a time: the first to take a guard key for `backfill_guard_ttl` seconds.
+
+    Parameters
+    ----------
+    capacity: int, default 100000
+        Number of unexpired revoked tokens the filter is sized for.
+    error_rate: float, default 0.01
+        False positive rate of the filter at `capacity`.
+    """
+
+    key_prefix = "token_blacklist:"
+    backfill_key = "token_blacklist_backfill"
+    backfill_guard_ttl = 300
+
+    def __init__(self, capacity: int = 100_000, error_rate: float = 0.01) -> None:
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.channel = "token_blacklist"
+        self.bloom = BloomFilter(capacity, error_rate)
+        self.ready = False
+        self._client: Redis | None = None
+        self._subscriber: Redis | None = None
+        self._task: asyncio.Task | None = None
+
+    def configure(self, capacity: int, error_rate: float) -> None:
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.bloom = BloomFilter(capacity, error_rate)
+        self.ready = False
+
+    async def load(self, db: AsyncSession, backfill: bool = False) -> None:
+        """Rebuild the filter from the unexpired tokens of the table.
+
+        With ``backfill``, the tokens are also copied to Redis unless another worker did it in the last
+        `backfill_guard_ttl` seconds. Tokens already in Redis are left alone, keeping the expiry they were revoked with.
+        """
+        now = datetime.now()
+        rows = (
+            await db.execute(
+                select(TokenBlacklistModel.token, TokenBlacklistModel.expires_at).where(
+                    TokenBlacklistModel.expires_at > now
+                )
+            )
+        ).all()
+
+        bloom = BloomFilter(self.capacity, self.error_rate)
+        digests = [(token_hash(token), expires_at) for token, expires_at in rows]
+        for digest, _ in digests:
+            bloom.add(digest)
+
+        if (
+            backfill
+            and self._client is not None
+            and digests
+            and await self._client.set(self.backfill_key, 1, nx=True, ex=self.backfill_guard_ttl)
+        ):
+            async with self._client.pipeline(transaction=False) as pipe:
+                for digest, expires_at in digests:
+                    ttl = max(int((expires_at - now).total_seconds()), 1)
+                    pipe.set(self.key_prefix + digest, 1, ex=ttl, nx=True)
+                await pipe.execute()
+
+        self.bloom = bloom
+        if len(digests) > self.capacity:
+            logger.warning(f"{len(digests)} revoked tokens exceed the blacklist filter capacity of {self.capacity}")
+
+    async def add(self, db: AsyncSession, token: str, exp_timestamp: float) -> None:
+        """Revoke a token until its expiry, in the table first and then in Redis and every worker's filter."""
+        expires_at = datetime.fromtimestamp(exp_timestamp)
+        await crud_token_blacklist.create(db, object=TokenBlacklistCreate(token=token, expires_at=expires_at))
+
+        digest = token_hash(token)
+        self.bloom.add(digest)
+        if self._client is None:
+            return
+        try:
+            await self._client.set(self.key_prefix + digest, 1, ex=max(int(exp_timestamp - time.time()), 1))
+            await self._client.publish(self.channel, digest)
+        except Exception as e:
+            logger.warning(f"Failed to share token revocation, other workers may accept it until their refresh: {e}")
+
+    async def contains(self, db: AsyncSession, token: str) -> bool:
+        digest = token_hash(token)
+        if self.ready and digest not in self.bloom:
+            return False
+
+        if self._client is not None:
+            try:
+                if await self._client.exists(self.key_prefix + digest):
+                    return True
+            except Exception as e:
+                logger.warning(f"Token blacklist unavailable in Redis, checking the database: {e}")
+
+        return bool(await crud_token_blacklist.exists(db, token=token))
+
+    async def _reload(self, backfill: bool = False) -> None:
+        async with local_session() as db:
+            await self.load(db, backfill=backfill)
+
+    async def _listen(self, refresh_interval: float) -> None:
+        """Add tokens revoked by other workers to the filter, and rebuild it every ``refresh_interval`` seconds.
+
+        The filter is only marked ready once subscribed and loaded, so no revocation published in
+        between is missed. If the subscription drops, it is no longer trusted until both happen again.
+        """
+        while self._client is not None:
+            pubsub = (self._subscriber or self._client).pubsub()
+            try:
+                await pubsub.subscribe(self.channel)
+                await self._reload(backfill=True)
+                self.ready = True
+                refreshed_at = time.monotonic()
+                while True:
+                    message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+                    if message is not None:
+                        data = message["data"]
+                        self.bloom.add(data.decode() if isinstance(data, bytes) else data)
+
+                    if refresh_interval > 0 and time.monotonic() - refreshed_at >= refresh_interval:
+                        refreshed_at = time.monotonic()
+                        await self._reload()
+
+            except asyncio.CancelledError:
+                raise
+
+            except Exception as e:
+                logger.warning(f"Token blacklist subscription lost: {e}")
+                self.ready = False
+                await asyncio.sleep(1)
+
+            finally:
+                await pubsub.aclose()  # type: ignore
+
+    async def start(
+        self, client: Redis, channel: str | None = None, refresh_interval: float = 3600, subscriber: Redis | None = None
+    ) -> None:
+        """Start sharing revocations through Redis and trusting the filter once it is loaded.
+
+        The subscription is made with ``subscriber`` when given, so it does not hold a connection of `client`'s pool.
+        """
+        if channel is not None:
+            self.channel = channel
+        self._client = client
+        self._subscriber = subscriber
+        if self._task is None:
+            self._task = asyncio.create_task(self._listen(refresh_interval))
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._client = None
+        self._subscriber = None
+        self.ready = False
+
+
+token_blacklist = TokenBlacklist()
@@ -0,0 +1,165 @@
+import asyncio
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any
+
+from redis.asyncio import Redis
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import ORMExecuteState, Session
+
+from ...crud.crud_users import crud_users
+from ...models.user import User
+from ..logger import logging
+
+logger = logging.getLogger(__name__)
+
+_CHANGED_FLAG = "user_cache_changed"
+
+
+class UserCache:
+    """Per-worker cache of the active user records used to authenticate requests.
+
+    Records are looked up by username or email, like the ``sub`` claim of access tokens, and kept for
+    `ttl` seconds. Commits that write users, through the API, the admin views or any other session,
+    clear the cache in this worker and publish the change so other workers clear theirs too, so
+    updates, deletions and tier changes are seen by the next request.
+
+    Parameters
+    ----------
+    ttl: float, default 30.0
+        Seconds a record is served from memory, which bounds staleness if an invalidation is missed.
+    max_entries: int, default 10000
+        Maximum number of records kept; the least recently used are dropped first.
+    """
+
+    def __init__(self, ttl: float = 30.0, max_entries: int = 10_000) -> None:
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.channel = "users:invalidations"
+        self._instance_id = uuid.uuid4().hex
+        self._entries: OrderedDict[str, tuple[float, dict[str, Any]]] = OrderedDict()
+        # Bumped by every invalidation, so a record read before it is not cached after it.
+        self._generation = 0
+        self._client: Redis | None = None
+        self._task: asyncio.Task | None = None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def get(self, db: AsyncSession, username_or_email: str) -> dict[str, Any] | None:
+        """Return the active user with this username or email, from memory when possible."""
+        entry = self._entries.get(username_or_email)
+        if entry is not None and entry[0] > time.monotonic():
+            self._entries.move_to_end(username_or_email)
+            return dict(entry[1])
+
+        generation = self._generation
+        if "@" in username_or_email:
+            user = await crud_users.get(db=db, email=username_or_email, is_deleted=False)
+        else:
+            user = await crud_users.get(db=db, username=username_or_email, is_deleted=False)
+
+        if user is None or self.ttl <= 0 or generation != self._generation:
+            self._entries.pop(username_or_email, None)
+            return user
+
+        self._entries[username_or_email] = (time.monotonic() + self.ttl, dict(user))
+        self._entries.move_to_end(username_or_email)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return user
+
+    def invalidate(self) -> None:
+        self._generation += 1
+        self._entries.clear()
+
+    def changed(self) -> None:
+        """Clear the cache here and, in the background, in every other worker."""
+        self.invalidate()
+        if self._client is None:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        loop.create_task(self._publish())
+
+    async def _publish(self) -> None:
+        if self._client is None:
+            return
+        try:
+            await self._client.publish(self.channel, self._instance_id)
+        except Exception as e:
+            logger.warning(f"Failed to publish user change: {e}")
+
+    async def _listen(self) -> None:
+        """Clear the cache on changes published by other workers, and whenever the subscription drops."""
+        while self._client is not None:
+            pubsub = self._client.pubsub()
+            try:
+                await pubsub.subscribe(self.channel)
+                while True:
+                    message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+                    origin = message["data"] if message is not None else None
+                    if origin is not None and origin not in (self._instance_id, self._instance_id.encode()):
+                        self.invalidate()
+
+            except asyncio.CancelledError:
+                raise
+
+            except Exception as e:
+                logger.warning(f"User cache subscription lost: {e}")
+                self.invalidate()
+                await asyncio.sleep(1)
+
+            finally:
+                await pubsub.aclose()  # type: ignore
+
+    async def start(self, client: Redis, channel: str | None = None) -> None:
+        """Start listening for user changes made by other workers."""
+        if channel is not None:
+            self.channel = channel
+        self._client = client
+        if self._task is None:
+            self._task = asyncio.create_task(self._listen())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._client = None
+
+
+user_cache = UserCache()
+
+
+@event.listens_for(Session, "after_flush")
+def _flag_flushed_user_changes(session: Session, flush_context: object) -> None:
+    if any(isinstance(obj, User) for obj in (*session.new, *session.dirty, *session.deleted)):
+        session.info[_CHANGED_FLAG] = True
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _flag_bulk_user_changes(orm_execute_state: ORMExecuteState) -> None:
+    mapper = orm_execute_state.bind_mapper
+    if orm_execute_state.is_select or mapper is None:
+        return
+    if issubclass(mapper.class_, User):
+        orm_execute_state.session.info[_CHANGED_FLAG] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_on_commit(session: Session) -> None:
+    if session.info.pop(_CHANGED_FLAG, False):
+        user_cache.changed()
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_on_rollback(session: Session) -> None:
+    session.info.pop(_CHANGED_FLAG, None)
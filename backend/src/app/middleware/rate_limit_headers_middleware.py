@@ -0,0 +1,38 @@
+from fastapi import Request, Response
+from starlette.middleware.base import BaseHTTPMiddleware, RequestResponseEndpoint
+
+from ..core.utils.rate_limit import rate_limit_headers
+
+
+class RateLimitHeadersMiddleware(BaseHTTPMiddleware):
+    """Middleware adding `RateLimit-*` headers to the responses of rate limited routes.
+
+    `rate_limiter_dependency` stores the result of its check in ``request.state.rate_limit``. Setting the
+    headers here rather than in the dependency also covers routes that return a `Response` directly,
+    such as cached raw responses, and the 429 responses, which also carry `Retry-After`.
+
+    Note
+    ----
+        - Routes without the rate limiter dependency are left untouched.
+    """
+
+    async def dispatch(self, request: Request, call_next: RequestResponseEndpoint) -> Response:
+        """Process the request and add the rate limit headers of its check to the response.
+
+        Parameters
+        ----------
+        request: Request
+            The incoming request.
+        call_next: RequestResponseEndpoint
+            The next middleware or route handler in the processing chain.
+
+        Returns
+        -------
+        Response
+            The response, with rate limit headers when the route was rate limited.
+        """
+        response: Response = await call_next(request)
+        result = getattr(request.state, "rate_limit", None)
+        if result is not None:
+            response.headers.update(rate_limit_headers(result))
+        return response
@@ -0,0 +1,18 @@
+from pydantic import BaseModel
+
+
+class NearbyAirport(BaseModel):
+    code: str
+    entity_key: str
+    city: str | None = None
+    country: str | None = None
+    latitude: float
+    longitude: float
+    distance_km: float
+
+
+class NearbyAirportsResponse(BaseModel):
+    latitude: float
+    longitude: float
+    radius_km: float
+    data: list[NearbyAirport]
@@ -1,5 +1,7 @@
+import csv
 import logging
 import json
+from collections.abc import Sequence
 from typing import Any, List
 from datetime import datetime, date
 
@@ -7,6 +9,7 @@ import httpx
 
 from ..core.config import settings
 from ..core.exceptions.http_exceptions import CustomException
+from .spatial_index import GeoKDTree, build_airport_index
 
 logger = logging.getLogger(__name__)
 
@@ -20,11 +23,26 @@ class FlightServiceError(CustomException):
         super().__init__(status_code=status_code, detail=message)
 
 
+class UpstreamResponseError(FlightServiceError):
+    """The flight API answered with a non-200 status."""
+
+    def __init__(self, message: str, status_code: int = 502) -> None:
+        super().__init__(message, status_code=status_code)
+
+
 class LocationProcessor:
     """
     Loads and processes airport/city/country data for generating API query keys.
+
+    When ``coordinates_file_path`` points to a CSV with an IATA code and latitude/longitude per row
+    (header ``iata,latitude,longitude``; ``code``/``lat``/``lon``/``lng`` are accepted too), a spatial
+    index is built so the nearest airports to a coordinate can be found in logarithmic time.
     """
-    def __init__(self, data_file_path="/code/app/airport_data.json"):
+    _IATA_COLUMNS = ("iata", "iata_code", "code")
+    _LAT_COLUMNS = ("latitude", "lat")
+    _LON_COLUMNS = ("longitude", "lon", "lng")
+
+    def __init__(self, data_file_path="/code/app/airport_data.json", coordinates_file_path: str | None = None):
         self.data_file_path = data_file_path
         self._lookup_data = self._load_data()
 
@@ -33,6 +51,12 @@ class LocationProcessor:
         self.country_map = self._lookup_data.get("COUNTRY_MAP", {})
         self.ambiguous_city_map = self._lookup_data.get("AMBIGUOUS_CITY_MAP", {})
 
+        self.coordinates_file_path = coordinates_file_path
+        self.airport_coordinates = self._load_coordinates() if coordinates_file_path else {}
+        self.spatial_index: GeoKDTree | None = (
+            build_airport_index(self.airport_coordinates) if self.airport_coordinates else None
+        )
+
     def _load_data(self) -> dict[str, Any]:
         try:
             with open(self.data_file_path, 'r', encoding='utf-8') as f:
@@ -41,6 +65,81 @@ class LocationProcessor:
             logger.warning(f"Location data failed to load from {self.data_file_path}")
             return {}
 
+    @staticmethod
+    def _pick_column(fieldnames: Sequence[str], candidates: tuple[str, ...]) -> str | None:
+        normalized = {name.strip().lower(): name for name in fieldnames}
+        for candidate in candidates:
+            if candidate in normalized:
+                return normalized[candidate]
+        return None
+
+    def _load_coordinates(self) -> dict[str, tuple[float, float]]:
+        coordinates: dict[str, tuple[float, float]] = {}
+        if self.coordinates_file_path is None:
+            return coordinates
+        try:
+            with open(self.coordinates_file_path, encoding='utf-8', newline='') as f:
+                reader = csv.DictReader(f)
+                fieldnames = reader.fieldnames or []
+                iata_col = self._pick_column(fieldnames, self._IATA_COLUMNS)
+                lat_col = self._pick_column(fieldnames, self._LAT_COLUMNS)
+                lon_col = self._pick_column(fieldnames, self._LON_COLUMNS)
+                if not (iata_col and lat_col and lon_col):
+                    logger.warning(f"Coordinates file {self.coordinates_file_path} is missing iata/lat/lon columns")
+                    return {}
+
+                skipped = 0
+                for row in reader:
+                    code = (row.get(iata_col) or "").strip().upper()
+                    if len(code) != 3:
+                        continue
+                    try:
+                        lat, lon = float(row[lat_col]), float(row[lon_col])
+                    except (KeyError, TypeError, ValueError):
+                        skipped += 1
+                        continue
+                    if -90 <= lat <= 90 and -180 <= lon <= 180:
+                        coordinates[code] = (lat, lon)
+                    else:
+                        skipped += 1
+        except (OSError, UnicodeDecodeError, csv.Error) as e:
+            logger.warning(f"Coordinates data failed to load from {self.coordinates_file_path}: {e}")
+            return {}
+
+        if skipped:
+            logger.warning(f"Skipped {skipped} rows with invalid coordinates in {self.coordinates_file_path}")
+
+        return coordinates
+
+    def find_nearby_airports(
+        self, lat: float, lon: float, radius_km: float | None = None, limit: int = 10
+    ) -> List[dict[str, Any]]:
+        """Return the airports closest to ``(lat, lon)``, nearest first.
+
+        Raises
+        ------
+        FlightServiceError
+            If no coordinates dataset has been loaded.
+        """
+        if self.spatial_index is None:
+            raise FlightServiceError("Airport coordinates are not configured")
+
+        results = []
+        for point, distance_km in self.spatial_index.nearest(lat, lon, k=limit, radius_km=radius_km):
+            airport = self.airport_map.get(point.key, {})
+            results.append(
+                {
+                    "code": point.key,
+                    "entity_key": f"Airport:{point.key}",
+                    "city": airport.get("city"),
+                    "country": airport.get("country"),
+                    "latitude": point.lat,
+                    "longitude": point.lon,
+                    "distance_km": round(distance_km, 2),
+                }
+            )
+        return results
+
     def _get_entity_key(self, input_value: str) -> str | None:
         if not input_value:
             return None
@@ -87,7 +186,7 @@ class FlightService:
             "x-rapidapi-host": settings.RAPIDAPI_HOST
         }
         self.timeout = 30.0
-        self.location_processor = LocationProcessor() 
+        self.location_processor = LocationProcessor(coordinates_file_path=settings.AIRPORT_COORDINATES_FILE)
 
     def _format_date_for_api(self, date_str: str | None) -> str | None:
         """Ensures date is in DD/MM/YYYY format required by Kiwi.com RapidAPI."""
@@ -209,10 +308,13 @@ class FlightService:
                 
                 if response.status_code != 200:
                     logger.error(f"API Error {response.status_code}: {response.text}")
-                    return {"data": []}
+                    raise UpstreamResponseError(f"Flight API returned {response.status_code}")
                 
                 return response.json()
 
+        except FlightServiceError:
+            raise
+
         except Exception as e:
             logger.exception(f"Search failed: {e}")
             raise FlightServiceError(str(e))
@@ -227,10 +329,13 @@ class FlightService:
                 
                 if response.status_code != 200:
                     logger.error(f"API Error {response.status_code}: {response.text}")
-                    return {"data": []}
+                    raise UpstreamResponseError(f"Flight API returned {response.status_code}")
 
                 return response.json()
 
+        except FlightServiceError:
+            raise
+
         except Exception as e:
             logger.exception(f"Search failed: {e}")
             raise FlightServiceError(str(e))
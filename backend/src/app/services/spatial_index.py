@@ -0,0 +1,131 @@
+import heapq
+import math
+from dataclasses import dataclass
+
+EARTH_RADIUS_KM = 6371.0088
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Great-circle distance between two points in kilometres."""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(lon2 - lon1)
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def _to_cartesian(lat: float, lon: float) -> tuple[float, float, float]:
+    phi, lam = math.radians(lat), math.radians(lon)
+    cos_phi = math.cos(phi)
+    return (cos_phi * math.cos(lam), cos_phi * math.sin(lam), math.sin(phi))
+
+
+def _chord_for_km(distance_km: float) -> float:
+    """Straight-line distance on the unit sphere matching a great-circle distance."""
+    angle = min(distance_km / EARTH_RADIUS_KM, math.pi)
+    return 2 * math.sin(angle / 2)
+
+
+@dataclass(frozen=True)
+class GeoPoint:
+    key: str
+    lat: float
+    lon: float
+
+
+class GeoKDTree:
+    """Static 3-d tree over points projected onto the unit sphere.
+
+    Projecting latitude/longitude to cartesian coordinates keeps the index correct across the
+    antimeridian and near the poles: the straight-line (chord) distance between two projected points
+    grows monotonically with their great-circle distance, so nearest-neighbour order is preserved.
+
+    Parameters
+    ----------
+    points: list[GeoPoint]
+        The points to index. The tree is built once in O(n log n) and is read-only afterwards.
+    """
+
+    def __init__(self, points: list[GeoPoint]) -> None:
+        self._points = points
+        self._coords = [_to_cartesian(p.lat, p.lon) for p in points]
+        # Nodes are stored as (point_index, axis, left_node, right_node); -1 marks a missing child.
+        self._nodes: list[tuple[int, int, int, int]] = []
+        self._root = self._build(list(range(len(points))), depth=0)
+
+    def __len__(self) -> int:
+        return len(self._points)
+
+    def _build(self, indices: list[int], depth: int) -> int:
+        if not indices:
+            return -1
+
+        axis = depth % 3
+        indices.sort(key=lambda i: self._coords[i][axis])
+        median = len(indices) // 2
+
+        node_id = len(self._nodes)
+        self._nodes.append((indices[median], axis, -1, -1))
+        left = self._build(indices[:median], depth + 1)
+        right = self._build(indices[median + 1 :], depth + 1)
+        self._nodes[node_id] = (indices[median], axis, left, right)
+        return node_id
+
+    def nearest(
+        self, lat: float, lon: float, k: int = 10, radius_km: float | None = None
+    ) -> list[tuple[GeoPoint, float]]:
+        """Return up to ``k`` points closest to ``(lat, lon)``, nearest first, with their distance in km.
+
+        Parameters
+        ----------
+        lat: float
+            Latitude of the query point in degrees.
+        lon: float
+            Longitude of the query point in degrees.
+        k: int
+            Maximum number of points to return.
+        radius_km: float | None
+            If set, only points within this great-circle distance are returned.
+        """
+        if k <= 0 or self._root == -1:
+            return []
+
+        target = _to_cartesian(lat, lon)
+        max_sq = _chord_for_km(radius_km) ** 2 if radius_km is not None else math.inf
+        # Max-heap of the best k candidates, stored as (-squared_chord, point_index).
+        best: list[tuple[float, int]] = []
+
+        # Each entry carries a lower bound on the distance to anything in its subtree.
+        stack: list[tuple[int, float]] = [(self._root, 0.0)]
+        while stack:
+            node_id, min_dist_sq = stack.pop()
+            if node_id == -1 or min_dist_sq > (-best[0][0] if len(best) == k else max_sq):
+                continue
+
+            point_index, axis, left, right = self._nodes[node_id]
+            coords = self._coords[point_index]
+            dist_sq = (coords[0] - target[0]) ** 2 + (coords[1] - target[1]) ** 2 + (coords[2] - target[2]) ** 2
+
+            bound = -best[0][0] if len(best) == k else max_sq
+            if dist_sq <= bound:
+                if len(best) == k:
+                    heapq.heapreplace(best, (-dist_sq, point_index))
+                else:
+                    heapq.heappush(best, (-dist_sq, point_index))
+
+            diff = target[axis] - coords[axis]
+            near, far = (left, right) if diff < 0 else (right, left)
+
+            stack.append((far, diff * diff))
+            stack.append((near, 0.0))
+
+        results = []
+        for _, point_index in sorted(best, reverse=True):
+            point = self._points[point_index]
+            results.append((point, haversine_km(lat, lon, point.lat, point.lon)))
+        return results
+
+
+def build_airport_index(coordinates: dict[str, tuple[float, float]]) -> GeoKDTree:
+    """Build a :class:`GeoKDTree` from a mapping of IATA code to ``(lat, lon)``."""
+    return GeoKDTree([GeoPoint(key=code, lat=lat, lon=lon) for code, (lat, lon) in coordinates.items()])
@@ -0,0 +1,44 @@
+import argparse
+import asyncio
+import logging
+import sys
+
+from ..app import api  # noqa: F401 - declares the @cache key prefixes
+from ..app.core.config import settings
+from ..app.core.utils import cache
+from ..app.core.utils.cache_rebalance import rebalance
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Move cache keys whose shard changes when going from one list of cache nodes to another."
+    )
+    parser.add_argument("--from", dest="old_nodes", nargs="+", required=True, help="Current cache node URLs")
+    parser.add_argument(
+        "--to", dest="new_nodes", nargs="+", default=settings.REDIS_CACHE_NODES, help="New cache node URLs"
+    )
+    parser.add_argument(
+        "--match", dest="patterns", nargs="+", help="Glob patterns of the keys to move (default: every @cache prefix)"
+    )
+    return parser.parse_args()
+
+
+async def main() -> int:
+    args = parse_args()
+    if not args.new_nodes:
+        logger.error("No target nodes: pass --to or set REDIS_CACHE_NODES")
+        return 1
+
+    try:
+        await rebalance(args.old_nodes, args.new_nodes, args.patterns or sorted(cache.key_patterns))
+    except Exception as e:
+        logger.error(f"Cache rebalance failed: {e}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
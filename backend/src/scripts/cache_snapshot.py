@@ -0,0 +1,51 @@
+import argparse
+import asyncio
+import logging
+import sys
+
+from redis.asyncio import Redis
+
+from ..app.core.config import settings
+from ..app.core.utils.cache_sharding import ShardedClients
+from ..app.core.utils.cache_snapshot import dump_snapshot, load_snapshot
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Snapshot the hottest cache entries or load a snapshot into Redis.")
+    parser.add_argument("action", choices=["dump", "load"])
+    parser.add_argument(
+        "--file", default=settings.REDIS_CACHE_SNAPSHOT_FILE, required=not settings.REDIS_CACHE_SNAPSHOT_FILE
+    )
+    parser.add_argument("--url", default=settings.REDIS_CACHE_URL, help="Redis instance to read from or write to")
+    parser.add_argument("--top", type=int, default=settings.REDIS_CACHE_SNAPSHOT_TOP_N, help="Entries to dump")
+    parser.add_argument("--overwrite", action="store_true", help="Replace keys that already exist when loading")
+    return parser.parse_args()
+
+
+async def main() -> int:
+    args = parse_args()
+    client = Redis.from_url(args.url)
+    shards = ShardedClients(settings.REDIS_CACHE_NODES) if settings.REDIS_CACHE_NODES else None
+    try:
+        if args.action == "dump":
+            await dump_snapshot(client, args.file, top_n=args.top, shards=shards)
+        else:
+            await load_snapshot(client, args.file, overwrite=args.overwrite, shards=shards)
+
+    except Exception as e:
+        logger.error(f"Cache snapshot {args.action} failed: {e}")
+        return 1
+
+    finally:
+        await client.aclose()  # type: ignore
+        if shards is not None:
+            await shards.aclose()
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,243 @@
+"""Unit tests for request authentication."""
+
+import asyncio
+import threading
+import time
+from unittest.mock import AsyncMock, Mock, patch
+
+import pytest
+from fastapi import Request
+from jose import JWTError
+from sqlalchemy import create_engine, update
+from sqlalchemy.orm import Session
+
+from src.app.api.dependencies import get_current_user, get_optional_user, login_rate_limiter_dependency
+from src.app.core import security
+from src.app.core.exceptions.http_exceptions import RateLimitException, UnauthorizedException
+from src.app.core.schemas import TokenData
+from src.app.core.utils.password_hashing import PasswordHashingBusyError, PasswordHashingPool
+from src.app.core.utils.rate_limit import LocalRateLimiter, RateLimitResult
+from src.app.core.utils.user_cache import UserCache, user_cache
+from src.app.models.tier import Tier
+from src.app.models.user import User
+
+
+def make_request(token: str = "token") -> Request:
+    return Request({"type": "http", "headers": [(b"authorization", f"Bearer {token}".encode())]})
+
+
+class TestDecodeToken:
+    """Test that tokens are decoded once for their lifetime."""
+
+    @pytest.fixture(autouse=True)
+    def empty_memo(self):
+        with patch.object(security, "_decoded_tokens", security._decoded_tokens.__class__()):
+            yield
+
+    @pytest.mark.asyncio
+    async def test_token_is_decoded_once(self):
+        token = await security.create_access_token({"sub": "alice"})
+
+        with patch.object(security.jwt, "decode", wraps=security.jwt.decode) as decode:
+            assert security.decode_token(token)["sub"] == "alice"
+            assert security.decode_token(token)["sub"] == "alice"
+
+        decode.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_changing_a_payload_does_not_change_the_memo(self):
+        token = await security.create_access_token({"sub": "alice"})
+
+        security.decode_token(token).pop("sub")
+        security.decode_token(token)["sub"] = "mallory"
+
+        assert security.decode_token(token)["sub"] == "alice"
+
+    def test_memoized_token_still_expires(self):
+        security._decoded_tokens[security.token_hash("token")] = {"sub": "alice", "exp": time.time() - 1}
+
+        with pytest.raises(JWTError):
+            security.decode_token("token")
+
+
+class TestAuthContext:
+    """Test that a request is authenticated once, whichever dependencies need its user."""
+
+    @pytest.mark.asyncio
+    async def test_user_is_resolved_once_per_request(self, mock_db):
+        user = {"id": 1, "username": "alice"}
+        request = make_request()
+
+        with (
+            patch(
+                "src.app.api.dependencies.verify_token",
+                new=AsyncMock(return_value=TokenData(username_or_email="alice")),
+            ) as verify,
+            patch("src.app.api.dependencies.user_cache") as cache,
+        ):
+            cache.get = AsyncMock(return_value=user)
+
+            assert await get_optional_user(request, mock_db) == user
+            assert await get_current_user(request, "token", mock_db) == user
+
+        verify.assert_awaited_once()
+        cache.get.assert_awaited_once_with(mock_db, "alice")
+
+
+class TestUserCache:
+    """Test the cache of authenticated users."""
+
+    @pytest.mark.asyncio
+    async def test_records_are_served_from_memory(self, mock_db):
+        cache = UserCache(ttl=30)
+        with patch("src.app.core.utils.user_cache.crud_users") as crud:
+            crud.get = AsyncMock(return_value={"id": 1, "username": "alice"})
+
+            await cache.get(mock_db, "alice")
+            assert await cache.get(mock_db, "alice") == {"id": 1, "username": "alice"}
+
+        crud.get.assert_awaited_once_with(db=mock_db, username="alice", is_deleted=False)
+
+    def test_user_writes_clear_the_cache_on_commit(self):
+        engine = create_engine("sqlite://")
+        Tier.metadata.create_all(engine, tables=[Tier.__table__, User.__table__])
+        user_cache._entries["alice"] = (time.monotonic() + 30, {"id": 1})
+
+        with Session(engine) as session:
+            session.execute(update(User).where(User.username == "alice").values(tier_id=2))
+            assert "alice" in user_cache._entries
+            session.commit()
+
+        assert len(user_cache) == 0
+        engine.dispose()
+
+
+class TestPasswordHashing:
+    """Test that bcrypt runs in a bounded pool, off the event loop."""
+
+    @pytest.mark.asyncio
+    async def test_passwords_are_checked_in_the_pool(self):
+        hashed = security.get_password_hash("secret")
+        pool = PasswordHashingPool(max_workers=2)
+
+        with patch.object(security, "password_hashing", pool):
+            assert await security.verify_password("secret", hashed)
+            assert not await security.verify_password("wrong", hashed)
+
+        assert pool.stats()["completed"] == 2
+        pool.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_calls_beyond_the_queue_are_rejected(self):
+        pool = PasswordHashingPool(max_workers=1, max_pending=1)
+        release = threading.Event()
+
+        running = [asyncio.create_task(pool.run(release.wait)) for _ in range(2)]
+        await asyncio.sleep(0.01)
+        assert pool.stats()["running"] == 1
+        assert pool.stats()["queued"] == 1
+
+        with pytest.raises(PasswordHashingBusyError):
+            await pool.run(release.wait)
+
+        release.set()
+        await asyncio.gather(*running)
+        assert pool.stats()["completed"] == 2
+        assert pool.stats()["rejected"] == 1
+        pool.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_cancelled_calls_keep_their_slot_until_the_hash_is_done(self):
+        pool = PasswordHashingPool(max_workers=1, max_pending=0)
+        release = threading.Event()
+
+        task = asyncio.create_task(pool.run(release.wait))
+        await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+        try:
+            with pytest.raises(PasswordHashingBusyError):
+                await asyncio.wait_for(pool.run(release.wait), 1)
+            assert pool.stats()["running"] == 1
+        finally:
+            release.set()
+        for _ in range(100):
+            if pool.stats()["running"] == 0:
+                break
+            await asyncio.sleep(0.01)
+        assert pool.stats()["running"] == 0
+        pool.shutdown()
+
+
+class TestLoginRateLimit:
+    """Test that login attempts are limited per address and failed attempts per username."""
+
+    @pytest.fixture
+    def request_from(self):
+        request = Mock()
+        request.client.host = "10.0.0.1"
+        return request
+
+    async def attempt(self, request, form, fails: bool = False) -> None:
+        dependency = login_rate_limiter_dependency(request, form)
+        await anext(dependency)
+        if fails:
+            with pytest.raises(UnauthorizedException):
+                await dependency.athrow(UnauthorizedException("Wrong username, email or password."))
+        else:
+            with pytest.raises(StopAsyncIteration):
+                await anext(dependency)
+
+    @pytest.mark.asyncio
+    async def test_account_out_of_attempts_is_rejected_before_the_password_check(self, request_from):
+        allowed = RateLimitResult(True, 10, 9, reset_after=300, retry_after=0)
+        exhausted = RateLimitResult(True, 10, 0, reset_after=120, retry_after=0)
+
+        with patch("src.app.api.dependencies.rate_limiter") as limiter:
+            limiter.acquire = AsyncMock(side_effect=[allowed, exhausted])
+
+            with pytest.raises(RateLimitException) as exc_info:
+                await anext(login_rate_limiter_dependency(request_from, Mock(username="Alice")))
+
+        calls = [(call.kwargs["user_id"], call.kwargs["cost"]) for call in limiter.acquire.await_args_list]
+        assert calls == [("ip:10.0.0.1", 1), ("user:alice", 0)]
+        assert exc_info.value.headers["Retry-After"] == "120"
+
+    @pytest.mark.asyncio
+    async def test_only_failed_attempts_count_against_the_username(self, request_from):
+        allowed = RateLimitResult(True, 10, 9, reset_after=300, retry_after=0)
+
+        with patch("src.app.api.dependencies.rate_limiter") as limiter:
+            limiter.acquire = AsyncMock(return_value=allowed)
+            await self.attempt(request_from, Mock(username="alice"))
+            await self.attempt(request_from, Mock(username="alice"), fails=True)
+
+        calls = [(call.kwargs["user_id"], call.kwargs["cost"]) for call in limiter.acquire.await_args_list]
+        assert calls == [
+            ("ip:10.0.0.1", 1),
+            ("user:alice", 0),
+            ("ip:10.0.0.1", 1),
+            ("user:alice", 0),
+            ("user:alice", 1),
+        ]
+
+    @pytest.mark.asyncio
+    async def test_without_redis_attempts_are_limited_locally(self, request_from):
+        with (
+            patch("src.app.api.dependencies.rate_limiter") as limiter,
+            patch("src.app.api.dependencies._local_login_limiter", LocalRateLimiter(workers=1)),
+            patch("src.app.api.dependencies.LOGIN_LIMIT", 2),
+        ):
+            limiter.client = None
+            limiter.acquire = AsyncMock()
+            await self.attempt(request_from, Mock(username="alice"), fails=True)
+            await self.attempt(request_from, Mock(username="alice"), fails=True)
+
+            other = Mock()
+            other.client.host = "10.0.0.2"
+            with pytest.raises(RateLimitException):
+                await self.attempt(other, Mock(username="alice"))
+
+        limiter.acquire.assert_not_called()
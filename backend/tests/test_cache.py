@@ -0,0 +1,903 @@
+"""Unit tests for the cache decorator and its helpers."""
+
+import asyncio
+import json
+import os
+import time
+from fnmatch import fnmatchcase
+from unittest.mock import AsyncMock, Mock, patch
+
+import pytest
+from fastapi import Response
+from redis.asyncio import BlockingConnectionPool
+from redis.exceptions import ConnectionError as RedisConnectionError
+from redis.exceptions import NoScriptError
+
+from src.app.api.v1.health import ready
+from src.app.core.exceptions.cache_exceptions import CacheKeyTemplateError, InvalidRequestError, UnsupportedCodecError
+from src.app.core.utils import cache as cache_module
+from src.app.core.utils.cache import (
+    _INVALIDATE_TAGS_SHA,
+    _TAG_KEY_SHA,
+    CachedResult,
+    CacheStatus,
+    _apply_invalidation,
+    _pack,
+    _should_recompute,
+    cache,
+    key_pattern,
+    unpack_entry,
+)
+from src.app.core.utils.cache_codecs import decode, encode
+from src.app.core.utils.cache_sharding import ShardedClients
+from src.app.core.utils.cache_snapshot import dump_snapshot, load_snapshot, load_snapshot_once
+from src.app.core.utils.cache_stats import CacheStats, cache_stats, to_prometheus
+from src.app.core.utils.client_tracking import ClientTracking
+from src.app.core.utils.hash_ring import HashRing
+from src.app.core.utils.local_cache import LocalCache
+from src.app.core.utils.redis_connections import RedisConnectionManager
+
+
+def make_request(method: str = "GET", headers: dict | None = None) -> Mock:
+    request = Mock()
+    request.method = method
+    request.headers = headers or {}
+    return request
+
+
+@pytest.fixture
+def redis_pipeline():
+    pipeline = Mock()
+    pipeline.command_stack = []
+    pipeline.execute = AsyncMock(return_value=[1, []])
+    return pipeline
+
+
+@pytest.fixture
+def redis_client(mock_redis, redis_pipeline):
+    mock_redis.publish = AsyncMock(return_value=1)
+    mock_redis.scan = AsyncMock(return_value=(0, []))
+    mock_redis.mget = AsyncMock(return_value=[])
+    mock_redis.pipeline = Mock(return_value=redis_pipeline)
+    with patch.object(cache_module, "client", mock_redis):
+        yield mock_redis
+
+
+@pytest.fixture
+def local_cache():
+    local = LocalCache(max_entries=10, ttl=30)
+    with patch.object(cache_module, "local_cache", local):
+        yield local
+
+
+class TestLocalCache:
+    """Test the in-process cache."""
+
+    def test_set_and_get(self):
+        local = LocalCache()
+        local.set("key", b"value")
+
+        assert local.get("key") == b"value"
+
+    def test_expired_entries_are_dropped(self):
+        local = LocalCache()
+        local.set("key", b"value", ttl=0)
+
+        assert local.get("key") is None
+        assert len(local) == 0
+
+    def test_least_recently_used_is_evicted(self):
+        local = LocalCache(max_entries=2)
+        local.set("a", b"1")
+        local.set("b", b"2")
+        local.get("a")
+        local.set("c", b"3")
+
+        assert "a" in local
+        assert "b" not in local
+        assert "c" in local
+
+    def test_delete_pattern(self):
+        local = LocalCache()
+        local.set("alice_posts:page_1:items_per_page:10:alice", b"1")
+        local.set("bob_posts:page_1:items_per_page:10:bob", b"2")
+        local.delete_pattern("alice_posts:*")
+
+        assert "alice_posts:page_1:items_per_page:10:alice" not in local
+        assert "bob_posts:page_1:items_per_page:10:bob" in local
+
+    def test_one_hit_wonders_do_not_evict_frequent_keys(self):
+        local = LocalCache(max_entries=100)
+        for i in range(90):
+            local.set(f"hot:{i}", b"1")
+        for _ in range(15):
+            for i in range(90):
+                local.get(f"hot:{i}")
+
+        for i in range(1000):
+            local.set(f"once:{i}", b"1")
+
+        assert all(f"hot:{i}" in local for i in range(90))
+        assert len(local) <= 100
+
+    def test_byte_budget(self):
+        local = LocalCache(max_entries=1000, max_bytes=1000)
+        for i in range(100):
+            local.set(f"key:{i}", b"x" * 95)
+
+        assert 0 < local.weight <= 1000
+        local.set("too_big", b"x" * 2000)
+        assert "too_big" not in local
+
+    def test_entry_limit_holds_with_byte_budget(self):
+        local = LocalCache(max_entries=22, max_bytes=100_000)
+        for i in range(200):
+            local.set(f"key:{i}", b"x")
+            assert len(local) <= 22
+
+    def test_prefix_quota(self):
+        local = LocalCache(max_entries=100, prefix_quotas={"flights:": 5})
+        for i in range(20):
+            local.set(f"flights:{i}", b"1")
+        local.set("posts:1", b"1")
+
+        assert sum(f"flights:{i}" in local for i in range(20)) == 5
+        assert "flights:19" in local
+        assert "posts:1" in local
+
+
+class TestTwoTierCache:
+    """Test the local cache in front of Redis."""
+
+    @pytest.mark.asyncio
+    async def test_local_hit_skips_redis(self, redis_client, local_cache):
+        endpoint = AsyncMock(return_value={"id": 1})
+        decorated = cache(key_prefix="item", resource_id_name="id")(endpoint)
+        local_cache.set("item:1", json.dumps({"id": 1, "cached": True}).encode())
+
+        result = await decorated(make_request(), id=1)
+
+        assert result == {"id": 1, "cached": True}
+        redis_client.get.assert_not_called()
+        endpoint.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_redis_hit_populates_local_cache(self, redis_client, local_cache):
+        redis_client.get = AsyncMock(return_value=json.dumps({"id": 1}).encode())
+        decorated = cache(key_prefix="item", resource_id_name="id")(AsyncMock())
+
+        await decorated(make_request(), id=1)
+
+        assert local_cache.get("item:1") == json.dumps({"id": 1}).encode()
+
+    @pytest.mark.asyncio
+    async def test_miss_writes_both_tiers_and_broadcasts(self, redis_client, redis_pipeline, local_cache):
+        decorated = cache(key_prefix="item", resource_id_name="id")(AsyncMock(return_value={"id": 1}))
+
+        result = await decorated(make_request(), id=1)
+
+        assert result == {"id": 1}
+        redis_pipeline.set.assert_called_once()
+        redis_pipeline.execute.assert_awaited_once()
+        assert local_cache.get("item:1") is not None
+        message = json.loads(redis_pipeline.publish.call_args.args[1])
+        assert message["keys"] == ["item:1"]
+
+    @pytest.mark.asyncio
+    async def test_invalidation_evicts_local_and_broadcasts(self, redis_client, local_cache):
+        local_cache.set("alice_post_cache:1", b"{}")
+        local_cache.set("alice_posts:page_1:items_per_page:10:alice", b"{}")
+        decorated = cache(
+            "{username}_post_cache", resource_id_name="id", pattern_to_invalidate_extra=["{username}_posts:*"]
+        )(AsyncMock(return_value={"message": "Post updated"}))
+
+        await decorated(make_request("PATCH"), username="alice", id=1)
+
+        assert len(local_cache) == 0
+        message = json.loads(redis_client.publish.await_args.args[1])
+        assert message["keys"] == ["alice_post_cache:1"]
+        assert message["patterns"] == ["alice_posts:**"]
+
+    def test_remote_invalidation_is_applied(self, local_cache):
+        local_cache.set("item:1", b"{}")
+        local_cache.set("item:2", b"{}")
+
+        _apply_invalidation({"origin": "other-worker", "keys": ["item:1"], "patterns": []})
+
+        assert "item:1" not in local_cache
+        assert "item:2" in local_cache
+
+    def test_own_invalidation_is_ignored(self, local_cache):
+        local_cache.set("item:1", b"{}")
+
+        _apply_invalidation({"origin": cache_module._instance_id, "keys": ["item:1"], "patterns": []})
+
+        assert "item:1" in local_cache
+
+
+class TestStampedeProtection:
+    """Test recompute locking and probabilistic early expiration."""
+
+    def test_envelope_round_trip(self):
+        meta, payload = unpack_entry(_pack(b'{"a": 1}', {"x": 1.0, "d": 0.5}))
+
+        assert meta == {"x": 1.0, "d": 0.5}
+        assert payload == b'{"a": 1}'
+
+    def test_legacy_values_have_no_metadata(self):
+        assert unpack_entry(b'{"a": 1}') == ({}, b'{"a": 1}')
+
+    def test_should_recompute(self):
+        assert not _should_recompute({}, beta=1.0)
+        assert not _should_recompute({"x": time.time() + 3600, "d": 0.01}, beta=1.0)
+        assert _should_recompute({"x": time.time() - 1, "d": 0.01}, beta=1.0)
+
+    @pytest.mark.asyncio
+    async def test_stale_value_served_while_another_request_recomputes(self, redis_client):
+        stale = _pack(json.dumps({"stale": True}).encode(), {"x": time.time() - 5, "d": 0.1})
+        redis_client.get = AsyncMock(return_value=stale)
+        redis_client.set = AsyncMock(return_value=None)  # lock already held
+        endpoint = AsyncMock(return_value={"stale": False})
+        decorated = cache(key_prefix="item", resource_id_name="id", stampede_protection=True)(endpoint)
+
+        result = await decorated(make_request(), id=1)
+
+        assert result == {"stale": True}
+        endpoint.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_waiter_receives_recomputed_value(self, redis_client):
+        fresh = _pack(json.dumps({"fresh": True}).encode(), {"x": time.time() + 60, "d": 0.1})
+        redis_client.get = AsyncMock(side_effect=[None, None, fresh])
+        redis_client.set = AsyncMock(return_value=None)
+        endpoint = AsyncMock()
+        decorated = cache(key_prefix="item", resource_id_name="id", stampede_protection=True, lock_wait=1)(endpoint)
+
+        result = await decorated(make_request(), id=1)
+
+        assert result == {"fresh": True}
+        endpoint.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_lock_holder_recomputes_and_releases(self, redis_client, redis_pipeline):
+        redis_client.set = AsyncMock(return_value=True)
+        release = AsyncMock(return_value=1)
+        redis_client.register_script = Mock(return_value=release)
+        decorated = cache(key_prefix="item", resource_id_name="id", expiration=60, stampede_protection=True)(
+            AsyncMock(return_value={"id": 1})
+        )
+
+        result = await decorated(make_request(), id=1)
+
+        assert result == {"id": 1}
+        assert redis_client.set.await_args.kwargs == {"nx": True, "ex": 30}
+        assert redis_pipeline.set.call_args.kwargs == {"ex": 120}
+        release.assert_awaited_once()
+
+
+class TestCodecs:
+    """Test cached value serialization and compression."""
+
+    def test_json_round_trip(self):
+        payload, meta = encode({"data": [1, 2, 3]}, codec="json")
+
+        assert meta == {"c": "json"}
+        assert decode(payload, meta) == {"data": [1, 2, 3]}
+
+    def test_orjson_round_trip(self):
+        pytest.importorskip("orjson")
+        payload, meta = encode({"data": [{"price": 1.5}]}, codec="orjson")
+
+        assert decode(payload, meta) == {"data": [{"price": 1.5}]}
+
+    def test_compression_above_threshold(self):
+        data = {"data": ["x" * 100] * 50}
+        payload, meta = encode(data, codec="json", compression="gzip", min_size=1024)
+
+        assert meta == {"c": "json", "z": "gzip"}
+        assert len(payload) < len(json.dumps(data))
+        assert decode(payload, meta) == data
+
+    def test_no_compression_below_threshold(self):
+        _, meta = encode({"a": 1}, codec="json", compression="gzip", min_size=1024)
+
+        assert "z" not in meta
+
+    def test_unknown_codec_is_rejected(self):
+        with pytest.raises(UnsupportedCodecError):
+            cache(key_prefix="item", codec="pickle")
+
+        with pytest.raises(UnsupportedCodecError):
+            cache(key_prefix="item", compression="lzma")
+
+    @pytest.mark.asyncio
+    async def test_codec_tag_is_stored_with_value(self, redis_client, redis_pipeline):
+        decorated = cache(key_prefix="item", resource_id_name="id", compression="gzip")(
+            AsyncMock(return_value={"data": ["x" * 2048]})
+        )
+
+        await decorated(make_request(), id=1)
+
+        stored = redis_pipeline.set.call_args.args[1]
+        meta, payload = unpack_entry(stored)
+        assert meta["c"] == "json"
+        assert meta["z"] == "gzip"
+        assert decode(payload, meta) == {"data": ["x" * 2048]}
+
+
+class TestRawResponses:
+    """Test serving cached bytes directly as the HTTP response."""
+
+    @pytest.mark.asyncio
+    async def test_miss_and_hit_return_stored_bytes(self, redis_client, redis_pipeline):
+        decorated = cache(key_prefix="item", resource_id_name="id", raw_response=True)(
+            AsyncMock(return_value={"id": 1})
+        )
+
+        miss = await decorated(make_request(), id=1)
+        stored = redis_pipeline.set.call_args.args[1]
+        redis_client.get = AsyncMock(return_value=stored)
+        hit = await decorated(make_request(), id=1)
+
+        for response in (miss, hit):
+            assert isinstance(response, Response)
+            assert json.loads(response.body) == {"id": 1}
+            assert response.media_type == "application/json"
+            assert response.headers["etag"] == unpack_entry(stored)[0]["e"]
+
+    @pytest.mark.asyncio
+    async def test_matching_etag_returns_not_modified(self, redis_client):
+        payload, meta = encode({"id": 1}, codec="json")
+        meta.update({"t": "application/json", "e": 'W/"abc"'})
+        redis_client.get = AsyncMock(return_value=_pack(payload, meta))
+        decorated = cache(key_prefix="item", resource_id_name="id", raw_response=True)(AsyncMock())
+
+        response = await decorated(make_request(headers={"if-none-match": 'W/"abc"'}), id=1)
+
+        assert response.status_code == 304
+
+    @pytest.mark.asyncio
+    async def test_precompressed_payload_sent_when_accepted(self, redis_client):
+        data = {"data": ["x" * 2048]}
+        payload, meta = encode(data, codec="json", compression="gzip", min_size=0)
+        meta.update({"t": "application/json", "e": 'W/"abc"'})
+        redis_client.get = AsyncMock(return_value=_pack(payload, meta))
+        decorated = cache(key_prefix="item", resource_id_name="id", raw_response=True)(AsyncMock())
+
+        compressed = await decorated(make_request(headers={"accept-encoding": "gzip, br"}), id=1)
+        identity = await decorated(make_request(headers={"accept-encoding": "gzip;q=0"}), id=1)
+
+        assert compressed.headers["content-encoding"] == "gzip"
+        assert compressed.body == payload
+        assert "content-encoding" not in identity.headers
+        assert json.loads(identity.body) == data
+
+    def test_non_json_codec_is_rejected(self):
+        with pytest.raises(UnsupportedCodecError):
+            cache(key_prefix="item", codec="msgpack", raw_response=True)
+
+
+class TestTagInvalidation:
+    """Test tag-based invalidation."""
+
+    @pytest.mark.asyncio
+    async def test_get_registers_key_under_tags(self, redis_client, redis_pipeline):
+        decorated = cache(
+            key_prefix="{username}_posts:page_{page}", resource_id_name="username", tags=["user:{username}:posts"]
+        )(AsyncMock(return_value={"data": []}))
+
+        await decorated(make_request(), username="alice", page=1)
+
+        redis_pipeline.evalsha.assert_called_once_with(
+            _TAG_KEY_SHA, 1, "cache:tag:user:alice:posts", "alice_posts:page_1:alice", 3600
+        )
+        redis_pipeline.execute.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_tags_invalidated_in_one_call(self, redis_client, redis_pipeline, local_cache):
+        redis_pipeline.execute = AsyncMock(return_value=[1, [b"alice_posts:page_1:alice", b"alice_posts:page_2:alice"]])
+        local_cache.set("alice_posts:page_1:alice", b"{}")
+        decorated = cache("{username}_post_cache", resource_id_name="id", tags_to_invalidate=["user:{username}:posts"])(
+            AsyncMock(return_value={"message": "Post updated"})
+        )
+
+        await decorated(make_request("PATCH"), username="alice", id=1)
+
+        redis_pipeline.evalsha.assert_called_once_with(_INVALIDATE_TAGS_SHA, 1, "cache:tag:user:alice:posts")
+        redis_pipeline.unlink.assert_called_once_with("alice_post_cache:1")
+        redis_pipeline.execute.assert_awaited_once()
+        redis_client.scan.assert_not_called()
+        assert "alice_posts:page_1:alice" not in local_cache
+        message = json.loads(redis_client.publish.await_args.args[1])
+        assert message["keys"] == ["alice_post_cache:1", "alice_posts:page_1:alice", "alice_posts:page_2:alice"]
+
+    @pytest.mark.asyncio
+    async def test_tags_to_invalidate_rejected_on_get(self, redis_client):
+        decorated = cache("item", resource_id_name="id", tags_to_invalidate=["items"])(AsyncMock())
+
+        with pytest.raises(InvalidRequestError):
+            await decorated(make_request(), id=1)
+
+
+class TestPipelining:
+    """Test batched cache reads and writes."""
+
+    @pytest.mark.asyncio
+    async def test_extra_keys_unlinked_in_one_command(self, redis_client, redis_pipeline):
+        decorated = cache(
+            "{username}_post_cache", resource_id_name="id", to_invalidate_extra={"{username}_posts": "{username}"}
+        )(AsyncMock(return_value={"message": "Post deleted"}))
+
+        await decorated(make_request("DELETE"), username="alice", id=1)
+
+        redis_pipeline.unlink.assert_called_once_with("alice_post_cache:1", "alice_posts:alice")
+        redis_pipeline.execute.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_scripts_reloaded_when_redis_lost_them(self, redis_client, redis_pipeline):
+        redis_client.script_load = AsyncMock()
+        redis_pipeline.command_stack = [(("EVALSHA", _INVALIDATE_TAGS_SHA), {})]
+        redis_pipeline.execute = AsyncMock(side_effect=[NoScriptError("NOSCRIPT"), [1, []]])
+        decorated = cache("{username}_post_cache", resource_id_name="id", tags_to_invalidate=["user:{username}:posts"])(
+            AsyncMock(return_value={"message": "Post updated"})
+        )
+
+        await decorated(make_request("PATCH"), username="alice", id=1)
+
+        assert redis_client.script_load.await_count == 2
+        assert redis_pipeline.execute.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_set_many_uses_one_pipeline(self, redis_client, redis_pipeline):
+        await cache_module.set_many({"a": {"id": 1}, "b": {"id": 2}}, expiration=60)
+
+        assert redis_pipeline.set.call_count == 2
+        redis_pipeline.execute.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_get_many_combines_local_and_redis(self, redis_client, local_cache):
+        local_cache.set("a", _pack(b'{"id": 1}', {"c": "json"}))
+        redis_client.mget = AsyncMock(return_value=[_pack(b'{"id": 2}', {"c": "json"}), None])
+
+        result = await cache_module.get_many(["a", "b", "c"])
+
+        assert result == {"a": {"id": 1}, "b": {"id": 2}}
+        redis_client.mget.assert_awaited_once_with(["b", "c"])
+        assert local_cache.get("b") is not None
+
+
+class TestKeyTemplates:
+    """Test that key templates are compiled and validated when the decorator is applied."""
+
+    def test_unknown_template_field_rejected(self):
+        async def read_post(request, username: str, id: int):
+            return {}
+
+        with pytest.raises(CacheKeyTemplateError):
+            cache("{user_name}_post_cache", resource_id_name="id")(read_post)
+
+    def test_unknown_tag_field_rejected(self):
+        async def read_post(request, username: str, id: int):
+            return {}
+
+        with pytest.raises(CacheKeyTemplateError):
+            cache("post_cache", resource_id_name="id", tags=["user:{owner}:posts"])(read_post)
+
+    def test_unknown_resource_id_rejected(self):
+        async def read_post(request, username: str, id: int):
+            return {}
+
+        with pytest.raises(CacheKeyTemplateError):
+            cache("post_cache", resource_id_name="post_id")(read_post)
+
+    def test_declared_prefixes_give_key_patterns(self):
+        cache("{username}_posts:page_{page}", resource_id_name="username")
+
+        assert key_pattern("{username}_posts:page_{page}") == "*_posts:page_*:*"
+        assert "*_posts:page_*:*" in cache_module.key_patterns
+        assert fnmatchcase("alice_posts:page_1:alice", "*_posts:page_*:*")
+        assert key_pattern("rate[1]*") == "rate\\[1\\]\\*:*"
+
+    @pytest.mark.asyncio
+    async def test_key_built_from_compiled_template(self, redis_client):
+        redis_client.get = AsyncMock(return_value=None)
+
+        async def read_post(request, username: str, post_id: int):
+            return {"id": post_id}
+
+        decorated = cache("{username}_post_cache")(read_post)
+        await decorated(make_request(), username="alice", post_id=3)
+
+        redis_client.get.assert_awaited_with("alice_post_cache:3")
+
+
+class TestCacheStats:
+    """Test per-prefix cache instrumentation."""
+
+    @pytest.fixture(autouse=True)
+    def clean_stats(self):
+        cache_stats.reset()
+        yield
+        cache_stats.reset()
+
+    @pytest.mark.asyncio
+    async def test_miss_then_hit_recorded_under_template(self, redis_client, local_cache):
+        redis_client.get = AsyncMock(return_value=None)
+        decorated = cache(key_prefix="{username}_item", resource_id_name="id")(AsyncMock(return_value={"id": 1}))
+
+        await decorated(make_request(), username="alice", id=1)
+        await decorated(make_request(), username="alice", id=1)
+
+        stats = cache_stats.snapshot()["{username}_item"]
+        assert stats["misses"] == 1
+        assert stats["hits"] == 1
+        assert stats["local_hits"] == 1
+        assert stats["bytes_written"] == stats["bytes_read"] > 0
+        assert stats["redis_calls"] == 2
+
+    @pytest.mark.asyncio
+    async def test_flush_adds_counters_to_redis_and_resets(self, redis_pipeline):
+        stats = CacheStats()
+        stats.for_prefix("item").hits = 3
+        client = Mock()
+        client.pipeline = Mock(return_value=redis_pipeline)
+
+        await stats.flush(client)
+
+        redis_pipeline.sadd.assert_called_once_with("cache:stats:prefixes", "item")
+        redis_pipeline.hincrbyfloat.assert_called_once_with("cache:stats:item", "hits", 3)
+        assert stats.snapshot()["item"]["hits"] == 0
+
+    @pytest.mark.asyncio
+    async def test_failed_flush_keeps_counters(self, redis_pipeline):
+        stats = CacheStats()
+        stats.for_prefix("item").misses = 2
+        redis_pipeline.execute = AsyncMock(side_effect=ConnectionError)
+        client = Mock()
+        client.pipeline = Mock(return_value=redis_pipeline)
+
+        await stats.flush(client)
+
+        assert stats.snapshot()["item"]["misses"] == 2
+
+    def test_prometheus_output(self):
+        output = to_prometheus({'a"b': {"hits": 4.0, "redis_seconds": 0.25}})
+
+        assert "# TYPE cache_hits_total counter" in output
+        assert 'cache_hits_total{prefix="a\\"b"} 4' in output
+        assert 'cache_redis_seconds_total{prefix="a\\"b"} 0.25' in output
+
+
+class TestResultStatus:
+    """Test status-dependent expirations of `CachedResult` values."""
+
+    @pytest.mark.asyncio
+    async def test_error_not_cached_by_default(self, redis_client, redis_pipeline):
+        endpoint = AsyncMock(return_value=CachedResult({"data": []}, status=CacheStatus.ERROR))
+        decorated = cache(key_prefix="item", resource_id_name="id")(endpoint)
+
+        result = await decorated(make_request(), id=1)
+
+        assert result == {"data": []}
+        redis_pipeline.set.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_local_copy_expires_with_the_redis_entry(self, redis_client, local_cache):
+        stored = _pack(b'{"data": []}', {"c": "json", "s": "error", "x": time.time() + 5})
+        redis_client.get = AsyncMock(return_value=stored)
+        decorated = cache(key_prefix="item", resource_id_name="id")(AsyncMock())
+
+        await decorated(make_request(), id=1)
+
+        assert local_cache.get("item:1") == stored
+        with patch("src.app.core.utils.local_cache.time.monotonic", return_value=time.monotonic() + 6):
+            assert local_cache.get("item:1") is None
+
+    @pytest.mark.asyncio
+    async def test_empty_uses_its_own_expiration_without_stale_window(self, redis_client, redis_pipeline):
+        endpoint = AsyncMock(return_value=CachedResult({"data": []}, status=CacheStatus.EMPTY))
+        decorated = cache(
+            key_prefix="item", resource_id_name="id", expiration=1800, empty_expiration=300, stampede_protection=True
+        )(endpoint)
+        redis_client.set = AsyncMock(return_value=True)
+
+        await decorated(make_request(), id=1)
+
+        assert redis_pipeline.set.call_args.kwargs["ex"] == 300
+        meta, _ = unpack_entry(redis_pipeline.set.call_args.args[1])
+        assert meta["s"] == "empty"
+
+    @pytest.mark.asyncio
+    async def test_ok_result_unwrapped_and_cached(self, redis_client, redis_pipeline):
+        endpoint = AsyncMock(return_value=CachedResult({"data": [1]}))
+        decorated = cache(key_prefix="item", resource_id_name="id", expiration=60)(endpoint)
+
+        result = await decorated(make_request(), id=1)
+
+        assert result == {"data": [1]}
+        assert redis_pipeline.set.call_args.kwargs["ex"] == 60
+
+    @pytest.mark.asyncio
+    async def test_unwrapped_without_client(self):
+        decorated = cache(key_prefix="item", resource_id_name="id")(AsyncMock(return_value=CachedResult({"id": 1})))
+
+        with patch.object(cache_module, "client", None):
+            assert await decorated(make_request(), id=1) == {"id": 1}
+
+
+class TestSnapshot:
+    """Test dumping the hottest cache entries and loading them elsewhere."""
+
+    @pytest.mark.asyncio
+    async def test_flush_ranks_read_keys(self, redis_pipeline):
+        stats = CacheStats()
+        stats.record_read("item:1")
+        stats.record_read("item:1")
+        client = Mock()
+        client.pipeline = Mock(return_value=redis_pipeline)
+
+        await stats.flush(client)
+
+        redis_pipeline.zincrby.assert_called_once_with("cache:stats:hot_keys", 2, "item:1")
+        redis_pipeline.zremrangebyrank.assert_called_once()
+
+    def test_read_counts_are_bounded_between_flushes(self):
+        stats = CacheStats(max_tracked_keys=4)
+        for _ in range(3):
+            stats.record_read("item:hot")
+        for i in range(10):
+            stats.record_read(f"item:{i}")
+
+        assert len(stats._key_reads) <= 4
+        assert stats._key_reads["item:hot"] == 3
+
+    @pytest.mark.asyncio
+    async def test_dump_then_load_preserves_remaining_ttl(self, tmp_path, redis_pipeline):
+        path = str(tmp_path / "cache.snapshot")
+        value = _pack(b'{"id": 1}', {"c": "json", "g": ["user:alice:posts"]})
+        source = Mock()
+        source.zrevrange = AsyncMock(return_value=[b"item:1", b"item:2"])
+        source.pipeline = Mock(return_value=redis_pipeline)
+        redis_pipeline.execute = AsyncMock(return_value=[value, 60_000, None, -2])
+
+        assert await dump_snapshot(source, path, top_n=10) == 1
+
+        target_pipeline = Mock()
+        target_pipeline.command_stack = []
+        target_pipeline.execute = AsyncMock(return_value=[True, 1])
+        target = Mock()
+        target.pipeline = Mock(return_value=target_pipeline)
+
+        assert await load_snapshot(target, path) == 1
+
+        args, kwargs = target_pipeline.set.call_args
+        assert args == ("item:1", value)
+        assert kwargs["nx"] is True
+        assert 55_000 < kwargs["px"] <= 60_000
+        assert target_pipeline.evalsha.call_args.args[2:4] == ("cache:tag:user:alice:posts", "item:1")
+
+    @pytest.mark.asyncio
+    async def test_expired_entries_not_loaded(self, tmp_path):
+        path = tmp_path / "cache.snapshot"
+        path.write_text(json.dumps({"k": "item:1", "v": "e30=", "x": int(time.time() * 1000) - 1}) + "\n")
+        target_pipeline = Mock()
+        target_pipeline.command_stack = []
+        target_pipeline.execute = AsyncMock(return_value=[])
+        target = Mock()
+        target.pipeline = Mock(return_value=target_pipeline)
+
+        assert await load_snapshot(target, str(path)) == 0
+        target_pipeline.set.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_snapshot_loaded_by_one_worker(self, tmp_path):
+        path = tmp_path / "cache.snapshot"
+        path.write_text("")
+        target = Mock()
+        target.set = AsyncMock(side_effect=[True, None])
+
+        assert await load_snapshot_once(target, str(path)) == 0
+        assert await load_snapshot_once(target, str(path)) is None
+
+    @pytest.mark.asyncio
+    async def test_concurrent_dumps_use_their_own_temporary_files(self, tmp_path):
+        path = str(tmp_path / "cache.snapshot")
+        source = Mock()
+        source.zrevrange = AsyncMock(return_value=[])
+
+        await asyncio.gather(*(dump_snapshot(source, path) for _ in range(3)))
+
+        assert os.listdir(tmp_path) == ["cache.snapshot"]
+
+
+class TestClientTracking:
+    """Test server-assisted client-side caching."""
+
+    @pytest.fixture
+    def tracking(self):
+        tracking = ClientTracking(Mock(), prefixes=["rules:"])
+        tracking.active = True
+        return tracking
+
+    @pytest.mark.asyncio
+    async def test_tracked_key_served_locally_until_invalidated(self, tracking, mock_redis):
+        mock_redis.get = AsyncMock(return_value=b"10")
+
+        assert await tracking.get(mock_redis, "rules:1") == b"10"
+        assert await tracking.get(mock_redis, "rules:1") == b"10"
+        assert mock_redis.get.await_count == 1
+
+        tracking.invalidate([b"rules:1"])
+        await tracking.get(mock_redis, "rules:1")
+        assert mock_redis.get.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_untracked_key_always_read_from_redis(self, tracking, mock_redis):
+        await tracking.get(mock_redis, "other:1")
+        await tracking.get(mock_redis, "other:1")
+
+        assert mock_redis.get.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_invalidation_during_read_is_not_cached(self, tracking, mock_redis):
+        async def read_then_invalidate(key):
+            tracking.invalidate([key.encode()])
+            return b"old"
+
+        mock_redis.get = AsyncMock(side_effect=read_then_invalidate)
+
+        assert await tracking.get(mock_redis, "rules:1") == b"old"
+        assert tracking.values.get("rules:1") is None
+
+    @pytest.mark.asyncio
+    async def test_inactive_tracking_reads_through(self, tracking, mock_redis):
+        tracking.active = False
+        mock_redis.get = AsyncMock(return_value=b"10")
+
+        await tracking.get(mock_redis, "rules:1")
+
+        assert len(tracking.values) == 0
+
+    @pytest.mark.asyncio
+    async def test_enable_redirects_to_own_connection(self, tracking):
+        connection = Mock()
+        connection.send_command = AsyncMock()
+        connection.read_response = AsyncMock(side_effect=[7, b"OK", [b"subscribe", b"__redis__:invalidate", 1]])
+
+        await tracking._enable(connection)
+
+        commands = [c.args for c in connection.send_command.await_args_list]
+        assert commands[1] == ("CLIENT", "TRACKING", "ON", "REDIRECT", 7, "BCAST", "PREFIX", "rules:")
+        assert commands[2] == ("SUBSCRIBE", "__redis__:invalidate")
+
+
+class TestSharding:
+    """Test consistent-hash routing of cache keys over several nodes."""
+
+    NODES = ["redis://a:6379", "redis://b:6379", "redis://c:6379"]
+
+    def test_adding_a_node_moves_only_its_share_of_keys(self):
+        keys = [f"item:{i}" for i in range(3000)]
+        before = HashRing(self.NODES)
+        after = HashRing([*self.NODES, "redis://d:6379"])
+
+        moved = [key for key in keys if before.node_for(key) != after.node_for(key)]
+
+        assert all(after.node_for(key) == "redis://d:6379" for key in moved)
+        assert 0.15 < len(moved) / len(keys) < 0.35
+
+    def test_keys_spread_over_all_nodes(self):
+        ring = HashRing(self.NODES)
+        counts = dict.fromkeys(self.NODES, 0)
+        for i in range(3000):
+            counts[ring.node_for(f"item:{i}")] += 1
+
+        assert min(counts.values()) > 600
+
+    @pytest.fixture
+    def shards(self):
+        shards = ShardedClients(self.NODES)
+        for node in self.NODES:
+            node_client = Mock()
+            node_client.get = AsyncMock(return_value=None)
+            shards.clients[node] = node_client
+        with patch.object(cache_module, "shards", shards):
+            yield shards
+
+    @pytest.mark.asyncio
+    async def test_reads_go_to_owning_shard(self, redis_client, shards):
+        owner = shards.ring.node_for("item:1")
+
+        await cache_module._get_cached("item:1")
+
+        shards.clients[owner].get.assert_awaited_once_with("item:1")
+        redis_client.get.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_failed_shard_is_bypassed(self, redis_client, shards):
+        owner = shards.ring.node_for("item:1")
+        shards.clients[owner].get = AsyncMock(side_effect=RedisConnectionError)
+
+        assert await cache_module._get_cached("item:1") is None
+        assert not shards.is_up(owner)
+        assert cache_module._client_for("item:1") is None
+
+        shards._down_until[owner] = 0
+        assert cache_module._client_for("item:1") is shards.clients[owner]
+
+
+class TestConnectionManager:
+    """Test named Redis clients over shared pools."""
+
+    def test_clients_with_the_same_url_share_a_pool(self):
+        manager = RedisConnectionManager()
+        cache_client = manager.register("cache", "redis://localhost:6379")
+        rate_limit_client = manager.register("rate_limit", "redis://localhost:6379/")
+        queue_client = manager.register("queue", "redis://localhost:6380")
+
+        assert cache_client.connection_pool is rate_limit_client.connection_pool
+        assert queue_client.connection_pool is not cache_client.connection_pool
+        assert manager.register("cache", "redis://localhost:6379") is cache_client
+
+    def test_name_cannot_be_reused_for_another_url(self):
+        manager = RedisConnectionManager()
+        manager.register("cache", "redis://localhost:6379")
+
+        with pytest.raises(ValueError):
+            manager.register("cache", "redis://localhost:6380")
+
+    def test_max_connections_and_stats(self):
+        manager = RedisConnectionManager(max_connections=5, health_check_interval=10)
+        client = manager.register("cache", "redis://:secret@localhost:6379")
+        manager.register("queue", "redis://:secret@localhost:6379")
+
+        assert client.connection_pool.max_connections == 5
+        assert client.connection_pool.connection_kwargs["health_check_interval"] == 10
+        assert manager.stats() == {
+            "redis://:***@localhost:6379": {
+                "clients": ["cache", "queue"],
+                "max_connections": 5,
+                "in_use": 0,
+                "idle": 0,
+                "subscriptions": 0,
+            }
+        }
+
+    def test_subscriptions_use_their_own_pool(self):
+        manager = RedisConnectionManager(max_connections=5)
+        client = manager.register("cache", "redis://localhost:6379")
+        subscriber = manager.subscriber("redis://localhost:6379")
+
+        assert subscriber.connection_pool is not client.connection_pool
+        assert subscriber.connection_pool is manager.subscriber("redis://localhost:6379").connection_pool
+        assert not isinstance(subscriber.connection_pool, BlockingConnectionPool)
+
+    def test_shards_can_use_the_shared_pools(self):
+        manager = RedisConnectionManager(max_connections=5)
+        cache_client = manager.register("cache", "redis://localhost:6379")
+        nodes = ["redis://localhost:6379", "redis://localhost:6380"]
+        names = {url: f"cache_shard_{i}" for i, url in enumerate(nodes)}
+
+        shards = ShardedClients(nodes, connect=lambda url: manager.register(names[url], url))
+
+        assert shards.clients[nodes[0]].connection_pool is cache_client.connection_pool
+        assert isinstance(shards.clients[nodes[1]].connection_pool, BlockingConnectionPool)
+        assert manager.stats()["redis://localhost:6380"]["clients"] == ["cache_shard_1"]
+
+    @pytest.mark.asyncio
+    async def test_async_get_redis_reuses_the_cache_client(self, redis_client):
+        dependency = cache_module.async_get_redis()
+
+        assert await anext(dependency) is redis_client
+
+    @pytest.mark.asyncio
+    async def test_ready_reports_disabled_cache_as_unhealthy(self, mock_db):
+        with patch.object(cache_module, "client", None):
+            redis = await anext(cache_module.async_get_redis())
+        mock_db.execute = AsyncMock()
+
+        response = await ready(redis, mock_db)
+
+        assert redis is None
+        assert response.status_code == 503
+        assert json.loads(response.body)["redis"] == "unhealthy"
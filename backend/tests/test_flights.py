@@ -4,8 +4,17 @@ from unittest.mock import AsyncMock, Mock, patch
 
 import pytest
 
-from src.app.api.v1.flights import search_one_way_flights, search_round_trip_flights
-from src.app.services.flight_service import FlightServiceError
+from src.app.api.v1.flights import (
+    DAYS_PER_UNIT,
+    MAX_CHARGED_DAYS,
+    _search,
+    one_way_cost,
+    round_trip_cost,
+    search_one_way_flights,
+    search_round_trip_flights,
+)
+from src.app.core.utils.cache import CacheStatus
+from src.app.services.flight_service import FlightServiceError, UpstreamResponseError
 
 
 class TestSearchRoundTripFlights:
@@ -310,4 +319,63 @@ class TestSearchOneWayFlights:
                 )
 
                 assert result == mock_response
-                assert result["currency"] == "EUR"
\ No newline at end of file
+                assert result["currency"] == "EUR"
+
+
+class TestSearchResultStatus:
+    """Test how search results are labelled for the cache."""
+
+    @pytest.mark.asyncio
+    async def test_upstream_error_marked_as_error(self):
+        result = await _search(AsyncMock(side_effect=UpstreamResponseError("Flight API returned 500")), {})
+
+        assert result.status is CacheStatus.ERROR
+        assert result.data == {"data": []}
+
+    @pytest.mark.asyncio
+    async def test_no_flights_marked_as_empty(self):
+        result = await _search(AsyncMock(return_value={"data": []}), {})
+
+        assert result.status is CacheStatus.EMPTY
+
+    @pytest.mark.asyncio
+    async def test_other_failures_propagate(self):
+        with pytest.raises(FlightServiceError):
+            await _search(AsyncMock(side_effect=FlightServiceError("Flight search request timed out", 408)), {})
+
+
+class TestSearchCost:
+    """Test the rate limit cost of flight searches."""
+
+    def make_request(self, **params) -> Mock:
+        request = Mock()
+        request.query_params = {key: str(value) for key, value in params.items()}
+        return request
+
+    def test_default_search_costs_one_unit_per_leg(self):
+        assert one_way_cost(self.make_request()) == 1
+        assert round_trip_cost(self.make_request()) == 2
+
+    def test_cost_grows_with_result_pages_and_date_span(self):
+        request = self.make_request(
+            limit=100,
+            outbound_department_date_start="2024-07-15T00:00:00",
+            outbound_department_date_end="2024-07-25T00:00:00",
+        )
+
+        assert round_trip_cost(request) == 5 * (2 + 1)
+
+    def test_week_long_legs_cost_one_unit_each(self):
+        request = self.make_request(
+            outbound_department_date_start="2024-07-15",
+            outbound_department_date_end="2024-07-21",
+            inbound_departure_date_start="2024-07-22",
+            inbound_departure_date_end="2024-07-28",
+        )
+
+        assert round_trip_cost(request) == 2
+
+    def test_malformed_and_wide_ranges_are_bounded(self):
+        assert one_way_cost(self.make_request(limit="many", departure_date_start="soon", departure_date_end="x")) == 1
+        wide = self.make_request(departure_date_start="2024-01-01", departure_date_end="2024-12-31")
+        assert one_way_cost(wide) == -(-MAX_CHARGED_DAYS // DAYS_PER_UNIT)
@@ -0,0 +1,107 @@
+"""Unit tests for nearest-airport resolution."""
+
+import random
+from unittest.mock import Mock, patch
+
+import pytest
+
+from src.app.api.v1.locations import read_nearby_airports
+from src.app.services.flight_service import FlightServiceError, LocationProcessor
+from src.app.services.spatial_index import GeoKDTree, GeoPoint, haversine_km
+
+
+@pytest.fixture
+def coordinates_file(tmp_path):
+    path = tmp_path / "airports.csv"
+    path.write_text(
+        "iata,latitude,longitude\n"
+        "LHR,51.4700,-0.4543\n"
+        "LGW,51.1537,-0.1821\n"
+        "CDG,49.0097,2.5479\n"
+        "JFK,40.6413,-73.7781\n"
+        "SUV,-18.0433,178.5592\n"
+        "TVU,-16.6906,-179.8770\n"
+        "bad,not-a-number,0\n"
+    )
+    return str(path)
+
+
+class TestGeoKDTree:
+    """Test the spatial index against a brute-force scan."""
+
+    def test_matches_brute_force(self):
+        rng = random.Random(7)
+        points = [GeoPoint(key=f"P{i}", lat=rng.uniform(-90, 90), lon=rng.uniform(-180, 180)) for i in range(500)]
+        tree = GeoKDTree(points)
+
+        for _ in range(25):
+            lat, lon = rng.uniform(-90, 90), rng.uniform(-180, 180)
+            expected = sorted(points, key=lambda p: haversine_km(lat, lon, p.lat, p.lon))[:5]
+            result = tree.nearest(lat, lon, k=5)
+            assert [p.key for p, _ in result] == [p.key for p in expected]
+
+    def test_radius_filters_results(self):
+        tree = GeoKDTree([GeoPoint("A", 0.0, 0.0), GeoPoint("B", 0.0, 1.0), GeoPoint("C", 0.0, 10.0)])
+
+        result = tree.nearest(0.0, 0.0, k=10, radius_km=200)
+
+        assert [p.key for p, _ in result] == ["A", "B"]
+
+    def test_empty_tree(self):
+        assert GeoKDTree([]).nearest(0.0, 0.0) == []
+
+
+class TestLocationProcessor:
+    """Test coordinate loading and nearby lookups."""
+
+    def test_nearby_airports_sorted_by_distance(self, coordinates_file):
+        processor = LocationProcessor(data_file_path="missing.json", coordinates_file_path=coordinates_file)
+
+        result = processor.find_nearby_airports(51.5074, -0.1278, radius_km=100)
+
+        assert [airport["code"] for airport in result] == ["LHR", "LGW"]
+        assert result[0]["entity_key"] == "Airport:LHR"
+        assert result[0]["distance_km"] < result[1]["distance_km"]
+
+    def test_nearby_airports_across_antimeridian(self, coordinates_file):
+        processor = LocationProcessor(data_file_path="missing.json", coordinates_file_path=coordinates_file)
+
+        result = processor.find_nearby_airports(-17.0, 179.9, limit=1)
+
+        assert result[0]["code"] == "TVU"
+
+    def test_invalid_rows_are_skipped(self, coordinates_file):
+        processor = LocationProcessor(data_file_path="missing.json", coordinates_file_path=coordinates_file)
+
+        assert "BAD" not in processor.airport_coordinates
+        assert len(processor.airport_coordinates) == 6
+
+    def test_unreadable_coordinates_file_is_ignored(self, tmp_path):
+        undecodable = tmp_path / "latin1.csv"
+        undecodable.write_bytes("iata,latitude,longitude\nGRU,-23.4356,-46.4731,S\xe3o Paulo\n".encode("latin-1"))
+
+        for path in (tmp_path, undecodable):
+            processor = LocationProcessor(data_file_path="missing.json", coordinates_file_path=str(path))
+            assert processor.airport_coordinates == {}
+
+    def test_without_coordinates_raises(self):
+        processor = LocationProcessor(data_file_path="missing.json")
+
+        with pytest.raises(FlightServiceError):
+            processor.find_nearby_airports(0.0, 0.0)
+
+
+class TestReadNearbyAirports:
+    """Test the nearby airports endpoint."""
+
+    @pytest.mark.asyncio
+    async def test_read_nearby_airports(self, coordinates_file):
+        processor = LocationProcessor(data_file_path="missing.json", coordinates_file_path=coordinates_file)
+
+        with patch("src.app.api.v1.locations.flight_service") as mock_service:
+            mock_service.location_processor = processor
+
+            result = await read_nearby_airports(Mock(), lat=48.85, lon=2.35, radius=50, limit=5)
+
+        assert result["radius_km"] == 50
+        assert [airport["code"] for airport in result["data"]] == ["CDG"]
@@ -0,0 +1,459 @@
+"""Unit tests for rate limiting."""
+
+import asyncio
+from unittest.mock import AsyncMock, Mock, patch
+
+import pytest
+from fastapi import FastAPI, Request, Response
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, update
+from sqlalchemy.orm import Session
+
+from src.app.api.dependencies import (
+    DEFAULT_LIMIT,
+    DEFAULT_PERIOD,
+    concurrency_limiter_dependency,
+    rate_limiter_dependency,
+    weighted_rate_limiter,
+)
+from src.app.core.config import RedisRateLimiterSettings
+from src.app.core.exceptions.http_exceptions import RateLimitException
+from src.app.core.utils.rate_limit import (
+    LocalRateLimiter,
+    RateLimitAlgorithm,
+    RateLimiter,
+    RateLimitResult,
+    TokenLeases,
+)
+from src.app.core.utils.rate_limit_rules import RateLimitRule, RateLimitRules, rate_limit_rules
+from src.app.middleware.rate_limit_headers_middleware import RateLimitHeadersMiddleware
+from src.app.models.rate_limit import RateLimit
+from src.app.models.tier import Tier
+
+
+def make_request(path: str = "/api/v1/posts") -> Mock:
+    request = Mock()
+    request.url.path = path
+    request.app.state = Mock(spec=[])
+    request.client.host = "127.0.0.1"
+    return request
+
+
+def make_db(tiers: list[tuple], limits: list[tuple]) -> Mock:
+    db = Mock()
+    db.execute = AsyncMock(side_effect=[Mock(all=Mock(return_value=tiers)), Mock(all=Mock(return_value=limits))])
+    return db
+
+
+@pytest.fixture
+def sqlite_session():
+    engine = create_engine("sqlite://")
+    Tier.metadata.create_all(engine, tables=[Tier.__table__, RateLimit.__table__])
+    with Session(engine) as session:
+        yield session
+    engine.dispose()
+
+
+class TestRateLimitRules:
+    """Test the in-memory rule table."""
+
+    @pytest.mark.asyncio
+    async def test_load_and_lookup(self):
+        rules = RateLimitRules()
+        await rules.ensure_loaded(make_db([(1, "free")], [(1, "api_v1_posts", 5, 60, 2, None)]))
+
+        assert rules.loaded
+        assert rules.tier_name(1) == "free"
+        assert rules.get(1, "api_v1_posts") == RateLimitRule(limit=5, period=60, cost=2)
+        assert rules.get(1, "api_v1_users") is None
+
+    @pytest.mark.asyncio
+    async def test_invalidation_during_load_keeps_table_stale(self):
+        rules = RateLimitRules()
+        db = make_db([], [])
+
+        def invalidate_then_return_no_limits():
+            rules.invalidate()
+            return []
+
+        db.execute.side_effect = [Mock(all=Mock(return_value=[])), Mock(all=invalidate_then_return_no_limits)]
+
+        await rules.load(db)
+
+        assert not rules.loaded
+
+    def test_commits_touching_tiers_or_limits_invalidate(self, sqlite_session):
+        tier = Tier(name="free")
+        sqlite_session.add(tier)
+        sqlite_session.commit()
+        rate_limit_rules._loaded_generation = rate_limit_rules._generation
+        sqlite_session.add(RateLimit(tier_id=tier.id, name="posts", path="api_v1_posts", limit=5, period=60))
+        sqlite_session.commit()
+        assert not rate_limit_rules.loaded
+
+        rate_limit_rules._loaded_generation = rate_limit_rules._generation
+        sqlite_session.execute(update(RateLimit).values(limit=10))
+        sqlite_session.commit()
+        assert not rate_limit_rules.loaded
+
+    def test_rolled_back_changes_do_not_invalidate(self, sqlite_session):
+        rate_limit_rules._loaded_generation = rate_limit_rules._generation
+        sqlite_session.add(Tier(name="pro"))
+        sqlite_session.flush()
+        sqlite_session.rollback()
+
+        assert rate_limit_rules.loaded
+
+
+class TestAlgorithms:
+    """Test that limits are checked with a single script call."""
+
+    @pytest.fixture
+    def limiter(self, mock_redis):
+        script = AsyncMock(return_value=[1, 4, 60000, 0])
+        mock_redis.register_script = Mock(return_value=script)
+        limiter = RateLimiter()
+        with patch.object(limiter, "client", mock_redis), patch.object(limiter, "_scripts", {}):
+            yield limiter, mock_redis, script
+
+    @pytest.mark.asyncio
+    async def test_check_runs_one_script(self, limiter):
+        limiter, redis, script = limiter
+
+        result = await limiter.check(7, "/api/v1/posts", limit=5, period=60, algorithm=RateLimitAlgorithm.GCRA)
+
+        assert result.allowed
+        assert result.remaining == 4
+        assert result.reset_after == 60
+        assert script.await_args.kwargs["keys"] == ["ratelimit:gcra:7:api_v1_posts"]
+        assert script.await_args.kwargs["args"][:3] == [5, 60000, 1]
+        redis.incr.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_scripts_are_registered_once_per_algorithm(self, limiter):
+        limiter, redis, script = limiter
+        script.return_value = [0, 0, 30000, 12000]
+
+        await limiter.check(7, "/api/v1/posts", limit=5, period=60, algorithm=RateLimitAlgorithm.SLIDING_LOG)
+        result = await limiter.check(7, "/api/v1/posts", limit=5, period=60, algorithm=RateLimitAlgorithm.SLIDING_LOG)
+
+        assert not result.allowed
+        assert result.retry_after == 12
+        redis.register_script.assert_called_once()
+
+    def test_unknown_algorithm_is_rejected(self):
+        with pytest.raises(ValueError):
+            RateLimiter.initialize("redis://localhost:6379", algorithm="leaky")
+
+
+class FakeCounter:
+    """Exact limiter over a single counter, standing in for the Redis scripts."""
+
+    def __init__(self, limit: int) -> None:
+        self.limit = limit
+        self.used = 0
+        self.calls: list[int] = []
+
+    async def __call__(self, user_id, path, limit, period, cost=1) -> RateLimitResult:
+        self.calls.append(cost)
+        allowed = self.used + cost <= limit
+        if allowed:
+            self.used += cost
+        return RateLimitResult(allowed, limit, limit - self.used, reset_after=60, retry_after=0 if allowed else 60)
+
+
+class TestTokenLeases:
+    """Test local admission from leased token batches."""
+
+    @pytest.mark.asyncio
+    async def test_requests_are_admitted_locally_from_a_lease(self):
+        counter = FakeCounter(limit=100)
+        leases = TokenLeases(counter, lease_fraction=0.1)
+
+        results = [await leases.acquire(1, "api_v1_posts", limit=100, period=60) for _ in range(5)]
+
+        assert all(result.allowed for result in results)
+        assert counter.calls == [10]
+        assert results[-1].remaining == 95
+
+    @pytest.mark.asyncio
+    async def test_near_the_limit_falls_back_to_exact_checks(self):
+        counter = FakeCounter(limit=100)
+        leases = TokenLeases(counter, lease_fraction=0.1)
+
+        allowed = 0
+        for _ in range(120):
+            allowed += (await leases.acquire(1, "api_v1_posts", limit=100, period=60)).allowed
+            await asyncio.sleep(0)
+
+        assert allowed == 100
+        assert counter.used == 100
+        assert counter.calls[-1] == 1
+
+    @pytest.mark.asyncio
+    async def test_small_limits_are_always_exact(self):
+        counter = FakeCounter(limit=5)
+        leases = TokenLeases(counter, lease_fraction=0.1)
+
+        await leases.acquire(1, "api_v1_posts", limit=5, period=60)
+
+        assert counter.calls == [1]
+        assert len(leases) == 0
+
+    @pytest.mark.asyncio
+    async def test_zero_cost_checks_do_not_lease(self):
+        counter = FakeCounter(limit=100)
+        leases = TokenLeases(counter, lease_fraction=0.1)
+
+        result = await leases.acquire(1, "api_v1_posts", limit=100, period=60, cost=0)
+
+        assert counter.calls == [0]
+        assert result.remaining == 100
+        assert len(leases) == 0
+
+
+class TestFallback:
+    """Test that requests are limited locally while Redis is unavailable."""
+
+    @pytest.fixture
+    def limiter(self, mock_redis):
+        script = AsyncMock(side_effect=ConnectionError("Connection refused"))
+        mock_redis.register_script = Mock(return_value=script)
+        limiter = RateLimiter()
+        with (
+            patch.object(limiter, "client", mock_redis),
+            patch.object(limiter, "_scripts", {}),
+            patch.object(limiter, "fallback", LocalRateLimiter(workers=2)),
+            patch.object(limiter, "timeout", 0.05),
+            patch.object(limiter, "retry_interval", 60),
+            patch.object(limiter, "degraded_since", None),
+            patch.object(limiter, "_retry_at", 0.0),
+        ):
+            yield limiter, script
+
+    @pytest.mark.asyncio
+    async def test_unreachable_redis_falls_back_to_this_workers_share(self, limiter):
+        limiter, script = limiter
+
+        results = [await limiter.acquire(7, "/api/v1/posts", limit=4, period=60) for _ in range(3)]
+
+        assert [result.allowed for result in results] == [True, True, False]
+        assert script.await_count == 1
+        assert limiter.health()["status"] == "degraded"
+        assert "Connection refused" in limiter.health()["last_error"]
+
+    @pytest.mark.asyncio
+    async def test_slow_redis_times_out_into_the_fallback(self, limiter):
+        limiter, script = limiter
+
+        async def slow(*args, **kwargs):
+            await asyncio.sleep(1)
+
+        script.side_effect = slow
+
+        result = await limiter.acquire(7, "/api/v1/posts", limit=4, period=60)
+
+        assert result.allowed
+        assert limiter.degraded
+
+    @pytest.mark.asyncio
+    async def test_redis_is_probed_again_and_recovers(self, limiter):
+        limiter, script = limiter
+        await limiter.acquire(7, "/api/v1/posts", limit=4, period=60)
+
+        script.side_effect = None
+        script.return_value = [1, 3, 60000, 0]
+        limiter._retry_at = 0.0
+        result = await limiter.acquire(7, "/api/v1/posts", limit=4, period=60)
+
+        assert result.remaining == 3
+        assert limiter.health() == {
+            "status": "healthy",
+            "fallback_enabled": True,
+            "degraded_since": None,
+            "last_error": "ConnectionError('Connection refused')",
+        }
+
+    @pytest.mark.asyncio
+    async def test_without_fallback_errors_propagate(self, limiter):
+        limiter, _ = limiter
+        limiter.fallback = None
+
+        with pytest.raises(ConnectionError):
+            await limiter.acquire(7, "/api/v1/posts", limit=4, period=60)
+
+    def test_worker_count_follows_web_concurrency(self, monkeypatch):
+        monkeypatch.delenv("REDIS_RATE_LIMIT_FALLBACK_WORKERS", raising=False)
+        monkeypatch.setenv("WEB_CONCURRENCY", "8")
+        assert RedisRateLimiterSettings().REDIS_RATE_LIMIT_FALLBACK_WORKERS == 8
+
+        monkeypatch.setenv("REDIS_RATE_LIMIT_FALLBACK_WORKERS", "2")
+        assert RedisRateLimiterSettings().REDIS_RATE_LIMIT_FALLBACK_WORKERS == 2
+
+
+class TestRateLimiterDependency:
+    """Test that limits are resolved without database queries."""
+
+    @pytest.fixture
+    def rules(self):
+        rules = RateLimitRules()
+        rules._tiers = {1: "free"}
+        rules._limits = {
+            (1, "api_v1_posts"): RateLimitRule(5, 60),
+            (1, "api_v1_flights_search_one-way"): RateLimitRule(100, 60, cost=3, concurrency=2),
+        }
+        rules._loaded_generation = rules._generation
+        with patch("src.app.api.dependencies.rate_limit_rules", rules):
+            yield rules
+
+    @pytest.fixture
+    def limiter(self):
+        with patch("src.app.api.dependencies.rate_limiter") as limiter:
+            limiter.acquire = AsyncMock(return_value=RateLimitResult(True, 5, 4, reset_after=60, retry_after=0))
+            yield limiter
+
+    @pytest.mark.asyncio
+    async def test_tier_limit_is_read_from_memory(self, rules, limiter, mock_db):
+        await rate_limiter_dependency(make_request(), mock_db, {"id": 7, "tier_id": 1})
+
+        mock_db.execute.assert_not_called()
+        assert limiter.acquire.await_args.kwargs["limit"] == 5
+        assert limiter.acquire.await_args.kwargs["period"] == 60
+
+    @pytest.mark.asyncio
+    async def test_unknown_path_uses_default(self, rules, limiter, mock_db):
+        await rate_limiter_dependency(make_request("/api/v1/users"), mock_db, {"id": 7, "tier_id": 1})
+
+        assert limiter.acquire.await_args.kwargs["limit"] == DEFAULT_LIMIT
+        assert limiter.acquire.await_args.kwargs["period"] == DEFAULT_PERIOD
+        assert limiter.acquire.await_args.kwargs["cost"] == 1
+
+    @pytest.mark.asyncio
+    async def test_weighted_requests_are_charged_by_estimate_and_path_cost(self, rules, limiter, mock_db):
+        dependency = weighted_rate_limiter(lambda request: 4)
+
+        await dependency(make_request("/api/v1/flights/search/one-way"), mock_db, {"id": 7, "tier_id": 1})
+
+        assert limiter.acquire.await_args.kwargs["limit"] == 100
+        assert limiter.acquire.await_args.kwargs["cost"] == 12
+
+    @pytest.mark.asyncio
+    async def test_charge_is_capped_at_the_limit(self, rules, limiter, mock_db):
+        dependency = weighted_rate_limiter(lambda request: 50)
+
+        await dependency(make_request("/api/v1/flights/search/one-way"), mock_db, None)
+
+        assert limiter.acquire.await_args.kwargs["limit"] == DEFAULT_LIMIT
+        assert limiter.acquire.await_args.kwargs["cost"] == DEFAULT_LIMIT
+
+    @pytest.mark.asyncio
+    async def test_disabled_rate_limiting_skips_the_check(self, limiter, mock_db):
+        limiter.client = None
+        limiter.fallback = None
+        dependency = weighted_rate_limiter(lambda request: 4)
+
+        await dependency(make_request("/api/v1/flights/search/one-way"), mock_db, None)
+        await rate_limiter_dependency(make_request(), mock_db, None)
+
+        limiter.acquire.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_rejection_carries_rate_limit_headers(self, rules, limiter, mock_db):
+        limiter.acquire.return_value = RateLimitResult(False, 5, 0, reset_after=42.5, retry_after=12.2)
+        request = make_request()
+
+        with pytest.raises(RateLimitException) as exc_info:
+            await rate_limiter_dependency(request, mock_db, {"id": 7, "tier_id": 1})
+
+        assert exc_info.value.headers == {
+            "RateLimit-Limit": "5",
+            "RateLimit-Remaining": "0",
+            "RateLimit-Reset": "43",
+            "Retry-After": "13",
+        }
+        assert request.state.rate_limit.allowed is False
+
+
+class TestConcurrencyLimit:
+    """Test the limit on requests in flight."""
+
+    @pytest.mark.asyncio
+    async def test_slot_is_polled_until_the_wait_runs_out(self, mock_redis):
+        script = AsyncMock(side_effect=[[0, 2, 500], [0, 2, 450], [1, 2, 0]])
+        mock_redis.register_script = Mock(return_value=script)
+        limiter = RateLimiter()
+        with patch.object(limiter, "client", mock_redis), patch.object(limiter, "_slot_script", None):
+            holder = await limiter.acquire_slot(7, "/api/v1/flights/search/one-way", limit=2, lease=30, wait=1)
+            assert holder is not None
+            assert script.await_count == 3
+            assert script.await_args.kwargs["keys"] == ["concurrency:7:api_v1_flights_search_one-way"]
+            assert script.await_args.kwargs["args"][:2] == [2, 30000]
+
+            script.side_effect = None
+            script.return_value = [0, 2, 500]
+            assert await limiter.acquire_slot(7, "/api/v1/flights/search/one-way", limit=2, lease=30, wait=0) is None
+
+    @pytest.mark.asyncio
+    async def test_slot_is_held_for_the_request_and_released(self, mock_db):
+        rules = RateLimitRules()
+        rules._tiers = {1: "free"}
+        rules._limits = {(1, "api_v1_flights_search_one-way"): RateLimitRule(100, 60, concurrency=2)}
+        rules._loaded_generation = rules._generation
+        with (
+            patch("src.app.api.dependencies.rate_limit_rules", rules),
+            patch("src.app.api.dependencies.rate_limiter") as limiter,
+        ):
+            limiter.acquire_slot = AsyncMock(return_value="slot")
+            limiter.release_slot = AsyncMock()
+            dependency = concurrency_limiter_dependency(
+                make_request("/api/v1/flights/search/one-way"), mock_db, {"id": 7, "tier_id": 1}
+            )
+
+            await anext(dependency)
+            assert limiter.acquire_slot.await_args.kwargs["limit"] == 2
+            limiter.release_slot.assert_not_called()
+
+            with pytest.raises(StopAsyncIteration):
+                await anext(dependency)
+            assert limiter.release_slot.await_args.kwargs["holder"] == "slot"
+
+    @pytest.mark.asyncio
+    async def test_request_without_a_free_slot_is_rejected(self, mock_db):
+        with (
+            patch("src.app.api.dependencies.rate_limiter") as limiter,
+            patch("src.app.api.dependencies.DEFAULT_CONCURRENCY", 1),
+        ):
+            limiter.acquire_slot = AsyncMock(return_value=None)
+
+            with pytest.raises(RateLimitException) as exc_info:
+                await anext(concurrency_limiter_dependency(make_request(), mock_db, None))
+
+        assert exc_info.value.headers == {"Retry-After": "1"}
+
+
+class TestRateLimitHeadersMiddleware:
+    """Test that rate limited responses describe the remaining quota."""
+
+    def make_app(self, result: RateLimitResult | None) -> TestClient:
+        app = FastAPI()
+        app.add_middleware(RateLimitHeadersMiddleware)
+
+        @app.get("/limited")
+        async def limited(request: Request) -> Response:
+            request.state.rate_limit = result
+            return Response("raw")
+
+        return TestClient(app)
+
+    def test_headers_are_added_to_direct_responses(self):
+        response = self.make_app(RateLimitResult(True, 10, 7, reset_after=30, retry_after=0)).get("/limited")
+
+        assert response.headers["RateLimit-Limit"] == "10"
+        assert response.headers["RateLimit-Remaining"] == "7"
+        assert response.headers["RateLimit-Reset"] == "30"
+        assert "Retry-After" not in response.headers
+
+    def test_unlimited_routes_are_untouched(self):
+        response = self.make_app(None).get("/limited")
+
+        assert "RateLimit-Limit" not in response.headers
@@ -0,0 +1,119 @@
+"""Unit tests for the token blacklist."""
+
+import time
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock, Mock, patch
+
+import pytest
+
+from src.app.core.utils.token_blacklist import BloomFilter, TokenBlacklist, token_hash
+
+
+@pytest.fixture
+def crud():
+    with patch("src.app.core.utils.token_blacklist.crud_token_blacklist") as crud:
+        crud.exists = AsyncMock(return_value=False)
+        crud.create = AsyncMock()
+        yield crud
+
+
+@pytest.fixture
+def blacklist(mock_redis):
+    mock_redis.exists = AsyncMock(return_value=0)
+    mock_redis.publish = AsyncMock()
+    blacklist = TokenBlacklist(capacity=100)
+    blacklist._client = mock_redis
+    blacklist.ready = True
+    return blacklist
+
+
+class TestBloomFilter:
+    """Test the Bloom filter."""
+
+    def test_added_items_are_always_found(self):
+        bloom = BloomFilter(capacity=1000, error_rate=0.01)
+        digests = [token_hash(f"token-{i}") for i in range(1000)]
+        for digest in digests:
+            bloom.add(digest)
+
+        assert all(digest in bloom for digest in digests)
+        false_positives = sum(token_hash(f"other-{i}") in bloom for i in range(10_000))
+        assert false_positives < 300
+
+
+class TestTokenBlacklist:
+    """Test that revoked tokens are found without I/O for tokens that were never revoked."""
+
+    @pytest.mark.asyncio
+    async def test_unrevoked_token_needs_no_io(self, blacklist, crud, mock_redis, mock_db):
+        assert not await blacklist.contains(mock_db, "token")
+
+        mock_redis.exists.assert_not_called()
+        crud.exists.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_revoked_token_is_stored_shared_and_found(self, blacklist, crud, mock_redis, mock_db):
+        exp = time.time() + 600
+
+        await blacklist.add(mock_db, "token", exp)
+
+        crud.create.assert_awaited_once()
+        key = mock_redis.set.await_args.args[0]
+        assert key == f"token_blacklist:{token_hash('token')}"
+        assert 598 <= mock_redis.set.await_args.kwargs["ex"] <= 600
+        mock_redis.publish.assert_awaited_once_with("token_blacklist", token_hash("token"))
+
+        mock_redis.exists.return_value = 1
+        assert await blacklist.contains(mock_db, "token")
+        crud.exists.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_filter_hits_missing_from_redis_are_confirmed_in_the_database(
+        self, blacklist, crud, mock_redis, mock_db
+    ):
+        blacklist.bloom.add(token_hash("token"))
+        crud.exists.return_value = True
+
+        assert await blacklist.contains(mock_db, "token")
+        crud.exists.assert_awaited_once_with(mock_db, token="token")
+
+    @pytest.mark.asyncio
+    async def test_incomplete_filter_is_not_trusted(self, blacklist, crud, mock_redis, mock_db):
+        blacklist.ready = False
+        mock_redis.exists.side_effect = ConnectionError("Connection refused")
+
+        assert not await blacklist.contains(mock_db, "token")
+        crud.exists.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_load_rebuilds_filter_from_unexpired_tokens(self, blacklist, mock_db):
+        blacklist._client = None
+        blacklist.bloom.add(token_hash("expired"))
+        rows = Mock(all=Mock(return_value=[("revoked", Mock())]))
+        mock_db.execute = AsyncMock(return_value=rows)
+
+        await blacklist.load(mock_db)
+
+        assert token_hash("revoked") in blacklist.bloom
+        assert token_hash("expired") not in blacklist.bloom
+
+    @pytest.mark.asyncio
+    async def test_only_one_worker_backfills_redis(self, blacklist, mock_redis, mock_db):
+        rows = Mock(all=Mock(return_value=[("revoked", datetime.now() + timedelta(minutes=10))]))
+        mock_db.execute = AsyncMock(return_value=rows)
+        pipe = Mock(execute=AsyncMock())
+        mock_redis.pipeline = Mock(return_value=Mock(__aenter__=AsyncMock(return_value=pipe), __aexit__=AsyncMock()))
+
+        await blacklist.load(mock_db)
+        mock_redis.set.assert_not_called()
+
+        await blacklist.load(mock_db, backfill=True)
+        assert mock_redis.set.await_args.kwargs == {"nx": True, "ex": blacklist.backfill_guard_ttl}
+        assert pipe.set.call_args.args[0] == blacklist.key_prefix + token_hash("revoked")
+        assert pipe.set.call_args.kwargs["nx"] is True
+
+        mock_redis.set.return_value = None
+        pipe.set.reset_mock()
+        await blacklist.load(mock_db, backfill=True)
+        pipe.set.assert_not_called()
+        assert token_hash("revoked") in blacklist.bloom